@@ -5,34 +5,34 @@ logging.getLogger('py.warnings').setLevel(logging.ERROR)
 
 import sys
 import types
-
-# ✅ Final fix: Patch torch.classes to avoid Streamlit watcher crash
-import torch
-class FakePath(types.SimpleNamespace):
-    _path = []
-try:
-    torch.classes.__path__ = FakePath()
-except Exception:
-    pass
-
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
 import streamlit as st
 from streamlit.runtime.caching import cache_resource
 
-from utils.config import MODEL_PATHS, REPORT_DIR
+from utils.config import (
+    MODEL_PATHS, REPORT_DIR,
+    GENERATION_CACHE_PATH, GENERATION_CACHE_MAX_MB, LINT_CACHE_PATH, LINT_CACHE_MAX_MB,
+    MODEL_MEMORY_BUDGET_MB, DEFAULT_MODEL, INFERENCE_DAEMON_URL
+)
 from utils.logger import get_logger
-from core.language_detect import detect_language
-from core.parser import extract_code_snippets
-from core.summarizer import generate_summary
-from core.doc_generator import generate_docstring
-from core.code_quality import run_code_quality
-from core.github_fetcher import fetch_python_and_js_files_from_repo
+from core.language_detect import detect_language, language_for_file
+from core.parser import parse_source
+from core.code_quality import run_code_quality, run_code_quality_on_files, has_blocking_issues
+from core.ast_metrics import quick_quality, is_syntax_error
+from core.cache import GenerationCache, LintCache
+from core.model_registry import ModelRegistry, load_model_bundle, close_model_bundle
+from core.daemon_client import InferenceClient, DaemonUnavailableError
+from core.dedup import SnippetClusters, generate_clustered
 from report_builder.generate_report import build_report
-from report_builder.section_writer import (
-    format_summary_blocks, format_docstring_blocks, format_quality_result
-)
+from report_builder.section_writer import build_sections
+
+# The model stack (torch, transformers and the core modules built on them), the
+# GitHub fetcher and the PDF renderer are imported on first use, so a cold
+# process draws the page before they load. Check with scripts/check_import_time.py.
 
 logger = get_logger("app")
 
@@ -43,20 +43,96 @@ st.title("🧠 Code Documentation & Report Generator")
 model_choice = st.sidebar.selectbox("Choose Model", list(MODEL_PATHS.keys()))
 model_path = MODEL_PATHS[model_choice]
 mode = st.sidebar.radio("Input Mode", ["Paste Code", "GitHub Repo"])
+deterministic = st.sidebar.checkbox(
+    "Deterministic output (cacheable)", value=True,
+    help="Greedy decoding: identical code always gets the same text, so reruns are served from cache."
+)
+full_lint = st.sidebar.checkbox(
+    "Run full linters (pylint / ESLint)", value=True,
+    help="Built-in AST metrics are always shown instantly; the full linters run in the background "
+         "while the model generates and are added to the report."
+)
 
-# Load model with cache
-from main import load_doc_model
+def patch_torch_classes():
+    # ✅ Final fix: Patch torch.classes to avoid Streamlit watcher crash
+    import torch
+    class FakePath(types.SimpleNamespace):
+        _path = []
+    try:
+        torch.classes.__path__ = FakePath()
+    except Exception:
+        pass
+
+def load_app_model(path):
+    patch_torch_classes()
+    return load_model_bundle(path)
+
+# Registry shared by all sessions; the default model starts loading with the server
+@cache_resource
+def get_model_registry():
+    registry = ModelRegistry(
+        load_app_model,
+        budget_mb=MODEL_MEMORY_BUDGET_MB,
+        on_evict=close_model_bundle
+    )
+    registry.preload(MODEL_PATHS[DEFAULT_MODEL])
+    return registry
 
 @cache_resource
-def get_cached_model(path):
-    return load_doc_model(path)
+def get_daemon_client(model_name):
+    return InferenceClient(INFERENCE_DAEMON_URL, model_name)
+
+def wait_until_ready(state, preload):
+    """Render the warming-up / failed states of a model; returns only once it is ready."""
+    if state == "failed":
+        st.error("⚠️ Failed to load model. Check model path or weights.")
+        if st.button("🔁 Retry loading"):
+            preload()
+            st.rerun()
+        st.stop()
+    if state != "ready":
+        preload()
+        st.info(f"⏳ Warming up {model_choice}... this page refreshes when the model is ready.")
+        time.sleep(2)
+        st.rerun()
+
+daemon = get_daemon_client(model_choice)
+daemon_state = daemon.model_state()
+if daemon_state is not None:
+    # The inference daemon owns the model and survives app restarts; no weights load here
+    wait_until_ready(daemon_state, daemon.preload)
+    tokenizer, model, scheduler = None, None, daemon
+else:
+    model_registry = get_model_registry()
+    wait_until_ready(model_registry.state(model_path), lambda: model_registry.preload(model_path))
+
+    # Reloads (blocking) if another session evicted the model since the state check
+    model_result = model_registry.get(model_path)
+    if model_result is None:
+        st.error("⚠️ Failed to load model. Check model path or weights.")
+        st.stop()
 
-model_result = get_cached_model(model_path)
-if model_result is None:
-    st.error("⚠️ Failed to load model. Check model path or weights.")
-    st.stop()
+    tokenizer, model, scheduler = model_result
+
+@cache_resource
+def get_generation_cache():
+    return GenerationCache(GENERATION_CACHE_PATH, max_bytes=GENERATION_CACHE_MAX_MB * 1024 * 1024)
+
+generation_cache = get_generation_cache()
+
+@cache_resource
+def get_lint_cache():
+    return LintCache(LINT_CACHE_PATH, max_bytes=LINT_CACHE_MAX_MB * 1024 * 1024)
+
+lint_cache = get_lint_cache()
+
+# Full linters run here while the model generates
+@cache_resource
+def get_lint_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="lint")
 
-tokenizer, model = model_result
+lint_executor = get_lint_executor()
+gen_options = {"deterministic": deterministic, "cache": generation_cache}
 
 def display_quality_issues(quality_result: dict):
     st.error("⚠️ Code issues detected. Please review before generating full report.")
@@ -65,26 +141,84 @@ def display_quality_issues(quality_result: dict):
     st.code(quality_result['raw_output'], language="text")
     st.stop()
 
-def process_code_blocks(code_snippets, full_code_text, language, model_choice):
-    quality_result = run_code_quality(full_code_text, language)
-    if quality_result["num_issues"] > 0 or "[AST Parse Error]" in quality_result["raw_output"]:
-        display_quality_issues(quality_result)
+def reload_if_evicted():
+    """Get the model from the registry again if another session's load evicted it (closing its scheduler)."""
+    global tokenizer, model, scheduler
+    if model is None or not scheduler.closed:
+        return
+    logger.info(f"{model_choice} was evicted since this run started; loading it again")
+    with st.spinner(f"⏳ {model_choice} was unloaded to make room for another model; loading it again..."):
+        model_result = model_registry.get(model_path)
+    if model_result is None:
+        st.error("⚠️ Failed to load model. Check model path or weights.")
+        st.stop()
+    tokenizer, model, scheduler = model_result
+
+def generate_blocks(code_snippets, model_choice):
+    from core.summarizer import generate_summary
+    from core.doc_generator import generate_docstring
+    from core.scheduler import SchedulerBusyError, SchedulerClosedError
+
+    def generate(codes):
+        # Retried once if the model is evicted while this session waits for it
+        for attempt in range(2):
+            reload_if_evicted()
+            try:
+                return list(zip(
+                    generate_summary(codes, tokenizer, model, model_choice, runner=scheduler, **gen_options),
+                    generate_docstring(codes, tokenizer, model, model_choice, runner=scheduler, **gen_options)
+                ))
+            except SchedulerClosedError:
+                if attempt or model is None:
+                    raise
+
+    try:
+        # Near-duplicate snippets (vendored copies, generated code) are generated once
+        clusters = SnippetClusters()
+        outputs = generate_clustered(code_snippets, clusters, generate)
+        logger.info(f"{len(code_snippets)} snippet(s) in {len(clusters.representatives)} cluster(s)")
+    except SchedulerBusyError:
+        st.warning("⏳ The model is busy serving other users. Please try again in a moment.")
+        st.stop()
+    except SchedulerClosedError:
+        st.warning("⏳ The model keeps being unloaded for other users' models. Please try again in a moment.")
+        st.stop()
+    except DaemonUnavailableError:
+        st.error("⚠️ The inference daemon stopped responding. Reload the page to run the model in this process.")
+        st.stop()
+    return [s for s, _ in outputs], [d for _, d in outputs]
 
-    summaries = generate_summary(code_snippets, tokenizer, model, model_choice)
-    docstrings = generate_docstring(code_snippets, tokenizer, model, model_choice)
+def process_code_blocks(code_snippets, quality_results, model_choice, lint_future=None):
+    summaries, docstrings = generate_blocks(code_snippets, model_choice)
+    if lint_future is not None:
+        quality_results = quality_results + lint_future.result()
 
     if not any(s.strip() for s in summaries) and not any(d.strip() for d in docstrings):
         st.warning("⚠️ No meaningful summary or docstring output from model.")
         st.stop()
 
-    sections = {
-        "Summary": format_summary_blocks(summaries),
-        "Docstring": format_docstring_blocks(docstrings),
-        "Code Quality": format_quality_result([quality_result])
-    }
-
+    # Only files the linters had something to say about go into the report
+    reported = [r for r in quality_results if r["raw_output"] and r["tool"] != "unsupported"]
+    sections = build_sections(summaries, docstrings, reported)
     md_path, pdf_path = build_report(sections, output_dir=REPORT_DIR)
-    return summaries, docstrings, quality_result, md_path, pdf_path
+    return summaries, docstrings, md_path, pdf_path, quality_results
+
+def show_quality_result(result: dict):
+    st.markdown(f"**Tool:** `{result['tool']}`")
+    st.markdown(f"**Issues:** {result['num_issues']}")
+    if result["tool"] == "ast-metrics":
+        st.code(result["raw_output"], language="text")
+
+def render_stream(stream, num_blocks: int) -> list[str]:
+    """Fill one placeholder per block from a `(index, text_so_far)` stream and return the final texts."""
+    slots = [st.empty() for _ in range(num_blocks)]
+    texts = [""] * num_blocks
+    for i, text in stream:
+        texts[i] = text
+        slots[i].markdown(f"- {text} ▌")
+    for slot, text in zip(slots, texts):
+        slot.markdown(f"- {text}")
+    return texts
 
 # Paste Code Mode
 if mode == "Paste Code":
@@ -101,32 +235,82 @@ if mode == "Paste Code":
             st.error("Language not supported. Only Python and JavaScript are allowed.")
             st.stop()
 
-        quality_result = run_code_quality(code_input, language)
-        if quality_result["num_issues"] > 0 and "[AST Parse Error]" in quality_result["raw_output"]:
-            display_quality_issues(quality_result)
-
-        snippets = extract_code_snippets(code_input, language)
+        parsed = parse_source(code_input, language, tokenizer=tokenizer)
+        snippets = parsed.snippets
         if not snippets:
             snippets = [code_input.strip()]  # fallback to full script
 
         st.success(f"Language detected: {language.capitalize()} — {len(snippets)} block(s) found.")
         st.info("Analyzing code blocks...")
 
-        summaries, docstrings, quality_result, md_path, pdf_path = process_code_blocks(
-            snippets, code_input, language, model_choice
-        )
-
-        with st.expander("📚 Summary"):
-            for s in summaries:
-                st.markdown(f"- {s}")
+        # Quick tier first; JavaScript has none and is gated on the full linter as before
+        quality_results, lint_future = [], None
+        quick_result = quick_quality(code_input, language, parsed)
+        if quick_result is None:
+            quality_results.append(run_code_quality(code_input, language, cache=lint_cache, parsed=parsed))
+            if has_blocking_issues(quality_results[0]):
+                display_quality_issues(quality_results[0])
+        else:
+            if is_syntax_error(quick_result):
+                display_quality_issues(quick_result)
+            quality_results.append(quick_result)
+            if full_lint:
+                lint_future = lint_executor.submit(run_code_quality, code_input, language, lint_cache, parsed)
+
+        reload_if_evicted()
+        if model is not None and scheduler.can_stream:
+            from core.summarizer import stream_summary
+            from core.doc_generator import stream_docstring
+
+            # Streams run under the shared scheduler's model lock; near-duplicates are streamed once
+            cluster_ids = SnippetClusters().assign(snippets)
+            members = {}
+            for i, cid in enumerate(cluster_ids):
+                members.setdefault(cid, []).append(i)
+            unique = [snippets[blocks[0]] for blocks in members.values()]
+            targets = list(members.values())
+
+            def fan_out(stream):
+                return ((i, text) for k, text in stream for i in targets[k])
+
+            summary_stream = fan_out(stream_summary(unique, tokenizer, model, model_choice, runner=scheduler, **gen_options))
+            docstring_stream = fan_out(stream_docstring(unique, tokenizer, model, model_choice, runner=scheduler, **gen_options))
+        else:
+            # Served by the inference daemon, a worker pool or assisted decoding: each block arrives whole
+            summaries, docstrings = generate_blocks(snippets, model_choice)
+            summary_stream, docstring_stream = enumerate(summaries), enumerate(docstrings)
+
+        from core.scheduler import SchedulerClosedError
+
+        # Stream tokens into the expanders as they decode instead of waiting for the full batch
+        try:
+            with st.expander("📚 Summary", expanded=True):
+                summaries = render_stream(summary_stream, len(snippets))
+
+            with st.expander("📋 Docstring", expanded=True):
+                docstrings = render_stream(docstring_stream, len(snippets))
+        except SchedulerClosedError:
+            # Evicted mid-stream by another session's model load: finish in one batch on the reloaded model
+            summaries, docstrings = generate_blocks(snippets, model_choice)
+            with st.expander("📚 Summary", expanded=True):
+                summaries = render_stream(enumerate(summaries), len(snippets))
+
+            with st.expander("📋 Docstring", expanded=True):
+                docstrings = render_stream(enumerate(docstrings), len(snippets))
+
+        if not any(s.strip() for s in summaries) and not any(d.strip() for d in docstrings):
+            st.warning("⚠️ No meaningful summary or docstring output from model.")
+            st.stop()
 
-        with st.expander("📋 Docstring"):
-            for d in docstrings:
-                st.markdown(f"- {d}")
+        if lint_future is not None:
+            quality_results.append(lint_future.result())
+        md_path, pdf_path = build_report(
+            build_sections(summaries, docstrings, quality_results), output_dir=REPORT_DIR
+        )
 
         with st.expander("📉 Code Quality"):
-            st.markdown(f"**Tool:** `{quality_result['tool']}`")
-            st.markdown(f"**Issues:** {quality_result['num_issues']}")
+            for result in quality_results:
+                show_quality_result(result)
 
         st.markdown("---")
         st.success("✅ Report generated!")
@@ -136,38 +320,114 @@ if mode == "Paste Code":
             with open(pdf_path, "rb") as f:
                 st.download_button("📄 Download PDF", f, file_name=os.path.basename(pdf_path))
 
+def run_incremental_repo(repo_url: str, base_ref: str = None):
+    """Analyze a repo against its previous run (or `base_ref`) and show the merged report."""
+    from core.incremental import IncrementalState, analyze_incremental, github_snapshot
+
+    try:
+        tree, fetch, base = github_snapshot(repo_url, base=base_ref)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+    if not tree and not base:
+        st.error("No .py/.js/.ipynb code files found in the repo." if base_ref is None else f"No changes since {base_ref}.")
+        st.stop()
+
+    def generate(codes):
+        summaries, docstrings = generate_blocks(codes, model_choice)
+        return list(zip(summaries, docstrings))
+
+    result = analyze_incremental(
+        tree, fetch, IncrementalState(repo_url, model_choice), generate,
+        tokenizer=tokenizer, base=base, full_lint=full_lint, lint_cache=lint_cache
+    )
+    stats = result["stats"]
+    st.success(
+        f"{stats.get('files_changed', 0)} changed and {stats.get('files_unchanged', 0)} unchanged file(s); "
+        f"{stats.get('generated', 0)} function(s) generated, {stats.get('functions_removed', 0)} removed."
+    )
+
+    functions = [(path, f) for path, entry in result["files"].items() for f in entry["functions"]]
+    quality_results = [q for entry in result["files"].values() for q in (entry["metrics"], entry["quality"]) if q]
+    with st.expander("📚 Summary"):
+        for path, f in functions:
+            st.markdown(f"- `{path}` `{f['name']}` ({f['status']}): {f['summary']}")
+
+    with st.expander("📋 Docstring"):
+        for path, f in functions:
+            st.markdown(f"- `{path}` `{f['name']}`: {f['docstring']}")
+
+    reported = [r for r in quality_results if r["raw_output"] and r["tool"] != "unsupported"]
+    sections = build_sections([f["summary"] for _, f in functions], [f["docstring"] for _, f in functions], reported)
+    md_path, pdf_path = build_report(sections, output_dir=REPORT_DIR)
+
+    st.markdown("---")
+    st.success("✅ Report generated!")
+    with open(md_path, "r", encoding="utf-8") as f:
+        st.download_button("📅 Download Markdown", f, file_name=os.path.basename(md_path))
+    if pdf_path:
+        with open(pdf_path, "rb") as f:
+            st.download_button("📄 Download PDF", f, file_name=os.path.basename(pdf_path))
+
 # GitHub Repo Mode
 if mode == "GitHub Repo":
     st.subheader("Enter a GitHub Repository URL:")
     repo_url = st.text_input("GitHub URL")
+    incremental = st.checkbox(
+        "Only re-analyze what changed since the last run", value=False,
+        help="Unchanged files are not downloaded and unchanged functions keep their summaries; "
+             "the report still covers the whole repo."
+    )
+    base_ref = st.text_input(
+        "Compare against base ref (optional)",
+        help="Branch, tag or commit: only functions added or changed since it are analyzed and reported."
+    ).strip()
 
     if st.button("🖱 Fetch and Generate Report"):
         if not repo_url.strip():
             st.warning("Please enter a valid GitHub repo URL.")
             st.stop()
 
-        code_files = fetch_python_and_js_files_from_repo(repo_url)
+        if incremental or base_ref:
+            run_incremental_repo(repo_url, base_ref or None)
+            st.stop()
+
+        from core.github_fetcher import fetch_repo_files
+        code_files = fetch_repo_files(repo_url)
         if not code_files:
             st.error("No .py/.js/.ipynb code files found in the repo.")
             st.stop()
 
-        full_code = "\n\n".join(code_files)
-        detected_lang = detect_language(full_code)
-        if detected_lang == "unknown":
+        # Language is decided per file, from the extension, so mixed repos use the right extractor
+        # and linter for each file; each file is parsed once for its snippets and quick quality metrics
+        file_languages = {path: language_for_file(path, code) for path, code in code_files}
+        code_files = [(path, code) for path, code in code_files if file_languages[path] != "unknown"]
+        if not code_files:
             st.error("Language not supported.")
             st.stop()
-
-        code_snippets = []
-        for code in code_files:
-            code_snippets.extend(extract_code_snippets(code, detected_lang))
+        parsed_files = [parse_source(code, file_languages[path], path, tokenizer) for path, code in code_files]
+        code_snippets = [s for parsed in parsed_files for s in parsed.snippets]
 
         if not code_snippets:
-            code_snippets = [full_code.strip()]  # fallback for script-style code
+            code_snippets = [code.strip() for _, code in code_files]  # fallback for script-style code
+
+        languages = sorted({parsed.language.title() for parsed in parsed_files})
+        st.success(f"Detected {len(code_snippets)} code block(s) in {' and '.join(languages)}.")
+
+        # Files without a quick tier (JavaScript) always get the full linter
+        quick_results, lint_files = [], []
+        for (path, code), parsed in zip(code_files, parsed_files):
+            result = quick_quality(code, parsed.language, parsed)
+            if result is not None:
+                lines = result["raw_output"].splitlines()
+                quick_results.append({**result, "path": path, "raw_output": "\n".join(f"{path}:{l}" for l in lines)})
+            if full_lint or result is None:
+                lint_files.append((path, code))
 
-        st.success(f"Detected {len(code_snippets)} code block(s) in {detected_lang.title()}.")
+        lint_future = lint_executor.submit(run_code_quality_on_files, lint_files, None, lint_cache) if lint_files else None
 
-        summaries, docstrings, quality_result, md_path, pdf_path = process_code_blocks(
-            code_snippets, full_code, detected_lang, model_choice
+        summaries, docstrings, md_path, pdf_path, quality_results = process_code_blocks(
+            code_snippets, quick_results, model_choice, lint_future
         )
 
         with st.expander("📚 Summary"):
@@ -179,8 +439,13 @@ if mode == "GitHub Repo":
                 st.markdown(f"- {d}")
 
         with st.expander("📉 Code Quality"):
-            st.markdown(f"**Tool:** `{quality_result['tool']}`")
-            st.markdown(f"**Issues:** {quality_result['num_issues']}")
+            for tool in sorted({r["tool"] for r in quality_results if r["tool"] != "unsupported"}):
+                results = [r for r in quality_results if r["tool"] == tool]
+                flagged = [r for r in results if r["num_issues"]]
+                st.markdown(f"**Tool:** `{tool}`")
+                st.markdown(f"**Issues:** {sum(r['num_issues'] for r in flagged)} in {len(flagged)} of {len(results)} file(s)")
+                for r in flagged:
+                    st.markdown(f"- `{r['path']}`: {r['num_issues']}")
 
         st.markdown("---")
         st.success("✅ Report generated!")
@@ -0,0 +1,337 @@
+"""
+Headless command line for the summary -> docstring -> lint -> report pipeline.
+
+Usage:
+    python -m bigdocbot analyze <path-or-url>... [--model CodeT5p] [--out results.jsonl] [--reports [DIR]]
+                                [--incremental | --base REF]
+    python -m bigdocbot serve [--host 127.0.0.1] [--port 8765] [--preload CodeT5p ...]
+
+Each input is a local file, a local directory (searched recursively) or a
+GitHub repo URL. The model is loaded once; one JSON line is written per source
+file as soon as it finishes. With --incremental, only functions added or
+changed since the previous run of the same input are generated and only
+changed files are linted and written; the report still covers every file.
+--base REF compares against a git ref instead (PR-style) and reports only the
+functions added or changed since it. The exit status is 0 when every input was
+analyzed, 1 if any input or file failed, and 2 if the model could not be loaded.
+
+`serve` starts the inference daemon. While it runs, `analyze` and the web app
+send generation to it instead of loading the model themselves.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from utils.config import (
+    MODEL_PATHS, DEFAULT_MODEL, REPORT_DIR, GENERATION_CACHE_PATH, GENERATION_CACHE_MAX_MB,
+    LINT_CACHE_PATH, LINT_CACHE_MAX_MB,
+    MODEL_MEMORY_BUDGET_MB, INFERENCE_DAEMON_HOST, INFERENCE_DAEMON_PORT, INFERENCE_DAEMON_URL
+)
+from utils.logger import get_logger
+
+logger = get_logger("bigdocbot")
+
+SOURCE_EXTENSIONS = (".py", ".js", ".ipynb")
+SKIP_DIRS = {".git", ".hg", "node_modules", "venv", ".venv", "env", "__pycache__", "build", "dist"}
+
+
+def collect_local_files(path: str) -> list[tuple[str, str]]:
+    """
+    Read .py, .js and .ipynb (code cells) files from a file or directory tree.
+
+    Args:
+        path (str): Local file or directory.
+
+    Returns:
+        list[tuple[str, str]]: (file path, code) pairs in a stable order.
+    """
+    if os.path.isfile(path):
+        paths = [path]
+    elif os.path.isdir(path):
+        paths = []
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+            paths.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(SOURCE_EXTENSIONS))
+    else:
+        raise FileNotFoundError(f"{path} not found.")
+
+    code_files = []
+    for file_path in paths:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            code = f.read()
+        if file_path.endswith(".ipynb"):
+            from core.github_fetcher import extract_code_from_notebook
+            code = extract_code_from_notebook(code)
+        if code.strip():
+            code_files.append((file_path, code))
+    return code_files
+
+
+def is_repo_url(source: str) -> bool:
+    """Whether an input is a GitHub repo URL rather than a local path."""
+    return source.startswith(("http://", "https://")) or source.startswith("github.com/")
+
+
+def collect_files(source: str) -> list[tuple[str, str]]:
+    """Return the (path, code) pairs for a local path or a GitHub repo URL."""
+    if is_repo_url(source):
+        from core.github_fetcher import fetch_repo_files
+        return fetch_repo_files(source)
+    return collect_local_files(source)
+
+
+def write_record(out, record: dict):
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def run_incremental(source: str, args, tokenizer, generate, lint_cache, out) -> list[dict]:
+    """
+    Analyze one input incrementally against its previous run (or `args.base`).
+
+    Writes a record per changed file and an "incremental" record with the
+    counts and removed functions.
+
+    Returns:
+        list[dict]: File records for every file, unchanged ones included.
+    """
+    from core.incremental import IncrementalState, analyze_incremental, github_snapshot, local_snapshot
+
+    if is_repo_url(source):
+        state_key = source
+        tree, fetch, base = github_snapshot(source, base=args.base)
+    else:
+        state_key = os.path.abspath(source)
+        tree, fetch, base = local_snapshot(source, collect_local_files(source), base=args.base)
+    if not tree and not base:
+        raise ValueError("No .py/.js/.ipynb code files found." if args.base is None else f"No changes since {args.base}.")
+
+    logger.info(f"{source}: incremental analysis of {len(tree)} file(s) with {args.model}")
+    result = analyze_incremental(
+        tree, fetch, IncrementalState(state_key, args.model), generate,
+        tokenizer=tokenizer,
+        base=base,
+        full_lint=not args.quick_lint,
+        lint_cache=lint_cache,
+        lint_config_dir=source if os.path.isdir(source) else "."
+    )
+
+    records = []
+    for path, entry in result["files"].items():
+        record = {
+            "type": "file", "input": source, "path": path, "language": entry["language"], "status": "ok",
+            "changed": entry["changed"], "blocks": entry["functions"],
+            "quality": entry["quality"], "metrics": entry["metrics"]
+        }
+        if entry["changed"]:
+            write_record(out, record)
+        records.append(record)
+    write_record(out, {
+        "type": "incremental", "input": source, "base": args.base, **result["stats"],
+        "removed": [{"path": path, "name": name} for path, name in result["removed"]]
+    })
+    return records
+
+
+def analyze(args) -> int:
+    """Run the pipeline over every input and stream JSONL records; return the exit status."""
+    from core.cache import GenerationCache, LintCache
+    from core.code_quality import run_code_quality_on_files
+    from core.daemon_client import InferenceClient
+    from core.dedup import SnippetClusters
+    from core.language_detect import language_for_file
+    from core.pipeline import analyze_code, generate_outputs
+
+    client = InferenceClient(args.daemon, args.model)
+    if not args.local and client.model_state() is not None:
+        logger.info(f"Using the inference daemon at {args.daemon}")
+        tokenizer, model, runner = None, None, client
+    else:
+        from main import load_doc_model
+        model_result = load_doc_model(MODEL_PATHS[args.model])
+        if model_result is None:
+            logger.error(f"Failed to load {args.model} from {MODEL_PATHS[args.model]}")
+            return 2
+        (tokenizer, model), runner = model_result, None
+
+    cache = lint_cache = None
+    if not args.no_cache:
+        lint_cache = LintCache(LINT_CACHE_PATH, max_bytes=LINT_CACHE_MAX_MB * 1024 * 1024)
+        if not args.sample:
+            cache = GenerationCache(GENERATION_CACHE_PATH, max_bytes=GENERATION_CACHE_MAX_MB * 1024 * 1024)
+
+    # Near-duplicate snippets anywhere in the run are generated once
+    clusters = None if args.no_dedup else SnippetClusters()
+
+    def generate(snippets: list[str]) -> list[tuple[str, str]]:
+        return generate_outputs(
+            snippets, tokenizer, model, args.model,
+            runner=runner,
+            deterministic=not args.sample,
+            cache=cache,
+            batch_size=args.batch_size,
+            clusters=clusters
+        )
+
+    if args.out == "-":
+        # Library code prints diagnostics; keep stdout for JSON lines only
+        out, sys.stdout = sys.stdout, sys.stderr
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        out = open(args.out, "w", encoding="utf-8")
+
+    failures = 0
+    try:
+        for source in args.inputs:
+            if args.incremental or args.base:
+                try:
+                    results = run_incremental(source, args, tokenizer, generate, lint_cache, out)
+                except Exception as e:
+                    logger.exception(f"{source}: incremental analysis failed")
+                    write_record(out, {"type": "input", "input": source, "status": "error", "error": str(e)})
+                    failures += 1
+                    continue
+                write_reports(args, source, results, out)
+                continue
+
+            try:
+                code_files = collect_files(source)
+                if not code_files:
+                    raise ValueError("No .py/.js/.ipynb code files found.")
+            except Exception as e:
+                logger.error(f"{source}: {e}")
+                write_record(out, {"type": "input", "input": source, "status": "error", "error": str(e)})
+                failures += 1
+                continue
+
+            logger.info(f"{source}: analyzing {len(code_files)} file(s) with {args.model}")
+            # Repo files are linted as modules, together (tree layout kept, chunked -jN runs);
+            # Python files with --quick-lint get only the AST metrics
+            languages = {path: language_for_file(path, code) for path, code in code_files}
+            lint_files = [
+                (path, code) for path, code in code_files
+                if languages[path] != "unknown" and (not args.quick_lint or languages[path] != "python")
+            ]
+            qualities = {
+                result["path"]: result
+                for result in run_code_quality_on_files(
+                    lint_files, cache=lint_cache, config_dir=source if os.path.isdir(source) else "."
+                )
+            } if lint_files else {}
+
+            results = []
+            for path, code in code_files:
+                record = {"type": "file", "input": source, "path": path}
+                start = time.perf_counter()
+                try:
+                    record.update(analyze_code(
+                        code, tokenizer, model, args.model,
+                        language=languages[path],
+                        runner=runner,
+                        deterministic=not args.sample,
+                        cache=cache,
+                        lint_cache=lint_cache,
+                        stop_on_issues=args.strict,
+                        full_lint=not args.quick_lint,
+                        batch_size=args.batch_size,
+                        clusters=clusters,
+                        quality=qualities.get(path)
+                    ))
+                except Exception as e:
+                    logger.exception(f"{path}: analysis failed")
+                    record.update(status="error", error=str(e))
+                    failures += 1
+                record["elapsed_s"] = round(time.perf_counter() - start, 3)
+                write_record(out, record)
+                results.append(record)
+
+            write_reports(args, source, results, out)
+    finally:
+        if args.out == "-":
+            sys.stdout = out
+        else:
+            out.close()
+
+    return 1 if failures else 0
+
+
+def write_reports(args, source: str, results: list[dict], out):
+    """Build the Markdown/PDF report of one input's analyzed files, if reports were requested."""
+    from report_builder.generate_report import build_report
+    from report_builder.section_writer import build_sections
+
+    analyzed = [r for r in results if r["status"] == "ok"]
+    if not args.reports or not analyzed:
+        return
+    blocks = [b for r in analyzed for b in r["blocks"]]
+    sections = build_sections(
+        [b["summary"] for b in blocks],
+        [b["docstring"] for b in blocks],
+        [q for r in analyzed for q in (r["metrics"], r["quality"]) if q]
+    )
+    md_path, pdf_path = build_report(sections, output_dir=args.reports)
+    write_record(out, {"type": "report", "input": source, "markdown": md_path, "pdf": pdf_path})
+
+
+def serve(args) -> int:
+    """Run the inference daemon until interrupted."""
+    from core.daemon import InferenceDaemon
+
+    daemon = InferenceDaemon(args.host, args.port, budget_mb=args.budget_mb, preload=args.preload)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Inference daemon stopped")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="bigdocbot", description="Headless BigDocBot pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("analyze", help="Summarize, document and lint local paths or GitHub repos.")
+    p.add_argument("inputs", nargs="+", metavar="PATH_OR_URL", help="Files, directories or GitHub repo URLs")
+    p.add_argument("--model", choices=list(MODEL_PATHS), default=DEFAULT_MODEL)
+    p.add_argument("--out", default="-", help="JSONL output file ('-' for stdout)")
+    p.add_argument("--reports", nargs="?", const=REPORT_DIR, metavar="DIR",
+                   help=f"Also build one Markdown/PDF report per input (default dir: {REPORT_DIR})")
+    p.add_argument("--strict", action="store_true",
+                   help="Skip generation for files with lint issues, like the web UI")
+    p.add_argument("--quick-lint", action="store_true",
+                   help="Report only the built-in AST metrics for Python; skip pylint")
+    p.add_argument("--sample", action="store_true", help="Sampled decoding instead of greedy (not cached)")
+    p.add_argument("--no-cache", action="store_true", help="Bypass the persistent generation and lint caches")
+    p.add_argument("--batch-size", type=int, default=4, help="Prompts per forward pass")
+    p.add_argument("--no-dedup", action="store_true",
+                   help="Generate every snippet, even near-duplicates of one already generated")
+    p.add_argument("--incremental", action="store_true",
+                   help="Only generate functions added or changed since the previous run of each input")
+    p.add_argument("--base", metavar="REF",
+                   help="Only analyze functions added or changed since a git ref (branch, tag or commit)")
+    p.add_argument("--daemon", default=INFERENCE_DAEMON_URL, metavar="URL",
+                   help="Inference daemon to use when it is running")
+    p.add_argument("--local", action="store_true", help="Load the model in this process even if a daemon is running")
+    p.set_defaults(func=analyze)
+
+    p = commands.add_parser("serve", help="Run the inference daemon that owns the models.")
+    p.add_argument("--host", default=INFERENCE_DAEMON_HOST)
+    p.add_argument("--port", type=int, default=INFERENCE_DAEMON_PORT)
+    p.add_argument("--preload", nargs="*", choices=list(MODEL_PATHS), default=[DEFAULT_MODEL],
+                   help="Models to start loading at startup")
+    p.add_argument("--budget-mb", type=int, default=MODEL_MEMORY_BUDGET_MB, help="RAM budget for loaded models")
+    p.set_defaults(func=serve)
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "analyze" and args.strict and (args.incremental or args.base):
+        parser.error("--strict cannot be combined with --incremental or --base")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
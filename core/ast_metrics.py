@@ -0,0 +1,213 @@
+"""
+Quick quality tier: complexity metrics and obvious error patterns from a single
+AST walk. It runs in-process in milliseconds, so results are shown before the
+external linters (pylint, ESLint) finish or without running them at all.
+"""
+import ast
+
+from core.parser import ParsedSource, parse_error_message
+from utils.config import AST_MAX_COMPLEXITY, AST_MAX_NESTING_DEPTH, AST_MAX_FUNCTION_LINES
+
+_NESTING_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.With, ast.AsyncWith, ast.Try)
+_BRANCH_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler, ast.Assert)
+_TERMINAL_NODES = (ast.Return, ast.Raise, ast.Continue, ast.Break)
+_MUTABLE_DEFAULTS = (ast.List, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)
+
+if hasattr(ast, "TryStar"):
+    _NESTING_NODES += (ast.TryStar,)
+if hasattr(ast, "match_case"):
+    _NESTING_NODES += (ast.Match,)
+    _BRANCH_NODES += (ast.match_case,)
+
+
+class _FunctionStats:
+    def __init__(self, node: ast.AST):
+        self.name = node.name
+        self.lineno = node.lineno
+        self.lines = getattr(node, "end_lineno", node.lineno) - node.lineno + 1
+        self.complexity = 1
+        self.depth = 0
+
+
+class _MetricsVisitor(ast.NodeVisitor):
+    """One pass over the tree collecting per-function metrics and error patterns."""
+
+    def __init__(self):
+        self.functions = []
+        self.findings = []
+        self.missing_docstrings = 0
+        self._stack = []
+        self._depth = 0
+        self._elifs = set()
+
+    def _report(self, node: ast.AST, code: str, message: str):
+        self.findings.append((node.lineno, node.col_offset, code, message))
+
+    def _check_docstring(self, node: ast.AST, kind: str):
+        if not node.name.startswith("_") and ast.get_docstring(node) is None:
+            self.missing_docstrings += 1
+            self._report(node, "missing-docstring", f"{kind} '{node.name}' has no docstring")
+
+    def _check_body(self, body: list):
+        for stmt, following in zip(body, body[1:]):
+            if isinstance(stmt, _TERMINAL_NODES):
+                self._report(following, "unreachable-code", "Statement after return/raise/continue/break never runs")
+                break
+
+    def generic_visit(self, node: ast.AST):
+        for field in ("body", "orelse", "finalbody"):
+            body = getattr(node, field, None)
+            if isinstance(body, list) and body and isinstance(body[0], ast.stmt):
+                self._check_body(body)
+
+        if self._stack:
+            current = self._stack[-1]
+            if isinstance(node, _BRANCH_NODES):
+                current.complexity += 1
+            elif isinstance(node, ast.BoolOp):
+                current.complexity += len(node.values) - 1
+            elif isinstance(node, ast.comprehension):
+                current.complexity += 1 + len(node.ifs)
+
+        if isinstance(node, ast.If) and len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If):
+            # `elif` parses as an If alone in its parent's else branch; it sits at the parent's level
+            self._elifs.add(node.orelse[0])
+
+        if isinstance(node, _NESTING_NODES) and node not in self._elifs:
+            self._depth += 1
+            if self._stack:
+                self._stack[-1].depth = max(self._stack[-1].depth, self._depth)
+            super().generic_visit(node)
+            self._depth -= 1
+        else:
+            super().generic_visit(node)
+
+    def _visit_function(self, node):
+        self._check_docstring(node, "Function")
+        for default in node.args.defaults + [d for d in node.args.kw_defaults if d is not None]:
+            if isinstance(default, _MUTABLE_DEFAULTS):
+                self._report(default, "mutable-default", f"Mutable default argument in '{node.name}'")
+
+        stats = _FunctionStats(node)
+        self.functions.append(stats)
+        # Nesting restarts inside each function
+        self._stack.append(stats)
+        outer_depth, self._depth = self._depth, 0
+        self.generic_visit(node)
+        self._depth = outer_depth
+        self._stack.pop()
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self._check_docstring(node, "Class")
+        self.generic_visit(node)
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler):
+        if node.type is None:
+            self._report(node, "bare-except", "Bare 'except:' also catches KeyboardInterrupt and SystemExit")
+        self.generic_visit(node)
+
+    def visit_Compare(self, node: ast.Compare):
+        for op, right in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(right, ast.Constant) and right.value is None:
+                self._report(node, "none-comparison", "Compare with None using 'is' / 'is not'")
+            elif isinstance(op, (ast.Is, ast.IsNot)) and isinstance(right, ast.Constant) \
+                    and isinstance(right.value, (str, bytes, int, float)) and not isinstance(right.value, bool):
+                self._report(node, "is-literal", "'is' with a literal compares identity, not value")
+        self.generic_visit(node)
+
+    def visit_Assert(self, node: ast.Assert):
+        if isinstance(node.test, ast.Tuple) and node.test.elts:
+            self._report(node, "assert-tuple", "Assert on a non-empty tuple is always true")
+        self.generic_visit(node)
+
+    def visit_Dict(self, node: ast.Dict):
+        seen = set()
+        for key in node.keys:
+            if isinstance(key, ast.Constant):
+                if key.value in seen:
+                    self._report(key, "duplicate-key", f"Duplicate dict key {key.value!r}")
+                seen.add(key.value)
+        self.generic_visit(node)
+
+
+def python_metrics(code: str, parsed: ParsedSource = None) -> dict:
+    """
+    Compute complexity metrics and obvious error patterns for Python source in one AST walk.
+
+    Args:
+        code (str): Python source code.
+        parsed (ParsedSource, optional): Already-parsed `code`; its tree is walked instead of parsing again.
+
+    Returns:
+        dict: Result with the same keys as `run_code_quality` (`tool`, `num_issues`,
+            `raw_output`) plus `metrics` (function count, max/avg complexity,
+            max nesting depth, longest function, missing docstrings).
+    """
+    if parsed is None:
+        parsed = ParsedSource(code, "python")
+    if parsed.tree is None:
+        return {
+            "tool": "ast-metrics",
+            "num_issues": 1,
+            "raw_output": parse_error_message(parsed.syntax_error),
+            "metrics": {}
+        }
+
+    visitor = _MetricsVisitor()
+    visitor.visit(parsed.tree)
+
+    for f in visitor.functions:
+        if f.complexity > AST_MAX_COMPLEXITY:
+            visitor.findings.append((f.lineno, 0, "high-complexity", f"'{f.name}' has cyclomatic complexity {f.complexity}"))
+        if f.depth > AST_MAX_NESTING_DEPTH:
+            visitor.findings.append((f.lineno, 0, "deep-nesting", f"'{f.name}' nests {f.depth} blocks deep"))
+        if f.lines > AST_MAX_FUNCTION_LINES:
+            visitor.findings.append((f.lineno, 0, "long-function", f"'{f.name}' is {f.lines} lines long"))
+
+    functions = visitor.functions
+    metrics = {
+        "functions": len(functions),
+        "max_complexity": max((f.complexity for f in functions), default=0),
+        "avg_complexity": round(sum(f.complexity for f in functions) / len(functions), 1) if functions else 0,
+        "max_nesting_depth": max((f.depth for f in functions), default=0),
+        "longest_function": max((f.lines for f in functions), default=0),
+        "missing_docstrings": visitor.missing_docstrings
+    }
+    summary = (
+        f"Functions: {metrics['functions']} | complexity max {metrics['max_complexity']}, "
+        f"avg {metrics['avg_complexity']} | max nesting {metrics['max_nesting_depth']} | "
+        f"longest function {metrics['longest_function']} lines | "
+        f"missing docstrings {metrics['missing_docstrings']}"
+    )
+    findings = sorted(visitor.findings)
+    return {
+        "tool": "ast-metrics",
+        "num_issues": len(findings),
+        "raw_output": "\n".join([summary] + [f"{line}:{col}: {code}: {message}" for line, col, code, message in findings]),
+        "metrics": metrics
+    }
+
+
+def quick_quality(code: str, language: str, parsed: ParsedSource = None) -> dict | None:
+    """
+    Fast in-process quality tier, run before (or instead of) the external linters.
+
+    Args:
+        code (str): Source code.
+        language (str): 'python' or 'javascript'.
+        parsed (ParsedSource, optional): Already-parsed `code`.
+
+    Returns:
+        dict | None: Metrics result, or None when the language has no quick tier.
+    """
+    if language == "python":
+        return python_metrics(code, parsed)
+    return None
+
+
+def is_syntax_error(result: dict) -> bool:
+    """Whether a quick-tier result means the code did not parse."""
+    return result["raw_output"].startswith("[AST Parse Error]")
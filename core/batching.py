@@ -0,0 +1,152 @@
+import os
+from typing import Callable, Iterator
+
+import torch
+
+from utils.logger import get_logger
+
+logger = get_logger("batching")
+
+# Rough peak memory per padded token during generation (activations + KV cache)
+# for the ~1B-parameter models we run. Deliberately conservative.
+BYTES_PER_PADDED_TOKEN = 1 << 20
+MEMORY_HEADROOM = 0.5
+
+
+def available_memory_bytes(device: torch.device) -> int | None:
+    """
+    Return the memory currently free for batches on `device`.
+
+    Uses free VRAM on CUDA and free physical RAM on CPU hosts.
+
+    Args:
+        device (torch.device): Device generation runs on.
+
+    Returns:
+        int | None: Free bytes, or None if it cannot be determined.
+    """
+    if device.type == "cuda":
+        free, _ = torch.cuda.mem_get_info(device)
+        return free
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_token_budget(device: torch.device, fallback: int = 8192) -> int:
+    """
+    Derive a padded-token budget per batch from the memory free on `device`.
+
+    Args:
+        device (torch.device): Device generation runs on.
+        fallback (int): Budget used when free memory cannot be determined.
+
+    Returns:
+        int: Max padded tokens (rows x longest row) per batch.
+    """
+    free = available_memory_bytes(device)
+    if not free:
+        return fallback
+    return max(512, int(free * MEMORY_HEADROOM) // BYTES_PER_PADDED_TOKEN)
+
+
+def is_allocation_error(error: BaseException) -> bool:
+    """Return True if `error` means a batch did not fit in memory (VRAM or RAM)."""
+    if isinstance(error, MemoryError):
+        return True
+    if isinstance(error, getattr(torch.cuda, "OutOfMemoryError", ())):
+        return True
+    message = str(error).lower()
+    return isinstance(error, RuntimeError) and (
+        "out of memory" in message or "can't allocate memory" in message
+        or "failed to allocate" in message
+    )
+
+
+class TokenBudgetPlanner:
+    """
+    Plan batches by padded-token cost instead of a fixed row count.
+
+    A batch is closed once `rows * longest_row` would exceed the budget, so a run
+    of short files is packed densely while a few long files get a small batch.
+    When a batch hits an allocation error it is retried in halves and the budget
+    is lowered for every batch after it.
+    """
+
+    def __init__(self, max_batch_tokens: int, max_batch_size: int = 256):
+        """
+        Args:
+            max_batch_tokens (int): Padded-token budget per batch.
+            max_batch_size (int): Hard cap on rows per batch.
+        """
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self._backed_off = False
+
+    def batches(self, lengths: list[int], start: int = 0) -> Iterator[tuple[int, int]]:
+        """
+        Yield contiguous `(start, end)` index ranges that fit the current budget.
+
+        The budget is re-read for every batch, so a reduction after an
+        allocation error applies to the rest of the run.
+
+        Args:
+            lengths (list[int]): Token length of each item.
+            start (int): Index to resume from.
+
+        Yields:
+            tuple[int, int]: Half-open range of item indices for one batch.
+        """
+        i = start
+        while i < len(lengths):
+            end, longest = i, 0
+            while end < len(lengths) and end - i < self.max_batch_size:
+                candidate = max(longest, lengths[end], 1)
+                if end > i and candidate * (end - i + 1) > self.max_batch_tokens:
+                    break
+                longest = candidate
+                end += 1
+            yield i, end
+            i = end
+
+    def run(self, fn: Callable[[list], list], items: list) -> list:
+        """
+        Call `fn(items)`, retrying in halves on allocation errors.
+
+        Args:
+            fn (Callable[[list], list]): Processes a batch and returns one result per item.
+            items (list): Items of the planned batch.
+
+        Returns:
+            list: Results for every item, in order.
+        """
+        try:
+            results = fn(items)
+        except Exception as e:
+            if not is_allocation_error(e) or len(items) <= 1:
+                raise
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            self._backed_off = True
+            self.max_batch_tokens = max(1, self.max_batch_tokens // 2)
+            self.max_batch_size = max(1, min(self.max_batch_size, len(items) // 2))
+            logger.warning(
+                f"Allocation failed for a batch of {len(items)}; retrying at {self.max_batch_size} "
+                f"(budget now {self.max_batch_tokens} tokens)"
+            )
+            # Re-read the cap for every slice: a nested failure shrinks it for the remaining ones too
+            results, k = [], 0
+            while k < len(items):
+                size = self.max_batch_size
+                results.extend(self.run(fn, items[k:k + size]))
+                k += size
+            return results
+
+        if self._backed_off:
+            self._backed_off = False
+            logger.info(
+                f"Settled on batches of {len(items)} rows "
+                f"(budget {self.max_batch_tokens} padded tokens, cap {self.max_batch_size} rows)"
+            )
+        return results
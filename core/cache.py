@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Callable
+
+from utils.config import INFERENCE_BACKEND, ONNX_QUANTIZE, CPU_QUANTIZATION
+from utils.logger import get_logger
+
+logger = get_logger("cache")
+
+
+class SQLiteLRUCache:
+    """
+    Size-capped key/value store on SQLite with least-recently-used eviction.
+
+    Safe to share between threads; every operation runs under one lock on a
+    single connection.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            path (str): SQLite database file (parent folders are created).
+            max_bytes (int): Total payload size kept before the oldest entries are evicted.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        """
+        Look up several keys at once and mark the hits as recently used.
+
+        Args:
+            keys (list[str]): Keys to look up.
+
+        Returns:
+            dict[str, str]: Values for the keys that were found.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock, self._conn:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({marks})", chunk
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE entries SET last_access = ? WHERE key IN ({marks})",
+                        [time.time(), *chunk]
+                    )
+        return found
+
+    def put_many(self, items: dict[str, str]):
+        """
+        Store several values, then evict least-recently-used entries above the size cap.
+
+        Args:
+            items (dict[str, str]): Key/value pairs to store.
+        """
+        if not items:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                [(k, v, len(v.encode("utf-8")), now) for k, v in items.items()]
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims, freed = [], 0
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        logger.info(f"Evicted {len(victims)} entries from {os.path.basename(self.path)}")
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+
+@lru_cache(maxsize=1)
+def generation_variant() -> dict:
+    """
+    Describe how the weights run here: device, backend and numeric precision.
+
+    The same model gives slightly different text in float16 on GPU, float32 on
+    CPU, quantized or through ONNX Runtime, so each variant caches separately.
+    """
+    import torch
+
+    if torch.cuda.is_available():
+        return {"device": "cuda", "dtype": "float16"}
+    return {
+        "device": "cpu",
+        "backend": INFERENCE_BACKEND,
+        "onnx_quantize": ONNX_QUANTIZE if INFERENCE_BACKEND == "onnx" else None,
+        "quantization": CPU_QUANTIZATION
+    }
+
+
+class GenerationCache:
+    """
+    Content-addressed cache of cleaned model outputs (summaries, docstrings).
+
+    Keys combine the model, its backend and precision (`generation_variant`),
+    the task, a hash of the normalized snippet and the generation parameters,
+    so any change to one of them is a cache miss. Empty outputs are not stored.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            path (str): SQLite database file.
+            max_bytes (int): Size cap before LRU eviction.
+        """
+        self.store = SQLiteLRUCache(path, max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(model_id: str, task: str, normalized_code: str, params: dict) -> str:
+        """
+        Build the cache key for one snippet.
+
+        Args:
+            model_id (str): Model tag or path identifying the weights.
+            task (str): Task name, e.g. "summary" or "docstring".
+            normalized_code (str): Snippet after comment/whitespace normalization.
+            params (dict): Generation parameters that affect the output.
+
+        Returns:
+            str: Hex digest key.
+        """
+        code_hash = hashlib.sha1(normalized_code.encode("utf-8")).hexdigest()
+        payload = json.dumps([model_id, generation_variant(), task, code_hash, params], sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached output for `key`, or None on a miss."""
+        return self.store.get_many([key]).get(key)
+
+    def put(self, key: str, value: str):
+        """Store one output; empty (failed) generations are not cached."""
+        if value.strip():
+            self.store.put_many({key: value})
+
+    def resolve(
+        self,
+        keys: list[str],
+        inputs: list,
+        compute: Callable[[list], list[str]],
+        cacheable: Callable[[object], bool] = None
+    ) -> list[str]:
+        """
+        Return outputs for `inputs`, computing only the cache misses.
+
+        Inputs sharing a key are computed once.
+
+        Args:
+            keys (list[str]): Cache key per input.
+            inputs (list): Items passed to `compute` for misses (e.g. prompts).
+            compute (Callable[[list], list[str]]): Produces one output per missing input.
+            cacheable (Callable[[object], bool], optional): Called with a missing input after
+                `compute`; False keeps its output out of the cache.
+
+        Returns:
+            list[str]: Outputs aligned with `inputs`.
+        """
+        found = self.store.get_many(keys)
+        hits = sum(key in found for key in keys)
+        missing = {}
+        for key, item in zip(keys, inputs):
+            if key not in found and key not in missing:
+                missing[key] = item
+
+        if missing:
+            computed = dict(zip(missing, compute(list(missing.values()))))
+            # An empty output is a failed generation; it is returned but retried next time
+            self.store.put_many({
+                k: v for k, v in computed.items()
+                if v.strip() and (cacheable is None or cacheable(missing[k]))
+            })
+            found.update(computed)
+
+        logger.info(f"Generation cache: {hits}/{len(keys)} hits")
+        return [found[key] for key in keys]
+
+
+class LintCache:
+    """
+    Persistent cache of linter results.
+
+    Keys combine a hash of the exact source, the language, the linter and its
+    version, the enabled rules and the lint scope (a pasted snippet is wrapped
+    in `main()`, a repo file is linted as a module), so upgrading the linter or
+    changing its configuration invalidates old results.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            path (str): SQLite database file.
+            max_bytes (int): Size cap before LRU eviction.
+        """
+        self.store = SQLiteLRUCache(path, max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(code: str, language: str, tool: str, version: str, rules: str, scope: str) -> str:
+        """
+        Build the cache key for one lint run.
+
+        Args:
+            code (str): Source code as linted.
+            language (str): "python" or "javascript".
+            tool (str): Linter name.
+            version (str): Linter version.
+            rules (str): Fingerprint of the enabled rules / linter config.
+            scope (str): "snippet" or "file".
+
+        Returns:
+            str: Hex digest key.
+        """
+        code_hash = hashlib.sha1(code.encode("utf-8")).hexdigest()
+        payload = json.dumps([code_hash, language, tool, version, rules, scope])
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict[str, dict]:
+        """Return cached results for the keys that were found."""
+        return {k: json.loads(v) for k, v in self.store.get_many(keys).items()}
+
+    def put_many(self, results: dict[str, dict]):
+        """Store lint results by key."""
+        self.store.put_many({k: json.dumps(v) for k, v in results.items()})
@@ -0,0 +1,153 @@
+"""
+Fit code snippets to the model's input budget.
+
+Prompts are truncated at the model's input length, so a large class is split
+into its methods (each under the class header, for context) instead of being
+cut off. At the other end, tiny functions are packed several to a summary
+prompt and the numbered outputs are split back per function.
+"""
+import re
+
+from utils.config import (
+    SNIPPET_TOKEN_BUDGET, PACK_MAX_SNIPPET_TOKENS, PACK_MAX_SNIPPETS, CHARS_PER_TOKEN_ESTIMATE
+)
+
+_PACKED_MARKER = re.compile(r'^\s*\[(\d+)\]\s*', re.MULTILINE)
+# `@name.setter`-style decorator of a redefined accessor
+_ACCESSOR_DECORATOR = re.compile(r'^@\s*\w+\.(\w+)')
+
+
+def count_tokens(text: str, tokenizer=None) -> int:
+    """
+    Count the tokens a piece of text takes in a prompt.
+
+    Args:
+        text (str): Text to measure.
+        tokenizer (PreTrainedTokenizer, optional): Model tokenizer; without one
+            (e.g. generation runs on the inference daemon) the count is estimated
+            from the length.
+
+    Returns:
+        int: Token count.
+    """
+    if tokenizer is None:
+        return len(text) // CHARS_PER_TOKEN_ESTIMATE + 1
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def block_chunks(block, budget: int = SNIPPET_TOKEN_BUDGET, tokenizer=None) -> list[tuple[str, str]]:
+    """
+    Return a block's text, or for a class over the budget, one chunk per method.
+
+    Each method chunk starts with the class header, followed by the method
+    from its first decorator; the rest of the class body (docstring, class
+    attributes, nested classes, wherever they appear) becomes a chunk of its
+    own. A single method that is still over budget is left whole. A method
+    defined again under the same name (a property setter or deleter) is named
+    after its decorator, e.g. `Store.size@setter`, or else its line.
+
+    Args:
+        block (CodeBlock): Top-level block from `core.parser`.
+        budget (int): Token budget for one snippet.
+        tokenizer (PreTrainedTokenizer, optional): Model tokenizer.
+
+    Returns:
+        list[tuple[str, str]]: (qualified name, chunk text) pairs in source order,
+            e.g. `("Store", ...)`, `("Store.get", ...)`.
+    """
+    if not block.children or count_tokens(block.text, tokenizer) <= budget:
+        return [(block.name, block.text)]
+
+    lines = block.text.splitlines()
+    closing = "\n}" if block.header.rstrip().endswith("{") else ""
+    method_lines = set()
+    decorators = []
+    for child in block.children:
+        start, last = child.start_line - block.start_line, child.end_line - block.start_line
+        # Decorators sit on the lines just above the method
+        first = start
+        while first > 0 and lines[first - 1].strip().startswith("@"):
+            first -= 1
+        decorators.append(lines[first:start])
+        method_lines.update(range(first, last + 1))
+    rest = [line for k, line in enumerate(lines) if k not in method_lines]
+    body = [line for line in rest[len(block.header.splitlines()):] if line.strip() not in ("", "}")]
+
+    chunks = []
+    if body:
+        # Blank lines left where methods were cut out are squeezed to one
+        text = "\n".join(line for k, line in enumerate(rest) if line.strip() or (k and rest[k - 1].strip())).rstrip()
+        chunks.append((block.name, text if text.endswith("}") else text + closing))
+    names = set()
+    for child, child_decorators in zip(block.children, decorators):
+        name = f"{block.name}.{child.name}"
+        if name in names:
+            accessors = [m.group(1) for m in map(_ACCESSOR_DECORATOR.match, map(str.strip, child_decorators)) if m]
+            name += f"@{accessors[0]}" if accessors else f"@L{child.start_line}"
+            if name in names:
+                name = f"{block.name}.{child.name}@L{child.start_line}"
+        names.add(name)
+        text = "\n".join([*child_decorators, child.text])
+        chunks.append((name, f"{block.header}\n{text}{closing}"))
+    return chunks
+
+
+def pack_snippets(
+    snippets: list[str],
+    tokenizer=None,
+    budget: int = SNIPPET_TOKEN_BUDGET,
+    max_snippet_tokens: int = PACK_MAX_SNIPPET_TOKENS,
+    max_group: int = PACK_MAX_SNIPPETS
+) -> list[list[int]]:
+    """
+    Group snippet indices so that tiny snippets share prompts.
+
+    Args:
+        snippets (list[str]): Snippets in order.
+        tokenizer (PreTrainedTokenizer, optional): Model tokenizer.
+        budget (int): Token budget for one packed prompt's code.
+        max_snippet_tokens (int): Snippets up to this size are packed.
+        max_group (int): Most snippets in one pack (1 disables packing).
+
+    Returns:
+        list[list[int]]: Index groups covering every snippet once; groups of
+            one are generated on their own.
+    """
+    groups, current, used = [], [], 0
+    for i, snippet in enumerate(snippets):
+        tokens = count_tokens(snippet, tokenizer)
+        if max_group <= 1 or tokens > max_snippet_tokens:
+            groups.append([i])
+            continue
+        if current and (len(current) >= max_group or used + tokens > budget):
+            groups.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def split_packed_output(text: str, count: int) -> list[str] | None:
+    """
+    Split a packed completion back into one line per snippet.
+
+    The prompt ends with `[1]`, so the completion is the first answer followed
+    by `[2] ...`, `[3] ...` and so on.
+
+    Args:
+        text (str): Completion (cut at the task's stop marker).
+        count (int): Number of snippets in the pack.
+
+    Returns:
+        list[str] | None: One answer per snippet, or None if the numbering is
+            off or an answer is empty, in which case the caller generates the
+            snippets one by one.
+    """
+    parts = _PACKED_MARKER.split("[1] " + text.strip())
+    answers = {}
+    for number, answer in zip(parts[1::2], parts[2::2]):
+        answers.setdefault(int(number), answer.strip().split("\n")[0].strip())
+    outputs = [answers.get(n, "") for n in range(1, count + 1)]
+    return outputs if all(outputs) else None
@@ -1,54 +1,99 @@
 import os
 import json
+import shutil
 import tempfile
 import subprocess
 import ast
+import time
+import hashlib
+import functools
+import importlib.metadata
+from concurrent.futures import ThreadPoolExecutor
 
-def run_pylint_on_code(code: str) -> dict:
+from core.cache import LintCache
+from core.language_detect import language_from_extension
+from core.lint_worker import get_pylint_worker, get_eslint_worker
+from core.parser import ParsedSource, parse_error_message
+from utils.config import LINT_TIMEOUT_S, LINT_TIMEOUT_PER_KLOC_S, LINT_CHUNK_SIZE, LINT_JOBS
+
+PYLINT_ARGS = ["--disable=all", "--enable=E,W", "--score=n"]
+LANGUAGE_TOOLS = {"python": "pylint", "javascript": "eslint"}
+ESLINT_CONFIG_FILES = (
+    "eslint.config.js", "eslint.config.mjs", "eslint.config.cjs",
+    ".eslintrc", ".eslintrc.js", ".eslintrc.cjs", ".eslintrc.json", ".eslintrc.yml", ".eslintrc.yaml"
+)
+# Copied next to temp-dir lint runs so a flat config and its plugins resolve there too
+ESLINT_PROJECT_FILES = ("package.json", "node_modules")
+# pylint exit status bits for a fatal message and a usage error; ESLint exits with 2 on a crash or config error
+PYLINT_FATAL_STATUS = 1
+PYLINT_USAGE_STATUS = 32
+ESLINT_FATAL_STATUS = 2
+# Results starting with these are transient failures and are never cached
+LINT_FAILURE_PREFIXES = ("[Pylint Runtime Error]", "[ESLint Runtime Error]", "[Pylint skipped", "[ESLint skipped")
+
+
+def lint_timeout(code: str) -> float:
+    """Scale the linter timeout with input size, so large files are not killed mid-lint."""
+    return LINT_TIMEOUT_S + LINT_TIMEOUT_PER_KLOC_S * code.count("\n") / 1000
+
+
+def wrap_in_main(code: str) -> str:
+    """
+    Indent a script into a `main()` function so top-level statements lint like a function body.
+
+    Args:
+        code (str): Python source code.
+
+    Returns:
+        str: Wrapped source code.
+    """
+    body = [f"    {line}" if line.strip() else "" for line in code.splitlines()]
+    return "\n".join(["def main():", *body, "", "if __name__ == '__main__':", "    main()", ""])
+
+
+def run_pylint_on_code(code: str, parsed: ParsedSource = None) -> dict:
     """
     Run Pylint on a Python snippet and return quality metrics.
 
+    The code is linted from memory by a persistent pylint worker process.
+
     Args:
         code (str): Python source code.
+        parsed (ParsedSource, optional): Already-parsed `code`; skips the syntax check parse.
 
     Returns:
         dict: Includes `tool`, `num_issues`, `raw_output`.
     """
     # Catch syntax errors first
-    try:
-        ast.parse(code)
-    except SyntaxError as e:
+    if parsed is not None:
+        error = parsed.syntax_error
+    else:
+        try:
+            ast.parse(code)
+            error = None
+        except SyntaxError as e:
+            error = e
+    if error is not None:
         return {
             "tool": "pylint",
             "num_issues": 1,
-            "raw_output": f"[AST Parse Error] {e.msg} ({e.filename or '<unknown>'}, line {e.lineno})"
+            "raw_output": parse_error_message(error)
         }
 
-    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False, encoding="utf-8") as tmp:
-        wrapped = "def main():\n"
-        for line in code.splitlines():
-            wrapped += f"    {line}\n" if line.strip() else "\n"
-        wrapped += "\nif __name__ == '__main__':\n    main()\n"
-        tmp.write(wrapped)
-        tmp.flush()
-        temp_path = tmp.name
-
     try:
-        result = subprocess.run(
-            ["pylint", temp_path, "--disable=all", "--enable=E,W", "--score=n", "--output-format=text"],
-            capture_output=True, text=True, timeout=10
+        response = get_pylint_worker().request(
+            {"code": wrap_in_main(code), "filename": "snippet.py", "args": PYLINT_ARGS},
+            timeout=lint_timeout(code)
         )
-        stdout = result.stdout.strip()
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        stdout = response["output"].strip()
         issues = [line for line in stdout.splitlines() if ": warning" in line or ": error" in line]
 
     except Exception as e:
         stdout = f"[Pylint Runtime Error] {e}"
         issues = []
 
-    finally:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-
     return {
         "tool": "pylint",
         "num_issues": len(issues),
@@ -56,27 +101,49 @@ def run_pylint_on_code(code: str) -> dict:
     }
 
 
+def _run_eslint_subprocess(code: str) -> str:
+    """Fallback when the ESLint worker cannot run: one `eslint` process per call."""
+    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False, encoding="utf-8") as tmp:
+        tmp.write(code)
+        tmp.flush()
+        temp_path = tmp.name
+
+    try:
+        result = subprocess.run(
+            ["eslint", temp_path, "--format", "json"],
+            capture_output=True, text=True, timeout=lint_timeout(code)
+        )
+        return result.stdout.strip()
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
 def run_eslint_on_code(code: str) -> dict:
     """
     Run ESLint on a JavaScript snippet and return quality metrics.
 
+    The code is linted from memory by a persistent ESLint worker (node), falling
+    back to the `eslint` CLI when the worker is unavailable.
+
     Args:
         code (str): JavaScript code.
 
     Returns:
         dict: Includes `tool`, `num_issues`, `raw_output`.
     """
-    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False, encoding="utf-8") as tmp:
-        tmp.write(code)
-        tmp.flush()
-        temp_path = tmp.name
-
     try:
-        result = subprocess.run(
-            ["eslint", temp_path, "--format", "json"],
-            capture_output=True, text=True, timeout=10
-        )
-        stdout = result.stdout.strip()
+        worker = get_eslint_worker()
+        try:
+            response = worker.request({"code": code, "filePath": "snippet.js"}, timeout=lint_timeout(code))
+        except RuntimeError:
+            if not worker.disabled_reason:
+                raise
+            stdout = _run_eslint_subprocess(code)
+        else:
+            if "error" in response:
+                raise RuntimeError(response["error"])
+            stdout = response["output"].strip()
         try:
             parsed = json.loads(stdout)
             issues = parsed[0].get("messages", []) if parsed else []
@@ -87,10 +154,6 @@ def run_eslint_on_code(code: str) -> dict:
         stdout = f"[ESLint Runtime Error] {e}"
         issues = []
 
-    finally:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-
     return {
         "tool": "eslint",
         "num_issues": len(issues),
@@ -98,24 +161,318 @@ def run_eslint_on_code(code: str) -> dict:
     }
 
 
-def run_code_quality(code: str, language: str) -> dict:
+@functools.lru_cache(maxsize=None)
+def linter_version(tool: str) -> str:
+    """
+    Return the installed version of a linter ("unknown" if it cannot be determined).
+
+    Args:
+        tool (str): "pylint" or "eslint".
+
+    Returns:
+        str: Version string.
+    """
+    try:
+        if tool == "pylint":
+            return importlib.metadata.version("pylint")
+        result = subprocess.run(["eslint", "--version"], capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def linter_rules(tool: str, config_dir: str = ".") -> str:
+    """Fingerprint the enabled rules: pylint's arguments, or the ESLint config files in `config_dir`."""
+    if tool == "pylint":
+        return " ".join(PYLINT_ARGS)
+    digest = hashlib.sha1()
+    for name in ESLINT_CONFIG_FILES:
+        if os.path.isfile(os.path.join(config_dir, name)):
+            with open(os.path.join(config_dir, name), "rb") as f:
+                digest.update(name.encode("utf-8") + b"\0" + f.read())
+    return digest.hexdigest()
+
+
+def lint_cache_key(code: str, language: str, scope: str, config_dir: str = ".") -> str:
+    """
+    Build the lint-cache key for one piece of code.
+
+    Args:
+        code (str): Source code.
+        language (str): 'python' or 'javascript'.
+        scope (str): "snippet" (`run_code_quality`) or "file" (`run_code_quality_on_files`).
+        config_dir (str): Folder whose ESLint config applies.
+
+    Returns:
+        str: Cache key.
+    """
+    tool = LANGUAGE_TOOLS[language]
+    return LintCache.make_key(code, language, tool, linter_version(tool), linter_rules(tool, config_dir), scope)
+
+
+def is_cacheable(result: dict) -> bool:
+    """Whether a lint result reflects the code rather than a linter failure or timeout."""
+    return not result["raw_output"].startswith(LINT_FAILURE_PREFIXES)
+
+
+def run_code_quality(code: str, language: str, cache: LintCache = None, parsed: ParsedSource = None) -> dict:
     """
     Dispatch to the appropriate linter based on language.
 
     Args:
         code (str): Code snippet.
         language (str): 'python' or 'javascript'.
+        cache (LintCache, optional): Cache consulted before running the linter.
+        parsed (ParsedSource, optional): Already-parsed `code`, shared with the other stages.
 
     Returns:
         dict: Linter results.
     """
-    if language == "python":
-        return run_pylint_on_code(code)
-    elif language == "javascript":
-        return run_eslint_on_code(code)
-    else:
+    if language not in LANGUAGE_TOOLS:
         return {
             "tool": "unsupported",
             "num_issues": 0,
             "raw_output": "Unsupported language"
         }
+
+    key = lint_cache_key(code, language, "snippet") if cache is not None else None
+    if key:
+        cached = cache.get_many([key]).get(key)
+        if cached is not None:
+            return cached
+
+    result = run_pylint_on_code(code, parsed) if language == "python" else run_eslint_on_code(code)
+    if key and is_cacheable(result):
+        cache.put_many({key: result})
+    return result
+
+
+def _linter_failure(tool: str, result: subprocess.CompletedProcess) -> RuntimeError:
+    detail = (result.stderr or result.stdout or "").strip()[-500:] or "no output"
+    return RuntimeError(f"{tool} exited with status {result.returncode}: {detail}")
+
+
+def _pylint_messages(names: list[str], cwd: str, timeout: float, jobs: int) -> dict:
+    """
+    Lint files with one `pylint -j N` process; return formatted messages per file name.
+
+    Raises:
+        RuntimeError: On a usage error, or a fatal error that produced no report.
+    """
+    result = subprocess.run(
+        ["pylint", f"-j{jobs}", *PYLINT_ARGS, "--output-format=json", *names],
+        cwd=cwd, capture_output=True, text=True, timeout=timeout
+    )
+    if result.returncode < 0 or result.returncode & PYLINT_USAGE_STATUS:
+        raise _linter_failure("pylint", result)
+    try:
+        report = json.loads(result.stdout or "[]")
+    except json.JSONDecodeError:
+        raise _linter_failure("pylint", result) from None
+    # A fatal message about one file is reported like any other; a fatal run reports nothing
+    if result.returncode & PYLINT_FATAL_STATUS and not report:
+        raise _linter_failure("pylint", result)
+
+    messages = {name: [] for name in names}
+    for m in report:
+        messages.setdefault(m["path"], []).append(
+            f"{m['line']}:{m['column']}: {m['message-id']}: {m['message']} ({m['symbol']})"
+        )
+    return messages
+
+
+def _eslint_messages(names: list[str], cwd: str, timeout: float) -> dict:
+    """
+    Lint files with one `eslint` process; return formatted messages per file name.
+
+    ESLint has no `-j`; callers run several chunks side by side instead.
+
+    Raises:
+        RuntimeError: If ESLint crashed or could not load its config.
+    """
+    result = subprocess.run(
+        ["eslint", "--format", "json", *names],
+        cwd=cwd, capture_output=True, text=True, timeout=timeout
+    )
+    if result.returncode < 0 or result.returncode >= ESLINT_FATAL_STATUS:
+        raise _linter_failure("eslint", result)
+    try:
+        report = json.loads(result.stdout or "[]")
+    except json.JSONDecodeError:
+        raise _linter_failure("eslint", result) from None
+
+    messages = {name: [] for name in names}
+    for file_result in report:
+        name = os.path.relpath(file_result["filePath"], cwd)
+        messages.setdefault(name, []).extend(
+            f"{m.get('line', 0)}:{m.get('column', 0)}: {'error' if m.get('severity') == 2 else 'warning'}: "
+            f"{m.get('message', '')} ({m.get('ruleId')})"
+            for m in file_result.get("messages", [])
+        )
+    return messages
+
+
+REPO_LINTERS = {"python": ("pylint", "Pylint", _pylint_messages), "javascript": ("eslint", "ESLint", _eslint_messages)}
+
+
+def _lint_names(code_files: list[tuple[str, str]], indices: list[int]) -> dict[int, str]:
+    """
+    Map files to relative paths inside the lint directory, keeping the tree layout.
+
+    The common parent folder is stripped, so package-relative imports resolve
+    as they do in the repository. Notebooks are linted as the Python of their
+    code cells, under a `.py` name.
+    """
+    if not indices:
+        return {}
+    dirs = [os.path.dirname(os.path.abspath(code_files[i][0])) for i in indices]
+    root = os.path.commonpath(dirs)
+    names, used = {}, set()
+    for i in indices:
+        name = os.path.relpath(os.path.abspath(code_files[i][0]), root)
+        if name.endswith(".ipynb"):
+            name += ".py"
+        if name in used:
+            # Two inputs mapped to one path (e.g. duplicate entries): keep them apart
+            name = os.path.join(f"_dup{i:05d}", name)
+        used.add(name)
+        names[i] = name
+    return names
+
+
+def _link_eslint_config(config_dir: str, lint_dir: str):
+    """Make the ESLint config in `config_dir` (and the packages it loads) apply inside `lint_dir`."""
+    for name in ESLINT_CONFIG_FILES:
+        if os.path.isfile(os.path.join(config_dir, name)):
+            shutil.copy(os.path.join(config_dir, name), lint_dir)
+    for name in ESLINT_PROJECT_FILES:
+        source = os.path.abspath(os.path.join(config_dir, name))
+        target = os.path.join(lint_dir, name)
+        if os.path.exists(source) and not os.path.exists(target):
+            os.symlink(source, target, target_is_directory=os.path.isdir(source))
+
+
+def run_code_quality_on_files(
+    code_files: list[tuple[str, str]],
+    jobs: int = None,
+    cache: LintCache = None,
+    config_dir: str = "."
+) -> list[dict]:
+    """
+    Lint a repository file by file, with results attributed to each file.
+
+    Files are grouped by language (from the extension) and split into chunks
+    of `LINT_CHUNK_SIZE`, each linted by one linter process: pylint chunks run
+    one after another with `-j jobs`, ESLint chunks run `jobs` at a time. The
+    overall time budget grows with the number of lines; chunks that would
+    start after it is spent are reported as skipped. With a cache, only files
+    whose content (or linter setup) changed are linted.
+
+    Files are copied into a temporary folder at their paths relative to the
+    common parent, so relative imports resolve; the ESLint config in
+    `config_dir` is made to apply there. A linter that crashes or rejects its
+    config yields a runtime error for the chunk, which is not cached.
+
+    Args:
+        code_files (list[tuple[str, str]]): (path, code) pairs.
+        jobs (int): Parallel linter jobs (default: `LINT_JOBS`, or all cores).
+        cache (LintCache, optional): Cache consulted before running the linters.
+        config_dir (str): Folder holding the project's ESLint config (default: the working
+            directory); pass the repository root when linting a local checkout.
+
+    Returns:
+        list[dict]: One result per file, in input order, with `path`, `tool`,
+            `num_issues` and `raw_output`.
+    """
+    jobs = jobs or LINT_JOBS or os.cpu_count() or 1
+
+    def file_result(path: str, tool: str, lines: list[str]) -> dict:
+        return {
+            "path": path,
+            "tool": tool,
+            "num_issues": len(lines),
+            "raw_output": "\n".join(f"{path}:{line}" for line in lines)
+        }
+
+    results = [None] * len(code_files)
+    keys = {}
+    for i, (path, code) in enumerate(code_files):
+        language = language_from_extension(path)
+        if language not in REPO_LINTERS:
+            results[i] = {"path": path, "tool": "unsupported", "num_issues": 0, "raw_output": "Unsupported language"}
+        elif cache is not None:
+            keys[i] = lint_cache_key(code, language, "file", config_dir)
+
+    # Cached entries hold the path-free messages, so renamed or copied files hit too
+    cached = cache.get_many(list(keys.values())) if keys else {}
+    for i, key in keys.items():
+        if key in cached:
+            results[i] = file_result(code_files[i][0], cached[key]["tool"], cached[key]["messages"])
+    fresh = {}
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    total_lines = sum(code_files[i][1].count("\n") for i in pending)
+    deadline = time.monotonic() + LINT_TIMEOUT_S + LINT_TIMEOUT_PER_KLOC_S * total_lines / 1000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        groups = {language: [] for language in REPO_LINTERS}
+        for i, name in _lint_names(code_files, pending).items():
+            path, code = code_files[i]
+            target = os.path.join(tmp_dir, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(code)
+            groups[language_from_extension(path)].append((i, name))
+        if groups["javascript"]:
+            _link_eslint_config(config_dir, tmp_dir)
+
+        def lint_chunk(language: str, chunk: list[tuple[int, str]], **lint_options):
+            tool, label, lint = REPO_LINTERS[language]
+            names = [name for _, name in chunk]
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise TimeoutError("time budget exceeded")
+                messages = lint(names, tmp_dir, remaining, **lint_options)
+            except (subprocess.TimeoutExpired, TimeoutError):
+                error = f"[{label} skipped: lint time budget exceeded]"
+            except Exception as e:
+                error = f"[{label} Runtime Error] {e}"
+            else:
+                for i, name in chunk:
+                    lines = messages.get(name, [])
+                    results[i] = file_result(code_files[i][0], tool, lines)
+                    if i in keys:
+                        fresh[keys[i]] = {"tool": tool, "messages": lines}
+                return
+
+            for i, _ in chunk:
+                results[i] = {"path": code_files[i][0], "tool": tool, "num_issues": 0, "raw_output": error}
+
+        chunks = {
+            language: [files[k:k + LINT_CHUNK_SIZE] for k in range(0, len(files), LINT_CHUNK_SIZE)]
+            for language, files in groups.items()
+        }
+        # pylint parallelizes inside one process; ESLint has no -j, so its chunks run side by side
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            eslint_futures = [pool.submit(lint_chunk, "javascript", chunk) for chunk in chunks["javascript"]]
+            for chunk in chunks["python"]:
+                lint_chunk("python", chunk, jobs=jobs)
+            for future in eslint_futures:
+                future.result()
+
+    if fresh:
+        cache.put_many(fresh)
+    return results
+
+def has_blocking_issues(quality_result: dict) -> bool:
+    """
+    Check whether lint results should stop generation.
+
+    Args:
+        quality_result (dict): Output of `run_code_quality`.
+
+    Returns:
+        bool: True if the linter reported issues or the code did not parse.
+    """
+    return quality_result["num_issues"] > 0 or "[AST Parse Error]" in quality_result["raw_output"]
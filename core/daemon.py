@@ -0,0 +1,195 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from core.model_registry import ModelRegistry, load_model_bundle, close_model_bundle
+from utils.config import MODEL_PATHS, INFERENCE_DAEMON_MAX_TOKENS, WORKER_POOL_SIZE
+from utils.logger import get_logger
+
+logger = get_logger("daemon")
+
+# Generation settings a client may pass, with their types; they end up in the
+# scheduler's batch grouping key, so anything unhashable or unexpected is refused
+_GEN_KWARG_TYPES = {"max_tokens": int, "do_sample": bool, "task": str}
+
+
+def validate_generate_request(prompts, gen_kwargs) -> str | None:
+    """
+    Check the prompts and generation settings of a /generate request.
+
+    Args:
+        prompts: `prompts` from the request body.
+        gen_kwargs: `gen_kwargs` from the request body.
+
+    Returns:
+        str | None: Error message, or None if the request is valid.
+    """
+    from core.optimize import STOP_MARKERS
+
+    if not isinstance(prompts, list) or not all(isinstance(p, str) for p in prompts):
+        return "'prompts' must be a list of strings."
+    if not isinstance(gen_kwargs, dict):
+        return "'gen_kwargs' must be an object."
+    for key, value in gen_kwargs.items():
+        expected = _GEN_KWARG_TYPES.get(key)
+        if expected is None:
+            return f"Unsupported generation setting '{key}'. Allowed: {sorted(_GEN_KWARG_TYPES)}."
+        # bool is an int subclass; max_tokens must be a real integer
+        if type(value) is not expected:
+            return f"'{key}' must be of type {expected.__name__}."
+    max_tokens = gen_kwargs.get("max_tokens")
+    if max_tokens is not None and not 1 <= max_tokens <= INFERENCE_DAEMON_MAX_TOKENS:
+        return f"'max_tokens' must be between 1 and {INFERENCE_DAEMON_MAX_TOKENS}."
+    if "task" in gen_kwargs and gen_kwargs["task"] not in STOP_MARKERS:
+        return f"Unknown task '{gen_kwargs['task']}'. Choose from {sorted(STOP_MARKERS)}."
+    return None
+
+
+class _DaemonHandler(BaseHTTPRequestHandler):
+    """
+    JSON over HTTP:
+        GET  /health    -> {"models": {name: state}}
+        POST /preload   {"model"} -> {"state"}
+        POST /generate  {"model", "prompts", "gen_kwargs", "wait"} -> {"outputs"}
+    """
+
+    daemon = None  # set by InferenceDaemon on a per-server subclass
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"models": self.daemon.states()})
+        else:
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "Request body must be JSON."})
+            return
+
+        model_name = body.get("model")
+        if model_name not in MODEL_PATHS:
+            self._send(404, {"error": f"Unknown model '{model_name}'. Choose from {list(MODEL_PATHS)}."})
+            return
+        path = MODEL_PATHS[model_name]
+        registry = self.daemon.registry
+
+        if self.path == "/preload":
+            registry.preload(path)
+            self._send(200, {"state": registry.state(path)})
+        elif self.path == "/generate":
+            if registry.state(path) != "ready" and not body.get("wait", True):
+                registry.preload(path)
+                self._send(503, {"error": "Model is warming up.", "state": registry.state(path)})
+                return
+            prompts, gen_kwargs = body.get("prompts", []), body.get("gen_kwargs", {})
+            error = validate_generate_request(prompts, gen_kwargs)
+            if error is not None:
+                self._send(400, {"error": error})
+                return
+            self._generate(path, prompts, gen_kwargs)
+        else:
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def _generate(self, path: str, prompts: list[str], gen_kwargs: dict):
+        from core.scheduler import SchedulerBusyError, SchedulerClosedError
+
+        try:
+            # A model evicted between `get` and `generate` is loaded again once
+            for attempt in range(2):
+                bundle = self.daemon.registry.get(path)
+                if bundle is None:
+                    self._send(500, {"error": f"Failed to load model: {self.daemon.registry.error(path)}"})
+                    return
+                try:
+                    outputs = bundle[2].generate(prompts, **gen_kwargs)
+                    break
+                except SchedulerClosedError:
+                    if attempt:
+                        raise
+        except SchedulerClosedError as e:
+            self._send(503, {"error": f"Model was unloaded to make room for another: {e}"})
+            return
+        except SchedulerBusyError as e:
+            self._send(429, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.exception("Generation failed")
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, {"outputs": outputs})
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class InferenceDaemon:
+    """
+    Long-running process that owns the models and serves generation over localhost HTTP.
+
+    Models live in a `ModelRegistry` (RAM budget, LRU eviction), and each
+    loaded model's `InferenceScheduler` merges requests from every connected
+    client into shared batches. The app and the CLI talk to it through
+    `core.daemon_client.InferenceClient`, so restarting them no longer reloads
+    the weights.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        budget_mb: int,
+        preload: list[str] = (),
+        loader: Callable[[str], tuple | None] = load_model_bundle
+    ):
+        """
+        Args:
+            host (str): Interface to bind, normally 127.0.0.1.
+            port (int): Port to listen on.
+            budget_mb (int): RAM budget for loaded models.
+            preload (list[str]): Model names from `MODEL_PATHS` to start loading right away.
+                With `WORKER_POOL_SIZE` set they load here, on the main thread and before
+                the server threads exist, so their worker pools can fork safely.
+            loader (Callable[[str], tuple | None]): Returns (tokenizer, model, runner) for a model
+                path; a stub loader lets tests run the daemon without weights.
+        """
+        on_evict = close_model_bundle if loader is load_model_bundle else None
+        self.registry = ModelRegistry(loader, budget_mb=budget_mb, on_evict=on_evict)
+        for name in preload:
+            if WORKER_POOL_SIZE:
+                self.registry.load(MODEL_PATHS[name])
+            else:
+                self.registry.preload(MODEL_PATHS[name])
+
+        handler = type("DaemonHandler", (_DaemonHandler,), {"daemon": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def states(self) -> dict:
+        """Return the load state of every configured model."""
+        return {name: self.registry.state(path) for name, path in MODEL_PATHS.items()}
+
+    def serve_forever(self):
+        logger.info(f"Inference daemon listening on {self.url}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def shutdown(self):
+        """Stop `serve_forever` (call from another thread)."""
+        self.server.shutdown()
@@ -0,0 +1,80 @@
+import json
+import urllib.error
+import urllib.request
+
+
+class DaemonUnavailableError(ConnectionError):
+    """Raised when the inference daemon cannot be reached."""
+
+
+class InferenceClient:
+    """
+    Thin client for `core.daemon.InferenceDaemon`, bound to one model.
+
+    Exposes the same `generate(prompts, **gen_kwargs)` interface as
+    `InferenceScheduler`, so it can be passed as `runner` to `generate_summary`
+    and `generate_docstring`. This module only uses the standard library, so
+    clients do not import the model stack to talk to the daemon.
+    """
+
+    def __init__(self, base_url: str, model_name: str, timeout: float = 600):
+        """
+        Args:
+            base_url (str): Daemon URL, e.g. "http://127.0.0.1:8765".
+            model_name (str): Model name from `MODEL_PATHS`.
+            timeout (float): Seconds to wait for a generate call (includes a cold model load).
+        """
+        self.base_url = base_url.rstrip("/")
+        self.model_name = model_name
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: dict = None, timeout: float = None) -> dict:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=data, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            if e.code == 429:
+                from core.scheduler import SchedulerBusyError
+                raise SchedulerBusyError(message) from None
+            raise RuntimeError(f"Inference daemon error {e.code}: {message}") from None
+        except (urllib.error.URLError, OSError) as e:
+            raise DaemonUnavailableError(f"Inference daemon unreachable at {self.base_url}: {e}") from None
+
+    def model_state(self) -> str | None:
+        """Return the model's load state on the daemon, or None if no daemon is running."""
+        try:
+            return self._request("/health", timeout=0.5)["models"].get(self.model_name)
+        except (DaemonUnavailableError, RuntimeError, KeyError):
+            return None
+
+    def preload(self) -> str:
+        """Ask the daemon to start loading the model; returns its load state."""
+        return self._request("/preload", {"model": self.model_name}, timeout=5)["state"]
+
+    def generate(self, prompts: list[str], **gen_kwargs) -> list[str]:
+        """
+        Generate completions on the daemon, waiting for the model to load if needed.
+
+        Args:
+            prompts (list[str]): Prompts to generate completions for.
+            **gen_kwargs: Keyword arguments for the daemon's scheduler (e.g. `max_tokens`, `task`).
+
+        Returns:
+            list[str]: Generated completions per prompt.
+
+        Raises:
+            SchedulerBusyError: If the daemon's queue is full.
+            DaemonUnavailableError: If the daemon cannot be reached.
+        """
+        if not prompts:
+            return []
+        payload = {"model": self.model_name, "prompts": list(prompts), "gen_kwargs": gen_kwargs, "wait": True}
+        return self._request("/generate", payload)["outputs"]
@@ -0,0 +1,151 @@
+"""
+Near-duplicate snippet clustering with MinHash and locality-sensitive hashing.
+
+Vendored copies, generated clients and copy-pasted handlers produce snippets
+that differ only in a name or a literal. Each snippet gets a MinHash
+signature over its token shingles; LSH bands make likely matches collide in a
+bucket, and a candidate joins a cluster when the estimated Jaccard similarity
+to its representative reaches the threshold. The model then runs once per
+cluster and members reuse the representative's outputs.
+"""
+import importlib.util
+import operator
+import random
+import re
+import zlib
+from collections import Counter
+from typing import Callable
+
+from utils.config import NEAR_DUP_THRESHOLD, MINHASH_PERMUTATIONS, LSH_BANDS
+
+# Signatures are vectorized with numpy when it is installed (it comes with torch)
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SHINGLE_SIZE = 3
+_PRIME = (1 << 61) - 1
+
+
+def shingles(text: str) -> set[str]:
+    """Return the overlapping token triples of a snippet."""
+    tokens = _TOKEN.findall(text)
+    return {" ".join(tokens[i:i + _SHINGLE_SIZE]) for i in range(max(1, len(tokens) - _SHINGLE_SIZE + 1))}
+
+
+class SnippetClusters:
+    """
+    Incremental MinHash/LSH index of snippets seen so far.
+
+    Cluster ids follow first appearance and the first snippet of a cluster is
+    its representative, so clustering is deterministic for a given input
+    order. One index can span several calls (e.g. every file of a batch run),
+    and `results` keeps the outputs generated per cluster.
+    """
+
+    def __init__(
+        self,
+        threshold: float = NEAR_DUP_THRESHOLD,
+        num_perm: int = MINHASH_PERMUTATIONS,
+        bands: int = LSH_BANDS
+    ):
+        """
+        Args:
+            threshold (float): Estimated Jaccard similarity at which a snippet joins a cluster.
+            num_perm (int): MinHash signature length.
+            bands (int): LSH bands; `num_perm` must be a multiple of it.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.rows = num_perm // bands
+        # A pair at the threshold shares `bands * threshold ** rows` bands on average;
+        # candidates sharing under half of that are too far off to be worth comparing
+        self.min_band_hits = max(1, int(bands * threshold ** self.rows / 2))
+        # Hash family (a * x + b) mod p over 32-bit shingle hashes; a fixed seed
+        # gives the same signatures in every run. a * x + b stays below 2**64.
+        rng = random.Random(0)
+        self._a = [rng.randrange(1, 1 << 32) for _ in range(num_perm)]
+        self._b = [rng.randrange(1 << 32) for _ in range(num_perm)]
+        self._np_params = None
+        self._buckets = {}
+        self._exact = {}
+        self.signatures = []
+        self.representatives = []
+        self.results = {}
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        """Return the MinHash signature of a snippet."""
+        hashes = [zlib.crc32(g.encode("utf-8")) for g in shingles(text)]
+        if NUMPY_AVAILABLE:
+            import numpy as np
+            if self._np_params is None:
+                self._np_params = (np.array(self._a, dtype=np.uint64), np.array(self._b, dtype=np.uint64))
+            a, b = self._np_params
+            x = np.array(hashes, dtype=np.uint64)[:, None]
+            return tuple(((x * a + b) % np.uint64(_PRIME)).min(axis=0).tolist())
+        return tuple(min((a * x + b) % _PRIME for x in hashes) for a, b in zip(self._a, self._b))
+
+    def similarity(self, sig_a: tuple, sig_b: tuple) -> float:
+        """Estimate the Jaccard similarity of two snippets from their signatures."""
+        return sum(map(operator.eq, sig_a, sig_b)) / self.num_perm
+
+    def assign(self, snippets: list[str]) -> list[int]:
+        """
+        Assign each snippet to a cluster, creating clusters for new ones.
+
+        Args:
+            snippets (list[str]): Snippets in order.
+
+        Returns:
+            list[int]: Cluster id per snippet.
+        """
+        ids = []
+        for text in snippets:
+            if text in self._exact:
+                ids.append(self._exact[text])
+                continue
+
+            sig = self.signature(text)
+            bands = [(b, sig[b * self.rows:(b + 1) * self.rows]) for b in range(self.num_perm // self.rows)]
+            hits = Counter()
+            for band in bands:
+                hits.update(self._buckets.get(band, ()))
+            candidates = sorted(cid for cid, n in hits.items() if n >= self.min_band_hits)
+            cluster = next(
+                (cid for cid in candidates if self.similarity(sig, self.signatures[cid]) >= self.threshold),
+                None
+            )
+            if cluster is None:
+                cluster = len(self.representatives)
+                self.representatives.append(text)
+                self.signatures.append(sig)
+                for band in bands:
+                    self._buckets.setdefault(band, []).append(cluster)
+            self._exact[text] = cluster
+            ids.append(cluster)
+        return ids
+
+
+def generate_clustered(
+    snippets: list[str],
+    clusters: SnippetClusters,
+    generate: Callable[[list[str]], list]
+) -> list:
+    """
+    Run `generate` once per new cluster representative and fan the outputs out to every snippet.
+
+    Args:
+        snippets (list[str]): Snippets in order.
+        clusters (SnippetClusters): Index to cluster against (and reuse earlier results from).
+        generate (Callable[[list[str]], list]): Produces one result per snippet it is given.
+
+    Returns:
+        list: One result per snippet, aligned with `snippets`.
+    """
+    ids = clusters.assign(snippets)
+    missing = [cid for cid in dict.fromkeys(ids) if cid not in clusters.results]
+    if missing:
+        outputs = generate([clusters.representatives[cid] for cid in missing])
+        clusters.results.update(zip(missing, outputs))
+    return [clusters.results[cid] for cid in ids]
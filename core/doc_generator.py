@@ -1,25 +1,8 @@
-import torch
 from transformers import PreTrainedModel, PreTrainedTokenizer
-from core.optimize import run_batch_generation, clean_output
-
-
-def clean_code(code: str) -> str:
-    """
-    Clean a code block by removing comments and blank lines.
-
-    Args:
-        code (str): Raw source code.
-
-    Returns:
-        str: Cleaned code string with comments and blank lines removed.
-    """
-    lines = code.splitlines()
-    cleaned = []
-    for line in lines:
-        line = line.strip()
-        if line and not line.startswith(("#", "//")):
-            cleaned.append(line)
-    return "\n".join(cleaned)
+from typing import Iterator
+from core.optimize import run_batch_generation, stream_generation, clean_output, STOP_MARKERS
+from core.cache import GenerationCache
+from core.parser import clean_code
 
 
 def build_prompt(code: str, model_tag: str = "CodeT5p") -> str:
@@ -40,12 +23,32 @@ def build_prompt(code: str, model_tag: str = "CodeT5p") -> str:
         return f"### Code:\n{code}\n\n### Docstring:"
 
 
+def cache_key(code: str, model_tag: str, deterministic: bool) -> str:
+    """
+    Build the generation-cache key for one snippet's docstring.
+
+    Args:
+        code (str): Raw code snippet.
+        model_tag (str): Model identifier string.
+        deterministic (bool): Whether greedy decoding is used.
+
+    Returns:
+        str: Cache key.
+    """
+    params = {"max_tokens": 128, "do_sample": not deterministic, "stop": STOP_MARKERS["docstring"]}
+    return GenerationCache.make_key(model_tag, "docstring", clean_code(code), params)
+
+
 def generate_docstring(
     code_snippets: list[str],
     tokenizer: PreTrainedTokenizer,
     model: PreTrainedModel,
     model_tag: str = "CodeT5p",
-    batch_size: int = 4
+    batch_size: int = 4,
+    bucket_by_length: bool = True,
+    runner=None,
+    deterministic: bool = False,
+    cache: GenerationCache = None
 ) -> list[str]:
     """
     Generate Python-style docstrings for a list of code snippets.
@@ -56,16 +59,78 @@ def generate_docstring(
         model (PreTrainedModel): Preloaded model for generation.
         model_tag (str): Model identifier string for prompt selection.
         batch_size (int): Number of prompts to batch per generation run.
+        bucket_by_length (bool): Batch snippets of similar length together (order is preserved).
+        runner (InferenceScheduler, optional): Shared scheduler to route generation through.
+        deterministic (bool): Use greedy decoding so outputs are reproducible.
+        cache (GenerationCache, optional): Cache consulted before calling the model.
 
     Returns:
         list[str]: Generated docstrings for the input code blocks.
     """
     prompts = [build_prompt(code, model_tag) for code in code_snippets]
-    raw_outputs = run_batch_generation(
-        model=model,
-        tokenizer=tokenizer,
-        prompts=prompts,
-        max_tokens=128,
-        batch_size=batch_size
-    )
-    return clean_output(raw_outputs, prompts)
+
+    def _generate(batch_prompts: list[str]) -> list[str]:
+        if runner is not None:
+            raw = runner.generate(batch_prompts, max_tokens=128, do_sample=not deterministic, task="docstring")
+        else:
+            raw = run_batch_generation(
+                model=model,
+                tokenizer=tokenizer,
+                prompts=batch_prompts,
+                max_tokens=128,
+                batch_size=batch_size,
+                bucket_by_length=bucket_by_length,
+                do_sample=not deterministic,
+                task="docstring"
+            )
+        return clean_output(raw, task="docstring")
+
+    if cache is None:
+        return _generate(prompts)
+
+    keys = [cache_key(code, model_tag, deterministic) for code in code_snippets]
+    return cache.resolve(keys, prompts, _generate)
+
+
+def stream_docstring(
+    code_snippets: list[str],
+    tokenizer: PreTrainedTokenizer,
+    model: PreTrainedModel,
+    model_tag: str = "CodeT5p",
+    deterministic: bool = False,
+    cache: GenerationCache = None,
+    runner=None
+) -> Iterator[tuple[int, str]]:
+    """
+    Stream docstrings snippet by snippet as tokens are decoded.
+
+    Args:
+        code_snippets (list[str]): Code blocks to process, in display order.
+        tokenizer (PreTrainedTokenizer): Tokenizer for the selected model.
+        model (PreTrainedModel): The loaded transformer model.
+        model_tag (str): Model identifier string for prompt selection.
+        deterministic (bool): Use greedy decoding so outputs are reproducible.
+        cache (GenerationCache, optional): Cached outputs are yielded at once; new ones are stored.
+        runner (InferenceScheduler, optional): Shared scheduler; streaming then runs under its
+            model lock instead of alongside its batched forward passes.
+
+    Yields:
+        tuple[int, str]: Snippet index and the cleaned text generated so far for it.
+    """
+    for i, code in enumerate(code_snippets):
+        key = cache_key(code, model_tag, deterministic) if cache is not None else None
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            yield i, cached
+            continue
+
+        prompt = build_prompt(code, model_tag)
+        text = ""
+        options = {"max_tokens": 128, "do_sample": not deterministic, "task": "docstring"}
+        chunks = runner.stream(prompt, **options) if runner is not None else \
+            stream_generation(model, tokenizer, prompt, **options)
+        for chunk in chunks:
+            text += chunk
+            yield i, clean_output([text], task="docstring")[0]
+        if key:
+            cache.put(key, clean_output([text], task="docstring")[0])
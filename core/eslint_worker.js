@@ -0,0 +1,37 @@
+// Persistent ESLint worker for core/lint_worker.py.
+// One JSON request per stdin line ({"code", "filePath"}), one JSON response per
+// stdout line ({"output"} with ESLint's JSON results, or {"error"}).
+const path = require("path");
+const readline = require("readline");
+const { execSync } = require("child_process");
+
+function loadESLint() {
+  try {
+    return require("eslint");
+  } catch (err) {
+    // Fall back to a global install (npm install -g eslint)
+    const globalRoot = execSync("npm root -g", { encoding: "utf8" }).trim();
+    return require(path.join(globalRoot, "eslint"));
+  }
+}
+
+const { ESLint } = loadESLint();
+const eslint = new ESLint({ cwd: process.cwd() });
+const lines = readline.createInterface({ input: process.stdin });
+
+// Answer strictly in request order
+let pending = Promise.resolve();
+lines.on("line", (line) => {
+  pending = pending.then(async () => {
+    let response;
+    try {
+      const request = JSON.parse(line);
+      const filePath = path.resolve(request.filePath || "snippet.js");
+      const results = await eslint.lintText(request.code, { filePath });
+      response = { output: JSON.stringify(results) };
+    } catch (err) {
+      response = { error: String((err && err.message) || err) };
+    }
+    process.stdout.write(JSON.stringify(response) + "\n");
+  });
+});
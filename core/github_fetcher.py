@@ -5,6 +5,9 @@ from urllib.parse import urlparse
 GITHUB_API_BASE = "https://api.github.com/repos"
 RAW_BASE = "https://raw.githubusercontent.com"
 
+# (owner, repo) -> default branch, for lookups that succeeded
+_default_branches = {}
+
 
 def extract_code_from_notebook(notebook_str: str) -> str:
     """
@@ -25,53 +28,194 @@ def extract_code_from_notebook(notebook_str: str) -> str:
         return ""
 
 
-def fetch_python_and_js_files_from_repo(repo_url: str, include_ipynb: bool = True) -> list[str]:
+def parse_repo_url(repo_url: str) -> tuple[str, str] | None:
     """
-    Fetch .py, .js, and optionally .ipynb (code only) file contents from a public GitHub repo (main branch assumed).
+    Split a GitHub repo URL into owner and repository name.
 
     Args:
         repo_url (str): GitHub repo URL (e.g., https://github.com/user/repo)
-        include_ipynb (bool): Whether to include Jupyter Notebook code.
 
     Returns:
-        list[str]: List of code file contents (as strings)
+        tuple[str, str] | None: (owner, repo), or None if the URL is not a GitHub repo link.
     """
     if "github.com" not in repo_url:
         print("[Invalid URL] Must be a valid GitHub repo link.")
-        return []
+        return None
 
-    parsed = urlparse(repo_url)
-    parts = parsed.path.strip("/").split("/")
+    parts = urlparse(repo_url).path.strip("/").split("/")
     if len(parts) < 2:
-        return []
+        return None
+    return parts[0], parts[1]
+
 
-    user, repo = parts[:2]
-    base_raw_url = f"{RAW_BASE}/{user}/{repo}/main"
-    tree_url = f"{GITHUB_API_BASE}/{user}/{repo}/git/trees/main?recursive=1"
+def fetch_default_branch(repo_url: str) -> str:
+    """
+    Look up a repo's default branch; successful lookups are remembered.
+
+    Args:
+        repo_url (str): GitHub repo URL.
 
+    Returns:
+        str: Default branch name, or "main" if it could not be looked up.
+    """
+    repo = parse_repo_url(repo_url)
+    if repo is None:
+        return "main"
+    if repo in _default_branches:
+        return _default_branches[repo]
+
+    user, name = repo
     try:
-        response = requests.get(tree_url)
+        response = requests.get(f"{GITHUB_API_BASE}/{user}/{name}")
+        if response.status_code != 200:
+            print(f"[GitHub API Error] Status {response.status_code}")
+            return "main"
+        branch = response.json().get("default_branch") or "main"
+    except Exception as e:
+        print(f"[Error fetching repo info] {e}")
+        return "main"
+    _default_branches[repo] = branch
+    return branch
+
+
+def is_code_path(path: str, include_ipynb: bool = True) -> bool:
+    """Whether a repo path is a file the pipeline analyzes."""
+    return path.endswith(".py") or path.endswith(".js") or (include_ipynb and path.endswith(".ipynb"))
+
+
+def fetch_repo_tree(repo_url: str, include_ipynb: bool = True, ref: str = None) -> list[tuple[str, str]]:
+    """
+    List the code files of a repo at a ref with their git blob SHAs, without downloading them.
+
+    Args:
+        repo_url (str): GitHub repo URL.
+        include_ipynb (bool): Whether to include Jupyter Notebooks.
+        ref (str): Branch, tag or commit (default: the repo's default branch).
+
+    Returns:
+        list[tuple[str, str]]: (path in repo, blob SHA) pairs; a file's SHA changes exactly when its content does.
+    """
+    repo = parse_repo_url(repo_url)
+    if repo is None:
+        return []
+
+    user, name = repo
+    ref = ref or fetch_default_branch(repo_url)
+    try:
+        response = requests.get(f"{GITHUB_API_BASE}/{user}/{name}/git/trees/{ref}?recursive=1")
         if response.status_code != 200:
             print(f"[GitHub API Error] Status {response.status_code}")
             return []
+        return [
+            (item["path"], item.get("sha", ""))
+            for item in response.json().get("tree", [])
+            if item.get("type", "blob") == "blob" and is_code_path(item.get("path", ""), include_ipynb)
+        ]
+    except Exception as e:
+        print(f"[Error fetching repo tree] {e}")
+        return []
 
-        code_files = []
-        for item in response.json().get("tree", []):
-            path = item.get("path", "")
-            if path.endswith(".py") or path.endswith(".js") or (include_ipynb and path.endswith(".ipynb")):
-                raw_url = f"{base_raw_url}/{path}"
-                raw_response = requests.get(raw_url)
-                if raw_response.status_code == 200:
-                    if path.endswith(".ipynb"):
-                        code = extract_code_from_notebook(raw_response.text)
-                    else:
-                        code = raw_response.text
-
-                    if code.strip():
-                        code_files.append(code)
 
+def fetch_repo_file(repo_url: str, path: str, ref: str = None) -> str | None:
+    """
+    Download one file from a repo; notebooks are reduced to their code cells.
+
+    Args:
+        repo_url (str): GitHub repo URL.
+        path (str): Path in the repo.
+        ref (str): Branch, tag or commit (default: the repo's default branch).
+
+    Returns:
+        str | None: File content, or None if it does not exist at `ref`.
+    """
+    repo = parse_repo_url(repo_url)
+    if repo is None:
+        return None
+
+    user, name = repo
+    ref = ref or fetch_default_branch(repo_url)
+    raw_response = requests.get(f"{RAW_BASE}/{user}/{name}/{ref}/{path}")
+    if raw_response.status_code != 200:
+        return None
+    if path.endswith(".ipynb"):
+        return extract_code_from_notebook(raw_response.text)
+    return raw_response.text
+
+
+def fetch_changed_paths(
+    repo_url: str,
+    base: str,
+    ref: str = None,
+    include_ipynb: bool = True
+) -> list[tuple[str, str, str]] | None:
+    """
+    List the code files that differ between two refs (GitHub compare API).
+
+    Args:
+        repo_url (str): GitHub repo URL.
+        base (str): Base branch, tag or commit.
+        ref (str): Head branch, tag or commit (default: the repo's default branch).
+        include_ipynb (bool): Whether to include Jupyter Notebooks.
+
+    Returns:
+        list[tuple[str, str, str]] | None: (path, status, path at base) per file, with
+            status "added", "modified", "removed" or "renamed"; None if the comparison failed.
+    """
+    repo = parse_repo_url(repo_url)
+    if repo is None:
+        return None
+
+    user, name = repo
+    ref = ref or fetch_default_branch(repo_url)
+    try:
+        response = requests.get(f"{GITHUB_API_BASE}/{user}/{name}/compare/{base}...{ref}")
+        if response.status_code != 200:
+            print(f"[GitHub API Error] Status {response.status_code}")
+            return None
+        return [
+            (item["filename"], item.get("status", "modified"), item.get("previous_filename", item["filename"]))
+            for item in response.json().get("files", [])
+            if is_code_path(item.get("filename", ""), include_ipynb)
+        ]
+    except Exception as e:
+        print(f"[Error comparing refs] {e}")
+        return None
+
+
+def fetch_repo_files(repo_url: str, include_ipynb: bool = True) -> list[tuple[str, str]]:
+    """
+    Fetch .py, .js, and optionally .ipynb (code only) files from a public GitHub repo's default branch.
+
+    Args:
+        repo_url (str): GitHub repo URL (e.g., https://github.com/user/repo)
+        include_ipynb (bool): Whether to include Jupyter Notebook code.
+
+    Returns:
+        list[tuple[str, str]]: (path in repo, code) pairs
+    """
+    try:
+        ref = fetch_default_branch(repo_url)
+        code_files = []
+        for path, _ in fetch_repo_tree(repo_url, include_ipynb, ref):
+            code = fetch_repo_file(repo_url, path, ref)
+            if code and code.strip():
+                code_files.append((path, code))
         return code_files
 
     except Exception as e:
         print(f"[Error fetching repo files] {e}")
         return []
+
+
+def fetch_python_and_js_files_from_repo(repo_url: str, include_ipynb: bool = True) -> list[str]:
+    """
+    Fetch .py, .js, and optionally .ipynb (code only) file contents from a public GitHub repo's default branch.
+
+    Args:
+        repo_url (str): GitHub repo URL (e.g., https://github.com/user/repo)
+        include_ipynb (bool): Whether to include Jupyter Notebook code.
+
+    Returns:
+        list[str]: List of code file contents (as strings)
+    """
+    return [code for _, code in fetch_repo_files(repo_url, include_ipynb)]
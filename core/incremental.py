@@ -0,0 +1,367 @@
+"""
+Incremental re-analysis: only functions that changed since the last run go to the model.
+
+Each run records, per source, the fingerprint of every file (the git blob
+SHA for GitHub repos, a content hash for local files) and of every function
+in it (qualified name and a hash of the normalized body) together with the
+generated summary, docstring and lint results. The next run compares the new
+tree against that state: unchanged files are not fetched at all, and in
+changed files only added or changed functions are generated. Linters work on
+whole files, so changed files are linted again and unchanged ones keep their
+results. The merged result covers the whole tree.
+
+With a base ref (PR-style), functions are diffed against the base revision of
+each changed file instead, and only added or changed functions are reported.
+"""
+import hashlib
+import json
+import os
+import subprocess
+from collections import Counter
+from typing import Callable
+
+from core.ast_metrics import quick_quality
+from core.cache import LintCache
+from core.code_quality import run_code_quality_on_files, is_cacheable
+from core.language_detect import language_from_extension
+from core.parser import ParsedSource, clean_code, parse_source
+from utils.config import INCREMENTAL_DIR
+from utils.logger import get_logger
+
+logger = get_logger("incremental")
+
+# Qualified name used for a file without functions, which is analyzed whole
+MODULE_UNIT = "<module>"
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-1 hex digest of a text."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def function_hash(snippet: str) -> str:
+    """Fingerprint a function body; comment and whitespace edits do not change it."""
+    return content_hash(clean_code(snippet))
+
+
+def file_units(parsed: ParsedSource) -> list[tuple[str, str]]:
+    """Return (qualified name, snippet) per function of a parsed file, or the whole file if it has none."""
+    return parsed.units or [(MODULE_UNIT, parsed.code.strip())]
+
+
+class IncrementalState:
+    """
+    What the last run of one source (local path or repo URL) produced.
+
+    Stored as JSON under `INCREMENTAL_DIR`. Outputs depend on the model, so a
+    state written with another model is ignored.
+    """
+
+    VERSION = 1
+
+    def __init__(self, source: str, model_tag: str, state_dir: str = INCREMENTAL_DIR):
+        """
+        Args:
+            source (str): Local path or GitHub repo URL, as given to the run.
+            model_tag (str): Model identifier string (e.g., "CodeT5p").
+            state_dir (str): Folder holding one state file per source.
+        """
+        self.source = source
+        self.model_tag = model_tag
+        self.path = os.path.join(state_dir, f"{content_hash(source)[:16]}.json")
+        # path -> {"fingerprint", "language", "functions": [{"name", "hash", "summary", "docstring"}],
+        #          "metrics", "quality"}
+        self.files = {}
+        self.load()
+
+    def load(self):
+        """Read the state file, if there is a usable one."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable incremental state {self.path}: {e}")
+            return
+        if data.get("version") != self.VERSION or data.get("model") != self.model_tag:
+            logger.info(f"Incremental state for {self.source} is from another model or version; starting over")
+            return
+        self.files = data.get("files", {})
+
+    def save(self):
+        """Write the state file atomically."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {"version": self.VERSION, "source": self.source, "model": self.model_tag, "files": self.files}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def outputs(self) -> dict[str, tuple[str, str]]:
+        """Return the (summary, docstring) recorded for each function hash."""
+        return {
+            f["hash"]: (f["summary"], f["docstring"])
+            for entry in self.files.values() for f in entry["functions"]
+        }
+
+
+def analyze_incremental(
+    tree: list[tuple[str, str]],
+    fetch: Callable[[str], str | None],
+    state: IncrementalState,
+    generate: Callable[[list[str]], list[tuple[str, str]]],
+    tokenizer=None,
+    base: dict = None,
+    full_lint: bool = True,
+    lint_cache: LintCache = None,
+    lint_config_dir: str = "."
+) -> dict:
+    """
+    Analyze a tree, regenerating only the functions that are new or changed.
+
+    Args:
+        tree (list[tuple[str, str]]): (path, fingerprint) per code file of the new
+            revision; the fingerprint must change whenever the content does. In
+            base-ref mode, only the paths changed since the base.
+        fetch (Callable[[str], str | None]): Returns a file's content at the new revision, or
+            None if it could not be fetched; such a file keeps its last results.
+        state (IncrementalState): Last run's state; updated and saved unless `base` is given.
+        generate (Callable[[list[str]], list[tuple[str, str]]]): (summary, docstring) per snippet.
+        tokenizer (PreTrainedTokenizer, optional): Model tokenizer, for splitting large classes.
+        base (dict, optional): Base-ref mode: content at the base ref (None if the
+            file is new) of every changed path, including removed ones.
+        full_lint (bool): Run pylint/ESLint on changed files; otherwise only the
+            built-in AST metrics (JavaScript is always fully linted).
+        lint_cache (LintCache, optional): Persistent lint result cache.
+        lint_config_dir (str): Folder holding the project's ESLint config.
+
+    Returns:
+        dict: `files` (path -> `language`, `changed`, `functions` with `name`,
+            `status` ("added", "changed" or "unchanged"), `summary` and
+            `docstring`, `metrics`, `quality`), `removed` ((path, name) pairs)
+            and `stats` (file and function counts, snippets generated, `fetch_errors`).
+    """
+    known = state.outputs()
+    previous = state.files if base is None else {}
+    files, changed, removed, failed = {}, [], [], set()
+    stats = Counter()
+
+    for path, fingerprint in tree:
+        entry = previous.get(path)
+        if entry and entry["fingerprint"] == fingerprint:
+            files[path] = dict(
+                entry, changed=False, functions=[dict(f, status="unchanged") for f in entry["functions"]]
+            )
+            stats["files_unchanged"] += 1
+            continue
+
+        try:
+            code = fetch(path)
+        except Exception as e:
+            logger.warning(f"Could not fetch {path}: {e}")
+            code = None
+        if code is None:
+            # A transient failure must not read as the file being deleted
+            failed.add(path)
+            stats["fetch_errors"] += 1
+            if entry:
+                files[path] = dict(
+                    entry, changed=False, functions=[dict(f, status="unchanged") for f in entry["functions"]]
+                )
+            continue
+        language = language_from_extension(path)
+        if not code.strip() or language is None:
+            continue
+
+        if base is not None:
+            before = base.get(path)
+            old = {
+                name: function_hash(snippet)
+                for name, snippet in file_units(parse_source(before, language, path, tokenizer))
+            } if before and before.strip() else {}
+        else:
+            old = {f["name"]: f["hash"] for f in entry["functions"]} if entry else {}
+
+        parsed = parse_source(code, language, path, tokenizer)
+        functions = []
+        for name, snippet in file_units(parsed):
+            digest = function_hash(snippet)
+            status = "added" if name not in old else "unchanged" if old[name] == digest else "changed"
+            functions.append({"name": name, "hash": digest, "status": status, "code": snippet})
+        names = {f["name"] for f in functions}
+        removed.extend((path, name) for name in old if name not in names)
+
+        changed.append((path, code, language, parsed))
+        files[path] = {"fingerprint": fingerprint, "language": language, "changed": True, "functions": functions}
+        stats["files_changed"] += 1
+
+    # Files gone since the last run (or deleted since the base)
+    gone = [p for p in previous if p not in files and p not in failed] if base is None else [
+        p for p in base
+        if p not in files and p not in failed and base[p] and base[p].strip() and language_from_extension(p)
+    ]
+    for path in gone:
+        if base is None:
+            removed.extend((path, f["name"]) for f in previous[path]["functions"])
+        else:
+            parsed = parse_source(base[path], language_from_extension(path), path, tokenizer)
+            removed.extend((path, name) for name, _ in file_units(parsed))
+        stats["files_removed"] += 1
+
+    # Generate each new body once, wherever it appears; moved or reverted functions reuse outputs
+    pending = {}
+    for entry in files.values():
+        if entry["changed"]:
+            if base is not None:
+                entry["functions"] = [f for f in entry["functions"] if f["status"] != "unchanged"]
+            for f in entry["functions"]:
+                if f["hash"] not in known:
+                    pending.setdefault(f["hash"], f["code"])
+    if pending:
+        known.update(zip(pending, generate(list(pending.values()))))
+    stats["generated"] = len(pending)
+
+    for entry in files.values():
+        for f in entry["functions"]:
+            f.pop("code", None)
+            f["summary"], f["docstring"] = known[f["hash"]]
+            stats[f"functions_{f['status']}"] += 1
+    stats["functions_removed"] = len(removed)
+
+    # Lint is per file: only changed files are linted again
+    lint_files = []
+    for path, code, language, parsed in changed:
+        metrics = quick_quality(code, language, parsed)
+        if metrics is not None:
+            lines = metrics["raw_output"].splitlines()
+            metrics = {**metrics, "path": path, "raw_output": "\n".join(f"{path}:{line}" for line in lines)}
+        files[path]["metrics"] = metrics
+        files[path]["quality"] = None
+        if full_lint or metrics is None:
+            lint_files.append((path, code))
+    for result in run_code_quality_on_files(lint_files, cache=lint_cache, config_dir=lint_config_dir) if lint_files else []:
+        files[result["path"]]["quality"] = result
+
+    if base is None:
+        lint_ok = lambda quality: quality is None or is_cacheable(quality)
+        # A failed or timed-out lint is not kept: without the fingerprint the file is
+        # linted again next run, while its functions still reuse their outputs by hash
+        state.files = {
+            path: {
+                "fingerprint": entry["fingerprint"] if lint_ok(entry["quality"]) else None,
+                "language": entry["language"],
+                "functions": [{k: f[k] for k in ("name", "hash", "summary", "docstring")} for f in entry["functions"]],
+                "metrics": entry["metrics"],
+                "quality": entry["quality"] if lint_ok(entry["quality"]) else None
+            }
+            for path, entry in files.items()
+        }
+        state.save()
+
+    logger.info(
+        f"Incremental run of {state.source}: {stats['files_changed']} changed, "
+        f"{stats['files_unchanged']} unchanged, {stats['files_removed']} removed file(s), "
+        f"{stats['fetch_errors']} fetch error(s); {stats['generated']} snippet(s) generated"
+    )
+    return {"files": files, "removed": removed, "stats": dict(stats)}
+
+
+def github_snapshot(repo_url: str, base: str = None, ref: str = None) -> tuple[list, Callable, dict | None]:
+    """
+    Describe a GitHub repo for `analyze_incremental` without downloading unchanged files.
+
+    Args:
+        repo_url (str): GitHub repo URL.
+        base (str, optional): Base branch, tag or commit for base-ref mode.
+        ref (str): Branch, tag or commit to analyze (default: the repo's default branch).
+
+    Returns:
+        tuple: (tree, fetch, base contents or None).
+
+    Raises:
+        ValueError: If the refs cannot be compared or a file cannot be fetched at `base`.
+    """
+    import requests
+    from core.github_fetcher import fetch_default_branch, fetch_repo_tree, fetch_repo_file, fetch_changed_paths
+
+    ref = ref or fetch_default_branch(repo_url)
+
+    def fetch(path: str) -> str | None:
+        return fetch_repo_file(repo_url, path, ref)
+
+    tree = fetch_repo_tree(repo_url, ref=ref)
+    if base is None:
+        return tree, fetch, None
+
+    changes = fetch_changed_paths(repo_url, base, ref)
+    if changes is None:
+        raise ValueError(f"Could not compare {base}...{ref}")
+
+    def fetch_base(base_path: str) -> str:
+        try:
+            content = fetch_repo_file(repo_url, base_path, base)
+        except requests.RequestException as e:
+            raise ValueError(f"Could not fetch {base_path} at {base}: {e}") from e
+        if content is None:
+            # Read as "new file", it would report every function as added
+            raise ValueError(f"Could not fetch {base_path} at {base}")
+        return content
+
+    before = {
+        path: None if status == "added" else fetch_base(base_path)
+        for path, status, base_path in changes
+    }
+    changed_paths = {path for path, status, _ in changes if status != "removed"}
+    return [(path, sha) for path, sha in tree if path in changed_paths], fetch, before
+
+
+def local_snapshot(root: str, code_files: list[tuple[str, str]], base: str = None) -> tuple[list, Callable, dict | None]:
+    """
+    Describe local files for `analyze_incremental`; base-ref mode needs `root` in a git work tree.
+
+    Args:
+        root (str): File or directory the files were collected from.
+        code_files (list[tuple[str, str]]): (path, code) pairs under `root`.
+        base (str, optional): Base commit, branch or tag; the working tree is compared against it.
+
+    Returns:
+        tuple: (tree, fetch, base contents or None).
+    """
+    contents = dict(code_files)
+    tree = [(path, content_hash(code)) for path, code in code_files]
+    if base is None:
+        return tree, contents.get, None
+
+    cwd = root if os.path.isdir(root) else os.path.dirname(root) or "."
+    diff = subprocess.run(
+        ["git", "diff", "--name-status", "-M", "--relative", base, "--", "."],
+        cwd=cwd, capture_output=True, text=True, check=True
+    ).stdout
+    # New files not yet added to git are not in the diff
+    untracked = subprocess.run(
+        ["git", "ls-files", "--others", "--exclude-standard", "--", "."],
+        cwd=cwd, capture_output=True, text=True, check=True
+    ).stdout
+    diff += "".join(f"A\t{path}\n" for path in untracked.splitlines())
+
+    def at_base(rel_path: str) -> str | None:
+        shown = subprocess.run(["git", "show", f"{base}:./{rel_path}"], cwd=cwd, capture_output=True, text=True)
+        if shown.returncode != 0:
+            return None
+        if rel_path.endswith(".ipynb"):
+            from core.github_fetcher import extract_code_from_notebook
+            return extract_code_from_notebook(shown.stdout)
+        return shown.stdout
+
+    # Keyed like the collected paths; files deleted since the base keep the joined path
+    collected = {os.path.normpath(path): path for path in contents}
+    before = {}
+    for line in diff.splitlines():
+        status, *paths = line.split("\t")
+        full_path = os.path.normpath(os.path.join(cwd, paths[-1]))
+        if os.path.isfile(root) and full_path != os.path.normpath(root):
+            continue
+        before[collected.get(full_path, full_path)] = None if status.startswith("A") else at_base(paths[0])
+
+    return [(path, fingerprint) for path, fingerprint in tree if path in before], contents.get, before
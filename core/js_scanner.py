@@ -0,0 +1,271 @@
+"""
+Single-pass JavaScript scanner that finds function, method and class spans.
+
+Braces are matched on a stack while strings, template literals (including
+nested `${...}` expressions), regex literals and comments are skipped, so a
+function body ends at its real closing brace. Each `{` is classified once by
+looking at a short window of text before it. The scan is linear in the input
+size and never builds a full token list, so minified bundles are fine.
+"""
+import re
+import string
+
+# Characters that open something the scanner must track or skip
+_TOKEN = re.compile(
+    r'//[^\n]*'
+    r'|/\*[\s\S]*?(?:\*/|\Z)'
+    r'|"(?:[^"\\\n]|\\[\s\S])*"?'
+    r"|'(?:[^'\\\n]|\\[\s\S])*'?"
+    r'|[`/{}()]'
+)
+_TEMPLATE_BODY = re.compile(r'(?:[^`\\$]|\\[\s\S]|\$(?!\{))*')
+_REGEX_LITERAL = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+
+# How far back from a `{` a class head is looked for
+_LOOKBACK = 200
+_CLASS_HEAD = re.compile(r'class\b(?:\s+([\w$]+))?(?:\s+extends\b[^{};]*)?\s*\Z')
+_WORD_CHARS = string.ascii_letters + string.digits + "_$"
+# Identifiers longer than this are not looked back over
+_MAX_WORD = 64
+_MODIFIERS = frozenset({"export", "default", "async", "static", "get", "set", "const", "let", "var"})
+
+_CONTROL_KEYWORDS = frozenset({
+    "if", "for", "while", "switch", "catch", "with", "function", "return", "typeof", "await", "yield"
+})
+# A `/` after these words starts a regex literal, not a division
+_REGEX_KEYWORDS = frozenset({
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void", "throw",
+    "case", "do", "else", "yield", "await"
+})
+_TEMPLATE = object()
+
+
+class JSSpan:
+    """A function, method or class found by `scan_javascript`: character offsets and 1-based lines."""
+
+    def __init__(self, name: str, kind: str, start: int, end: int, start_line: int, end_line: int, depth: int):
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.start_line = start_line
+        self.end_line = end_line
+        self.depth = depth
+
+    def __repr__(self):
+        return f"JSSpan({self.kind} {self.name!r}, lines {self.start_line}-{self.end_line})"
+
+
+def _is_word_char(c: str) -> bool:
+    return c in _WORD_CHARS
+
+
+def _skip_space_back(code: str, end: int) -> int:
+    while end > 0 and code[end - 1] in " \t\r\n":
+        end -= 1
+    return end
+
+
+def _word_before(code: str, end: int) -> tuple[str, int]:
+    """Return the identifier ending at `end` (after skipping whitespace back) and its start offset."""
+    end = _skip_space_back(code, end)
+    window = code[max(0, end - _MAX_WORD):end]
+    word = window[len(window.rstrip(_WORD_CHARS)):]
+    return word, end - len(word)
+
+
+def _regex_allowed(code: str, i: int) -> bool:
+    """Whether a `/` at `i` starts a regex literal, judged by the preceding token."""
+    j = _skip_space_back(code, i)
+    if j == 0:
+        return True
+    c = code[j - 1]
+    if c in ")]}":
+        return False
+    if _is_word_char(c):
+        return _word_before(code, j)[0] in _REGEX_KEYWORDS
+    return True
+
+
+def _assigned_name(code: str, end: int) -> tuple[str, int] | None:
+    """Match `name =`, `name:` or `name = async` ending at `end`; return the name and its offset."""
+    word, start = _word_before(code, end)
+    if word == "async":
+        end = start
+    j = _skip_space_back(code, end)
+    if j == 0 or code[j - 1] not in "=:" or code[j - 2:j] in ("==", "!=", "<=", ">=", "::"):
+        return None
+    word, start = _word_before(code, j - 1)
+    if not word or word[0].isdigit():
+        return None
+    return word, start
+
+
+def _declaration_start(code: str, start: int) -> int:
+    """Move `start` back over `export`, `async`, `static`, `const`, `*`, ... keywords."""
+    while True:
+        j = _skip_space_back(code, start)
+        if j > 0 and code[j - 1] == "*":
+            start = j - 1
+            continue
+        word, word_start = _word_before(code, j)
+        if word not in _MODIFIERS:
+            return start
+        start = word_start
+
+
+def _classify(code: str, i: int, last_paren: tuple) -> tuple | None:
+    """
+    Decide what the `{` at `i` opens.
+
+    Returns:
+        tuple | None: (name, kind, start) for a function, method or class body; None otherwise.
+    """
+    end = _skip_space_back(code, i)
+    if end == 0:
+        return None
+    last = code[end - 1]
+
+    class_at = code.rfind("class", max(0, i - _LOOKBACK), end)
+    if class_at >= 0 and (class_at == 0 or not _is_word_char(code[class_at - 1])):
+        m = _CLASS_HEAD.match(code, class_at, end)
+        if m:
+            name, start = m.group(1), class_at
+            if not name:
+                assigned = _assigned_name(code, class_at)
+                if not assigned:
+                    return None
+                name, start = assigned
+            return name, "class", _declaration_start(code, start)
+
+    if code[end - 2:end] == "=>":
+        # Arrow body: the name comes from the assignment or property before the parameters
+        params_end = _skip_space_back(code, end - 2)
+        if code[params_end - 1:params_end] == ")":
+            if not last_paren or last_paren[1] != params_end - 1:
+                return None
+            params_start = last_paren[0]
+        else:
+            param, params_start = _word_before(code, params_end)
+            if not param:
+                return None
+        assigned = _assigned_name(code, params_start)
+        if not assigned:
+            return None
+        return assigned[0], "function", _declaration_start(code, assigned[1])
+
+    if last != ")" or not last_paren or last_paren[1] != end - 1:
+        return None
+
+    # `name(...) {`: a function declaration/expression or a class/object method
+    word, start = _word_before(code, last_paren[0])
+    generator = False
+    if not word:
+        j = _skip_space_back(code, last_paren[0])
+        if code[j - 1:j] == "*":
+            generator = True
+            word, start = _word_before(code, j - 1)
+    if word == "function":
+        assigned = _assigned_name(code, start)
+        if not assigned:
+            return None
+        return assigned[0], "function", _declaration_start(code, assigned[1])
+
+    before, before_start = _word_before(code, start)
+    if not generator:
+        j = _skip_space_back(code, start)
+        generator = code[j - 1:j] == "*"
+        if generator:
+            before, before_start = _word_before(code, j - 1)
+    if before == "function":
+        return word, "function", _declaration_start(code, before_start)
+
+    if not word or word in _CONTROL_KEYWORDS or word[0].isdigit():
+        return None
+    j = _skip_space_back(code, start)
+    if code[j - 1:j] == ".":
+        return None
+    return word, "method", _declaration_start(code, start)
+
+
+def scan_javascript(code: str) -> list[JSSpan]:
+    """
+    Find named functions, methods and classes in JavaScript source in one pass.
+
+    Anonymous functions (callbacks, IIFEs) are not reported, but named
+    functions inside them are.
+
+    Args:
+        code (str): JavaScript source code.
+
+    Returns:
+        list[JSSpan]: Spans ordered by start offset; `depth` counts the reported spans enclosing each one.
+    """
+    spans = []
+    braces = []  # per open `{`: a pending (name, kind, start), _TEMPLATE, or None
+    parens = []
+    last_paren = None
+    open_spans = 0
+    pos = 0
+    n = len(code)
+
+    while pos < n:
+        m = _TOKEN.search(code, pos)
+        if m is None:
+            break
+        tok = m.group()
+        i = m.start()
+        pos = m.end()
+
+        if tok == "(":
+            parens.append(i)
+        elif tok == ")":
+            if parens:
+                last_paren = (parens.pop(), i)
+        elif tok == "{":
+            pending = _classify(code, i, last_paren)
+            if pending is not None:
+                pending = (*pending, open_spans)
+                open_spans += 1
+            braces.append(pending)
+        elif tok == "}":
+            if not braces:
+                continue
+            top = braces.pop()
+            if top is _TEMPLATE:
+                pos = _skip_template(code, pos, braces)
+            elif top is not None:
+                name, kind, start, depth = top
+                open_spans -= 1
+                spans.append((start, i + 1, name, kind, depth))
+        elif tok == "`":
+            pos = _skip_template(code, pos, braces)
+        elif tok == "/":
+            if _regex_allowed(code, i):
+                literal = _REGEX_LITERAL.match(code, i)
+                if literal:
+                    pos = literal.end()
+        # Comments and strings are consumed whole by _TOKEN
+
+    spans.sort()
+    # Line numbers for all spans in one sweep over the newlines
+    result = []
+    line, line_pos = 1, 0
+    boundaries = sorted({p for start, end, *_ in spans for p in (start, end - 1)})
+    lines_at = {}
+    for p in boundaries:
+        line += code.count("\n", line_pos, p)
+        line_pos = p
+        lines_at[p] = line
+    for start, end, name, kind, depth in spans:
+        result.append(JSSpan(name, kind, start, end, lines_at[start], lines_at[end - 1], depth))
+    return result
+
+
+def _skip_template(code: str, pos: int, braces: list) -> int:
+    """Skip template literal text from `pos`; on `${` push a marker and return to code scanning."""
+    pos = _TEMPLATE_BODY.match(code, pos).end()
+    if code.startswith("${", pos):
+        braces.append(_TEMPLATE)
+        return pos + 2
+    return pos + 1  # past the closing backtick (or the end of input)
@@ -1,20 +1,14 @@
+import os
 import re
-from pygments.lexers import guess_lexer
-from pygments.util import ClassNotFound
 
+from utils.config import DETECT_SAMPLE_CHARS
 
-def _heuristic_score(code: str, language: str) -> int:
-    """
-    Compute language-specific pattern score for heuristic detection.
+EXTENSION_LANGUAGES = {".py": "python", ".ipynb": "python", ".js": "javascript"}
 
-    Args:
-        code (str): Code snippet.
-        language (str): 'python' or 'javascript'.
-
-    Returns:
-        int: Number of matched patterns.
-    """
-    patterns = {
+# Compiled once at import; detection runs on every pasted snippet
+_HEURISTIC_PATTERNS = {
+    language: [re.compile(pattern, re.MULTILINE) for pattern in patterns]
+    for language, patterns in {
         "python": [
             r'\bdef\b', r'\bclass\b', r'\bself\b', r'\bimport\b',
             r':\s*(#.*)?\n\s+', r'\bprint\s*\(', r'^\s*@\w+',
@@ -24,16 +18,69 @@ def _heuristic_score(code: str, language: str) -> int:
             r'\bfunction\b', r'\bconst\b', r'\blet\b', r'\bvar\b',
             r'=>', r'\bconsole\.log\b', r';\s*$', r'^\s*import\s+.*\s+from\s+["\']'
         ]
-    }
+    }.items()
+}
 
-    return sum(bool(re.search(pattern, code, re.MULTILINE)) for pattern in patterns[language])
+
+def language_from_extension(path: str) -> str | None:
+    """
+    Return the language implied by a file's extension.
+
+    Args:
+        path (str): File path or name.
+
+    Returns:
+        str | None: 'python' or 'javascript', or None for other extensions.
+    """
+    return EXTENSION_LANGUAGES.get(os.path.splitext(path)[1].lower())
+
+
+def language_for_file(path: str, code: str) -> str:
+    """
+    Decide a file's language: from the extension, or from its content when the extension says nothing.
+
+    Args:
+        path (str): File path or name.
+        code (str): File content.
+
+    Returns:
+        str: 'python', 'javascript', or 'unknown'
+    """
+    return language_from_extension(path) or detect_language(code)
+
+
+def _sample(code: str, size: int = DETECT_SAMPLE_CHARS) -> str:
+    """Return the start, middle and end of long code (whole lines), enough to tell the language."""
+    if len(code) <= size:
+        return code
+    third = size // 3
+    parts = []
+    for start in (0, (len(code) - third) // 2, len(code) - third):
+        # Snap to line starts so line-anchored patterns still match
+        start = code.rfind("\n", 0, start) + 1 if start else 0
+        parts.append(code[start:start + third])
+    return "\n".join(parts)
+
+
+def _heuristic_score(code: str, language: str) -> int:
+    """
+    Compute language-specific pattern score for heuristic detection.
+
+    Args:
+        code (str): Code snippet.
+        language (str): 'python' or 'javascript'.
+
+    Returns:
+        int: Number of matched patterns.
+    """
+    return sum(bool(pattern.search(code)) for pattern in _HEURISTIC_PATTERNS[language])
 
 
 def detect_language(code: str) -> str:
     """
     Detect the programming language from a code snippet.
 
-    Uses heuristics and Pygments as fallback.
+    Uses heuristics and Pygments as fallback, on a sample of long code.
 
     Args:
         code (str): Raw code snippet.
@@ -41,7 +88,7 @@ def detect_language(code: str) -> str:
     Returns:
         str: 'python', 'javascript', or 'unknown'
     """
-    code = code.strip()
+    code = _sample(code.strip())
     if not code:
         return "unknown"
 
@@ -55,7 +102,10 @@ def detect_language(code: str) -> str:
     if scores[best_match] >= 2:
         return best_match
 
-    # Fallback to Pygments if no clear winner
+    # Fallback to Pygments if no clear winner; it is slow to import, so only when needed
+    from pygments.lexers import guess_lexer
+    from pygments.util import ClassNotFound
+
     try:
         lexer = guess_lexer(code)
         name = lexer.name.lower()
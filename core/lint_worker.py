@@ -0,0 +1,184 @@
+"""
+Persistent linter processes that speak JSON lines over stdin/stdout.
+
+Starting an interpreter and importing pylint (or node and ESLint) costs far
+more than linting a snippet, so each linter runs in one long-lived worker and
+code is sent to it from memory, without temp files. Running this file starts
+the pylint worker.
+"""
+import atexit
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from collections import deque
+
+ESLINT_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eslint_worker.js")
+
+
+class LintWorker:
+    """
+    Client for one long-lived linter process.
+
+    Requests are serialized: one JSON object per line in, one per line out.
+    A worker that crashes or times out is killed and restarted on the next
+    request; one that exits before answering anything (e.g. the linter is not
+    installed) is disabled and every later request fails fast.
+    """
+
+    def __init__(self, name: str, command: list[str], cwd: str = None):
+        """
+        Args:
+            name (str): Name used in error messages.
+            command (list[str]): Command that starts the worker.
+            cwd (str): Working directory for the worker (linter config lookup).
+        """
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.disabled_reason = None
+        self._proc = None
+        self._answered = False
+        self._responses = None
+        self._stderr = deque(maxlen=20)
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            self.command, cwd=self.cwd,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", bufsize=1
+        )
+        self._answered = False
+        self._responses = queue.Queue()
+        self._stderr.clear()
+        threading.Thread(target=self._pump, args=(self._proc.stdout, self._responses.put), daemon=True).start()
+        threading.Thread(target=self._pump, args=(self._proc.stderr, self._stderr.append), daemon=True).start()
+
+    @staticmethod
+    def _pump(stream, sink):
+        for line in stream:
+            sink(line)
+        sink(None)
+
+    def request(self, payload: dict, timeout: float) -> dict:
+        """
+        Send one request and wait for its response.
+
+        Args:
+            payload (dict): JSON-serializable request.
+            timeout (float): Seconds to wait before killing the worker.
+
+        Returns:
+            dict: The worker's response.
+
+        Raises:
+            RuntimeError: If the worker is disabled or exits while handling the request.
+            TimeoutError: If no response arrives within `timeout`.
+        """
+        with self._lock:
+            if self.disabled_reason:
+                raise RuntimeError(self.disabled_reason)
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+
+            try:
+                self._proc.stdin.write(json.dumps(payload) + "\n")
+                self._proc.stdin.flush()
+                line = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                self._kill()
+                raise TimeoutError(f"{self.name} worker timed out after {timeout:.0f}s") from None
+            except OSError:
+                line = None
+
+            if line is None:
+                self._proc.wait()
+                detail = "".join(l for l in self._stderr if l).strip().splitlines()
+                reason = f"{self.name} worker exited: {detail[-1] if detail else 'no output'}"
+                if not self._answered:
+                    self.disabled_reason = reason
+                self._proc = None
+                raise RuntimeError(reason)
+
+            self._answered = True
+            return json.loads(line)
+
+    def _kill(self):
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+    def close(self):
+        """Stop the worker process."""
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.stdin.close()
+            try:
+                self._proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._kill()
+        self._proc = None
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def _get_worker(name: str, command: list[str], cwd: str = None) -> LintWorker:
+    with _workers_lock:
+        if name not in _workers:
+            _workers[name] = LintWorker(name, command, cwd)
+        return _workers[name]
+
+
+def get_pylint_worker() -> LintWorker:
+    """Return the process-wide pylint worker (started on first request)."""
+    return _get_worker("pylint", [sys.executable, os.path.abspath(__file__)])
+
+
+def get_eslint_worker() -> LintWorker:
+    """Return the process-wide ESLint worker (needs node; started on first request)."""
+    return _get_worker("eslint", ["node", ESLINT_WORKER_SCRIPT], cwd=os.getcwd())
+
+
+def serve_pylint():
+    """
+    Pylint worker loop: `{"code", "filename", "args"}` in, `{"output"}` or `{"error"}` out.
+
+    Code reaches pylint through `--from-stdin`, which reads `sys.stdin`, so the
+    protocol channel is kept aside and `sys.stdin` is swapped per request.
+    """
+    import io
+    from pylint.lint import Run
+    from pylint.reporters.text import TextReporter
+
+    requests_in = sys.stdin.buffer
+    responses_out = sys.stdout
+    # Anything pylint prints outside the reporter must not corrupt the protocol channel
+    sys.stdout = sys.stderr
+
+    for line in requests_in:
+        request = json.loads(line)
+        output = io.StringIO()
+        sys.stdin = io.TextIOWrapper(io.BytesIO(request["code"].encode("utf-8")), encoding="utf-8")
+        try:
+            Run(
+                ["--from-stdin", request.get("filename", "snippet.py"), *request.get("args", [])],
+                reporter=TextReporter(output),
+                exit=False
+            )
+            response = {"output": output.getvalue()}
+        except BaseException as e:  # pylint exits via SystemExit on bad options
+            response = {"error": f"{type(e).__name__}: {e}"}
+        responses_out.write(json.dumps(response) + "\n")
+        responses_out.flush()
+
+
+if __name__ == "__main__":
+    # Keep core/ (parser.py, cache.py, ...) from shadowing modules pylint imports
+    sys.path.pop(0)
+    serve_pylint()
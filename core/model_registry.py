@@ -0,0 +1,279 @@
+import gc
+import glob
+import os
+import threading
+import time
+from typing import Callable
+
+from utils.config import (
+    MODEL_PATHS,
+    SCHEDULER_MAX_BATCH_SIZE, SCHEDULER_MAX_QUEUE_DEPTH, SCHEDULER_MAX_WAIT_MS,
+    WORKER_POOL_SIZE, WORKER_THREADS,
+    DRAFT_MODEL_PATHS, ASSISTED_MIN_ACCEPT_RATE, ASSISTED_REPROBE_PROMPTS
+)
+from utils.logger import get_logger
+
+logger = get_logger("model_registry")
+
+WEIGHT_PATTERNS = ("*.safetensors", "*.bin", "*.onnx")
+
+
+def estimate_model_bytes(model_dir: str) -> int:
+    """Estimate a model's resident size from the weight files on disk."""
+    return sum(
+        os.path.getsize(path)
+        for pattern in WEIGHT_PATTERNS
+        for path in glob.glob(os.path.join(model_dir, pattern))
+    )
+
+
+def estimate_bundle_bytes(path: str) -> int:
+    """Estimate what loading a model path takes: its weights plus its draft model's, if it has one."""
+    model_name = next((name for name, p in MODEL_PATHS.items() if p == path), None)
+    draft_path = DRAFT_MODEL_PATHS.get(model_name)
+    draft_bytes = estimate_model_bytes(draft_path) if draft_path and os.path.isdir(draft_path) else 0
+    return estimate_model_bytes(path) + draft_bytes
+
+
+def _module_bytes(model) -> int:
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def loaded_model_bytes(result) -> int | None:
+    """
+    Return the parameter + buffer bytes held by a loader result, if its model is a torch module.
+
+    For a `load_model_bundle` result the scheduler's assisted-decoding draft model is included.
+    """
+    model = result[1] if isinstance(result, tuple) and len(result) > 1 else result
+    if not hasattr(model, "parameters"):
+        return None
+    total = _module_bytes(model)
+    if isinstance(result, tuple) and len(result) > 2:
+        draft = getattr(getattr(result[2], "backend", None), "draft_model", None)
+        if hasattr(draft, "parameters"):
+            total += _module_bytes(draft)
+    return total
+
+
+def build_scheduler(path: str, tokenizer, model):
+    """
+    Build the shared scheduler for a loaded model, with the backend the config selects.
+
+    A draft model next to the target enables assisted decoding, which decodes
+    one prompt at a time (scheduler batches included) while the draft pays off;
+    otherwise `WORKER_POOL_SIZE` > 0 on CPU shards batches over a worker pool. The pool
+    forks, so it is only created when the model was loaded on the main thread
+    (`ModelRegistry.load`, as the inference daemon does at startup).
+    """
+    import torch
+    from main import load_doc_model
+    from core.scheduler import InferenceScheduler
+    from core.worker_pool import InferenceWorkerPool
+    from core.speculative import AssistedDecoder
+
+    model_name = next((name for name, p in MODEL_PATHS.items() if p == path), None)
+    draft_path = DRAFT_MODEL_PATHS.get(model_name)
+    backend = None
+    draft_result = load_doc_model(draft_path) if draft_path and os.path.isdir(draft_path) else None
+    if draft_result is not None:
+        # Batch size 1 while drafting: worth it for latency, not for throughput-bound batches;
+        # the decoder falls back to batched plain decoding when the accept rate is low
+        backend = AssistedDecoder(
+            model, draft_result[1], tokenizer,
+            min_accept_rate=ASSISTED_MIN_ACCEPT_RATE,
+            reprobe_after=ASSISTED_REPROBE_PROMPTS
+        )
+        logger.info(f"{path}: assisted decoding with a draft model (one prompt at a time while drafting)")
+    elif WORKER_POOL_SIZE and not torch.cuda.is_available():
+        if threading.current_thread() is threading.main_thread():
+            backend = InferenceWorkerPool(model, tokenizer, num_workers=WORKER_POOL_SIZE, threads_per_worker=WORKER_THREADS)
+        else:
+            logger.warning(
+                f"{path} was loaded off the main thread; serving it without a worker pool "
+                f"(preload it in the inference daemon to use one)"
+            )
+    return InferenceScheduler(
+        model, tokenizer,
+        max_batch_size=SCHEDULER_MAX_BATCH_SIZE,
+        max_queue_depth=SCHEDULER_MAX_QUEUE_DEPTH,
+        max_wait_ms=SCHEDULER_MAX_WAIT_MS,
+        backend=backend
+    )
+
+
+def load_model_bundle(path: str):
+    """
+    Registry loader: load a model together with its scheduler, so eviction releases both.
+
+    The model stack is imported here rather than at module level.
+
+    Returns:
+        tuple | None: (tokenizer, model, scheduler), or None if the model failed to load.
+    """
+    from main import load_doc_model
+
+    result = load_doc_model(path)
+    if result is None:
+        return None
+    tokenizer, model = result
+    return tokenizer, model, build_scheduler(path, tokenizer, model)
+
+
+def close_model_bundle(bundle: tuple):
+    """Registry `on_evict` hook for `load_model_bundle` results."""
+    bundle[2].close()
+
+
+class _Entry:
+    def __init__(self, estimate: int):
+        self.state = "unloaded"
+        self.result = None
+        self.error = None
+        self.size = estimate
+        self.last_used = 0.0
+        self.ready = threading.Event()
+
+
+class ModelRegistry:
+    """
+    Process-wide model cache with a RAM budget and LRU eviction.
+
+    Models load on background threads, so callers can poll `state()` and show a
+    "warming up" message instead of blocking. When a new model does not fit in
+    the budget, the least-recently-used loaded models are evicted first.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], tuple | None],
+        budget_mb: int,
+        on_evict: Callable[[tuple], None] = None
+    ):
+        """
+        Args:
+            loader (Callable[[str], tuple | None]): Loads a model path, e.g. `main.load_doc_model`.
+                Returns None on failure.
+            budget_mb (int): Total size of loaded models to stay within.
+            on_evict (Callable[[tuple], None]): Called with a loader result after it is evicted.
+        """
+        self.loader = loader
+        self.budget = budget_mb * 1024 * 1024
+        self.on_evict = on_evict
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, path: str) -> _Entry:
+        if path not in self._entries:
+            self._entries[path] = _Entry(estimate_bundle_bytes(path))
+        return self._entries[path]
+
+    def state(self, path: str) -> str:
+        """Return "unloaded", "loading", "ready" or "failed" for a model path."""
+        with self._lock:
+            return self._entry(path).state
+
+    def error(self, path: str) -> str | None:
+        """Return why the last load of `path` failed, if it did."""
+        with self._lock:
+            return self._entry(path).error
+
+    def _claim(self, path: str) -> bool:
+        """Mark `path` as loading; False if it is already loaded or loading."""
+        with self._lock:
+            entry = self._entry(path)
+            if entry.state in ("loading", "ready"):
+                return False
+            entry.state, entry.error = "loading", None
+            entry.ready.clear()
+            return True
+
+    def preload(self, path: str):
+        """Start loading `path` in the background unless it is already loaded or loading."""
+        if not self._claim(path):
+            return
+        threading.Thread(target=self._load, args=(path,), name=f"preload-{os.path.basename(path)}", daemon=True).start()
+
+    def load(self, path: str):
+        """
+        Load `path` in the calling thread (e.g. the main thread, so the loader may fork workers).
+
+        Returns:
+            tuple | None: Loader result, or None if loading failed.
+        """
+        if self._claim(path):
+            self._load(path)
+        return self.get(path)
+
+    def get(self, path: str, timeout: float = None):
+        """
+        Return the loader result for `path`, loading it first if needed.
+
+        Args:
+            path (str): Model path.
+            timeout (float): Max seconds to wait for a load in progress.
+
+        Returns:
+            tuple | None: Loader result, or None if loading failed or timed out.
+        """
+        self.preload(path)
+        with self._lock:
+            entry = self._entry(path)
+        if not entry.ready.wait(timeout):
+            return None
+        with self._lock:
+            entry.last_used = time.monotonic()
+            return entry.result
+
+    def _load(self, path: str):
+        evicted = self._make_room(path)
+        for result in evicted:
+            if self.on_evict:
+                self.on_evict(result)
+        if evicted:
+            gc.collect()
+
+        start = time.perf_counter()
+        try:
+            result = self.loader(path)
+            error = None if result is not None else "loader returned no model"
+        except Exception as e:
+            result, error = None, str(e)
+
+        with self._lock:
+            entry = self._entry(path)
+            entry.result = result
+            entry.error = error
+            entry.state = "ready" if result is not None else "failed"
+            if result is not None:
+                entry.size = loaded_model_bytes(result) or entry.size
+            entry.last_used = time.monotonic()
+            entry.ready.set()
+
+        if result is not None:
+            logger.info(f"Loaded {path} in {time.perf_counter() - start:.1f}s ({entry.size / 2**20:.0f} MB)")
+        else:
+            logger.error(f"Failed to load {path}: {error}")
+
+    def _make_room(self, path: str) -> list:
+        """Evict least-recently-used ready models until `path` fits the budget."""
+        evicted = []
+        with self._lock:
+            needed = self._entry(path).size
+            in_use = lambda: sum(e.size for p, e in self._entries.items() if p != path and e.state in ("ready", "loading"))
+            candidates = sorted(
+                (e.last_used, p) for p, e in self._entries.items() if p != path and e.state == "ready"
+            )
+            for _, victim in candidates:
+                if in_use() + needed <= self.budget:
+                    break
+                entry = self._entries[victim]
+                evicted.append(entry.result)
+                entry.result, entry.state = None, "unloaded"
+                entry.ready.clear()
+                logger.info(f"Evicted {victim} to fit {path} in the {self.budget / 2**20:.0f} MB budget")
+
+            if in_use() + needed > self.budget:
+                logger.warning(f"Loading {path} exceeds the model memory budget")
+        return evicted
@@ -0,0 +1,80 @@
+import os
+
+from utils.logger import get_logger
+
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+logger = get_logger("onnx_backend")
+
+ONNX_PARTS = ("encoder_model", "decoder_model", "decoder_with_past_model")
+
+
+def onnx_export_dir(model_dir: str) -> str:
+    """Return the folder the ONNX export of `model_dir` is cached in (next to the model)."""
+    return model_dir.rstrip("/\\") + "-onnx"
+
+
+def _quantize_export(onnx_dir: str):
+    """Write dynamic int8 copies (`*_quantized.onnx`) of every exported graph."""
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    for part in ONNX_PARTS:
+        if os.path.exists(os.path.join(onnx_dir, f"{part}_quantized.onnx")):
+            continue
+        quantizer = ORTQuantizer.from_pretrained(onnx_dir, file_name=f"{part}.onnx")
+        quantizer.quantize(save_dir=onnx_dir, quantization_config=qconfig)
+
+
+def load_onnx_seq2seq(model_dir: str, quantize: bool = True, num_threads: int = None):
+    """
+    Load a Seq2Seq model (CodeT5p) through ONNX Runtime on CPU.
+
+    The first call exports the encoder, decoder and decoder-with-past graphs to
+    `<model_dir>-onnx`; later calls load the cached export directly. The returned
+    model exposes the usual `generate()` API, so `run_batch_generation` and
+    `stream_generation` work with it unchanged.
+
+    Args:
+        model_dir (str): Local Hugging Face model folder.
+        quantize (bool): Run the dynamic int8 versions of the graphs.
+        num_threads (int): Intra-op threads per session (default: ORT's choice).
+
+    Returns:
+        ORTModelForSeq2SeqLM: ONNX Runtime model.
+    """
+    if not ORT_AVAILABLE:
+        raise ImportError("ONNX backend requires `pip install optimum[onnxruntime]`.")
+
+    onnx_dir = onnx_export_dir(model_dir)
+    if not all(os.path.exists(os.path.join(onnx_dir, f"{p}.onnx")) for p in ONNX_PARTS):
+        logger.info(f"Exporting {model_dir} to ONNX at {onnx_dir} (one-time)")
+        exported = ORTModelForSeq2SeqLM.from_pretrained(model_dir, export=True, use_cache=True, local_files_only=True)
+        exported.save_pretrained(onnx_dir)
+        del exported
+
+    suffix = ""
+    if quantize:
+        _quantize_export(onnx_dir)
+        suffix = "_quantized"
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        onnx_dir,
+        encoder_file_name=f"encoder_model{suffix}.onnx",
+        decoder_file_name=f"decoder_model{suffix}.onnx",
+        decoder_with_past_file_name=f"decoder_with_past_model{suffix}.onnx",
+        provider="CPUExecutionProvider",
+        session_options=options,
+        use_cache=True
+    )
+    logger.info(f"Loaded ONNX Runtime model from {onnx_dir} ({'int8' if quantize else 'fp32'})")
+    return model
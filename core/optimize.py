@@ -1,5 +1,180 @@
+from threading import Thread
+from typing import Iterator
+
 import torch
-from transformers import PreTrainedModel, PreTrainedTokenizer
+from transformers import (
+    PreTrainedModel, PreTrainedTokenizer, TextIteratorStreamer,
+    StoppingCriteria, StoppingCriteriaList
+)
+
+# Markers that end a task's useful output. For docstrings the *closing* triple
+# quote ends generation; for summaries a blank line after some text does.
+STOP_MARKERS = {
+    "summary": ("\n\n", "###"),
+    "docstring": ('"""', "'''", "###"),
+}
+
+
+def find_stop(text: str, task: str) -> int | None:
+    """
+    Locate where a task's output should be cut.
+
+    Args:
+        - `text` (str): Generated text (prompt excluded).
+        - `task` (str): "summary" or "docstring"; other values never stop.
+
+    Returns:
+        - `int | None`: Index to truncate `text` at, or None if no stop marker was hit yet.
+    """
+    markers = STOP_MARKERS.get(task)
+    if not markers:
+        return None
+
+    body_start = len(text) - len(text.lstrip())
+    cuts = []
+    for marker in markers:
+        if marker.strip() in ('"""', "'''"):
+            # An opening quote is part of the docstring; stop after the matching closing one
+            search_from = body_start + len(marker) if text.startswith(marker, body_start) else body_start
+            idx = text.find(marker, search_from)
+            if idx != -1:
+                cuts.append(idx + len(marker) if search_from > body_start else idx)
+        else:
+            # Markers only count once some real text has been produced
+            idx = text.find(marker, body_start + 1)
+            if idx != -1 and text[body_start:idx].strip():
+                cuts.append(idx)
+    return min(cuts) if cuts else None
+
+
+def generated_offset(model: PreTrainedModel, input_ids: torch.LongTensor) -> int:
+    """
+    Return where newly generated tokens start in a `generate()` output row.
+
+    Decoder-only models return the (padded) prompt followed by the completion;
+    encoder-decoder models return only decoder tokens.
+
+    Args:
+        - `model` (PreTrainedModel): Model being generated with.
+        - `input_ids` (torch.LongTensor): Padded prompt ids passed to `generate()`.
+
+    Returns:
+        - `int`: Column index of the first generated token.
+    """
+    if getattr(model.config, "is_encoder_decoder", False):
+        return 0
+    return input_ids.shape[1]
+
+
+class TaskStoppingCriteria(StoppingCriteria):
+    """
+    Per-row stopping criterion that ends each sequence at its task's stop marker.
+
+    Finished rows are reported individually, so `generate()` pads them while the
+    remaining rows keep decoding and the batch ends as soon as every row is done.
+
+    Each step decodes only a short trailing window of every unfinished row: a
+    marker that just appeared ends in the newest token. Only rows whose window
+    contains a marker are decoded in full to apply `find_stop`'s rules, so the
+    cost per step does not grow with the output length.
+    """
+
+    # Window = longest marker + this many tokens (some tokens decode to nothing or to one character)
+    WINDOW_MARGIN = 8
+
+    def __init__(self, tokenizer: PreTrainedTokenizer, task: str, prompt_length: int):
+        """
+        Args:
+            tokenizer (PreTrainedTokenizer): Tokenizer used to decode partial outputs.
+            task (str): Task whose stop markers apply.
+            prompt_length (int): Number of leading ids in `input_ids` that are not generated text.
+        """
+        self.tokenizer = tokenizer
+        self.task = task
+        self.prompt_length = prompt_length
+        self.markers = STOP_MARKERS.get(task, ())
+        self.window = max((len(marker) for marker in self.markers), default=0) + self.WINDOW_MARGIN
+        self.done = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        if self.done is None or self.done.shape[0] != input_ids.shape[0]:
+            self.done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+        pending = (~self.done).nonzero().flatten().tolist()
+        if pending:
+            start = max(self.prompt_length, input_ids.shape[1] - self.window)
+            tails = self.tokenizer.batch_decode(input_ids[pending, start:], skip_special_tokens=True)
+            hits = [row for row, tail in zip(pending, tails) if any(marker in tail for marker in self.markers)]
+            if hits:
+                texts = self.tokenizer.batch_decode(input_ids[hits, self.prompt_length:], skip_special_tokens=True)
+                for row, text in zip(hits, texts):
+                    if find_stop(text, self.task) is not None:
+                        self.done[row] = True
+        return self.done.clone()
+
+
+def stopping_criteria_for(
+    model: PreTrainedModel,
+    tokenizer: PreTrainedTokenizer,
+    task: str,
+    input_ids: torch.LongTensor
+) -> StoppingCriteriaList | None:
+    """
+    Build the stopping criteria for a task, if it has stop markers.
+
+    Args:
+        - `model` (PreTrainedModel): Model being generated with.
+        - `tokenizer` (PreTrainedTokenizer): Corresponding tokenizer.
+        - `task` (str): Task name, or None.
+        - `input_ids` (torch.LongTensor): Padded prompt ids passed to `generate()`.
+
+    Returns:
+        - `StoppingCriteriaList | None`: Criteria to pass to `generate()`.
+    """
+    if task not in STOP_MARKERS:
+        return None
+    prompt_length = generated_offset(model, input_ids)
+    return StoppingCriteriaList([TaskStoppingCriteria(tokenizer, task, prompt_length)])
+
+
+def length_sorted_order(
+    tokenizer: PreTrainedTokenizer,
+    prompts: list[str],
+    max_length: int = 512
+) -> list[int]:
+    """
+    Order prompt indices by tokenized length so similar-length prompts share a batch.
+
+    Args:
+        - `tokenizer` (PreTrainedTokenizer): Tokenizer used for generation.
+        - `prompts` (list[str]): List of input prompts.
+        - `max_length` (int): Truncation length applied at generation time.
+
+    Returns:
+        - `list[int]`: Prompt indices sorted by (truncated) token count, longest first.
+    """
+    lengths = [
+        min(len(ids), max_length)
+        for ids in tokenizer(prompts, add_special_tokens=True)["input_ids"]
+    ]
+    # Longest first so an oversized batch fails early rather than at the end of a run
+    return sorted(range(len(prompts)), key=lambda i: -lengths[i])
+
+
+def decoding_kwargs(do_sample: bool) -> dict:
+    """
+    Build the `generate()` decoding arguments for sampled or greedy decoding.
+
+    Args:
+        - `do_sample` (bool): Nucleus sampling if True, deterministic greedy decoding otherwise.
+
+    Returns:
+        - `dict`: Keyword arguments for `model.generate`.
+    """
+    if do_sample:
+        return {"do_sample": True, "top_p": 0.95}
+    return {"do_sample": False, "num_beams": 1}
+
 
 def run_batch_generation(
     model: PreTrainedModel,
@@ -7,7 +182,10 @@ def run_batch_generation(
     prompts: list[str],
     max_tokens: int = 256,
     batch_size: int = 4,
-    device: str = None
+    device: str = None,
+    bucket_by_length: bool = False,
+    do_sample: bool = True,
+    task: str = None
 ) -> list[str]:
     """
     Run batched generation with AMP optimization.
@@ -19,17 +197,27 @@ def run_batch_generation(
         - `max_tokens` (int): Max new tokens to generate per output.
         - `batch_size` (int): Number of prompts processed per batch.
         - `device` (str): Optional device override (e.g. "cuda").
+        - `bucket_by_length` (bool): Group prompts of similar token length into the
+          same batch to minimise padding. Outputs are returned in input order.
+        - `do_sample` (bool): Sample with top-p; set False for reproducible greedy output.
+        - `task` (str): Optional task ("summary"/"docstring") whose stop markers end each row early.
 
     Returns:
-        - `list[str]`: Generated completions per prompt.
+        - `list[str]`: Generated completions per prompt (prompt text excluded).
     """
-    model.eval()
+    if not prompts:
+        return []
+
+    if hasattr(model, "eval"):  # ONNX Runtime models have no train/eval mode
+        model.eval()
     device = device or (model.device if hasattr(model, 'device') else ("cuda" if torch.cuda.is_available() else "cpu"))
     device_str = str(device)
-    all_outputs = []
+    order = length_sorted_order(tokenizer, prompts) if bucket_by_length else list(range(len(prompts)))
+    all_outputs = [None] * len(prompts)
 
-    for i in range(0, len(prompts), batch_size):
-        batch = prompts[i:i + batch_size]
+    for i in range(0, len(order), batch_size):
+        batch_ids = order[i:i + batch_size]
+        batch = [prompts[j] for j in batch_ids]
         inputs = tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=512)
         inputs = {k: v.to(device) for k, v in inputs.items()}
 
@@ -38,30 +226,100 @@ def run_batch_generation(
                 input_ids=inputs["input_ids"],
                 attention_mask=inputs.get("attention_mask"),
                 max_new_tokens=max_tokens,
-                do_sample=True,
-                top_p=0.95,
-                pad_token_id=tokenizer.eos_token_id
+                **decoding_kwargs(do_sample),
+                pad_token_id=tokenizer.eos_token_id,
+                stopping_criteria=stopping_criteria_for(model, tokenizer, task, inputs["input_ids"])
             )
 
-        decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
-        all_outputs.extend(decoded)
+        # Decode only the completion; the prompt echo of causal models is sliced off by position
+        new_tokens = outputs[:, generated_offset(model, inputs["input_ids"]):]
+        decoded = tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        for j, text in zip(batch_ids, decoded):
+            all_outputs[j] = text
 
     return all_outputs
 
-def clean_output(raw_outputs: list[str], prompts: list[str]) -> list[str]:
+def stream_generation(
+    model: PreTrainedModel,
+    tokenizer: PreTrainedTokenizer,
+    prompt: str,
+    max_tokens: int = 256,
+    device: str = None,
+    do_sample: bool = True,
+    task: str = None
+) -> Iterator[str]:
+    """
+    Generate a completion for a single prompt, yielding text as it is decoded.
+
+    Args:
+        - `model` (PreTrainedModel): Hugging Face model.
+        - `tokenizer` (PreTrainedTokenizer): Corresponding tokenizer.
+        - `prompt` (str): Input prompt.
+        - `max_tokens` (int): Max new tokens to generate.
+        - `device` (str): Optional device override (e.g. "cuda").
+        - `do_sample` (bool): Sample with top-p; set False for greedy decoding.
+        - `task` (str): Optional task whose stop markers end generation early.
+
+    Yields:
+        - `str`: Newly decoded text fragments (prompt excluded).
+    """
+    if hasattr(model, "eval"):  # ONNX Runtime models have no train/eval mode
+        model.eval()
+    device = device or (model.device if hasattr(model, 'device') else ("cuda" if torch.cuda.is_available() else "cpu"))
+    device_str = str(device)
+
+    inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=512)
+    inputs = {k: v.to(device) for k, v in inputs.items()}
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    errors = []
+
+    def _generate():
+        # Grad/autocast modes are thread-local, so they must be entered in the worker thread
+        try:
+            with torch.inference_mode(), torch.amp.autocast(device_type="cuda" if "cuda" in device_str else "cpu"):
+                model.generate(
+                    input_ids=inputs["input_ids"],
+                    attention_mask=inputs.get("attention_mask"),
+                    max_new_tokens=max_tokens,
+                    **decoding_kwargs(do_sample),
+                    pad_token_id=tokenizer.eos_token_id,
+                    stopping_criteria=stopping_criteria_for(model, tokenizer, task, inputs["input_ids"]),
+                    streamer=streamer
+                )
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    thread = Thread(target=_generate, daemon=True)
+    thread.start()
+    try:
+        for text in streamer:
+            if text:
+                yield text
+    finally:
+        # Also when the consumer stops early: the model is busy until generate returns
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def clean_output(raw_outputs: list[str], task: str = None) -> list[str]:
     """
-    Clean generated outputs by removing prompt echoes and standard prefixes.
+    Clean generated completions by cutting at the task's stop marker and removing standard prefixes.
 
     Args:
-        - `raw_outputs` (list[str]): Raw model outputs.
-        - `prompts` (list[str]): Original prompts.
+        - `raw_outputs` (list[str]): Decoded completions (prompt already excluded).
+        - `task` (str): Optional task; text past its stop marker is dropped.
 
     Returns:
         - `list[str]`: Cleaned output strings.
     """
     cleaned = []
-    for out, prompt in zip(raw_outputs, prompts):
-        text = out.replace(prompt, "").strip()
+    for text in raw_outputs:
+        cut = find_stop(text, task)
+        if cut is not None:
+            text = text[:cut]
+        text = text.strip()
         for intro in [
             "Summary:", "Docstring:",
             "Summarize this Python code:",
@@ -1,7 +1,91 @@
 import ast
+import functools
 import re
 from typing import List
 
+from core.chunker import block_chunks
+from core.js_scanner import scan_javascript
+
+
+class CodeBlock:
+    """
+    A top-level function or class: its name, 1-based line span and source text.
+
+    Classes also carry their header (the `class ...` line, up to and including
+    the `{` in JavaScript) and their methods as child blocks.
+    """
+
+    def __init__(self, name: str, start_line: int, end_line: int, text: str, header: str = "", children: list = None):
+        self.name = name
+        self.start_line = start_line
+        self.end_line = end_line
+        self.text = text
+        self.header = header
+        self.children = children or []
+
+    def __repr__(self):
+        return f"CodeBlock({self.name!r}, lines {self.start_line}-{self.end_line})"
+
+
+def parse_error_message(error: Exception) -> str:
+    """Format a failed `ast.parse` the way the quality tools report it."""
+    if isinstance(error, SyntaxError):
+        return f"[AST Parse Error] {error.msg} ({error.filename or '<unknown>'}, line {error.lineno})"
+    return f"[AST Parse Error] {error}"
+
+
+def line_offsets(code: str) -> List[int]:
+    """Return the character offset at which each line of `code` starts."""
+    return [0] + [m.end() for m in re.finditer("\n", code)]
+
+
+def python_blocks(tree: ast.Module, lines: List[str]) -> List[CodeBlock]:
+    """
+    Collect top-level function and class definitions from a parsed module.
+
+    Args:
+        tree (ast.Module): Parsed module.
+        lines (List[str]): Source lines of the module.
+
+    Returns:
+        List[CodeBlock]: Definitions in source order.
+    """
+    def block(node, children=None, header=""):
+        # For Python <3.8 fallback
+        end_line = getattr(node, "end_lineno", node.body[-1].lineno if hasattr(node, "body") and node.body else node.lineno)
+        return CodeBlock(node.name, node.lineno, end_line, "\n".join(lines[node.lineno - 1:end_line]), header, children)
+
+    blocks = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            blocks.append(block(node))
+        elif isinstance(node, ast.ClassDef):
+            methods = [block(n) for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            header = "\n".join(lines[node.lineno - 1:max(node.body[0].lineno - 1, node.lineno)])
+            blocks.append(block(node, methods, header))
+    return blocks
+
+
+def javascript_blocks(code: str) -> List[CodeBlock]:
+    """
+    Collect the outermost named functions, methods and classes from JavaScript code.
+
+    Args:
+        code (str): Raw JavaScript code.
+
+    Returns:
+        List[CodeBlock]: Blocks in source order; functions nested in a reported one are part of it.
+    """
+    blocks = []
+    for span in scan_javascript(code):
+        text = code[span.start:span.end]
+        if span.depth == 0:
+            header = text[:text.find("{") + 1] if span.kind == "class" else ""
+            blocks.append(CodeBlock(span.name, span.start_line, span.end_line, text, header))
+        elif span.depth == 1 and blocks and blocks[-1].header:
+            blocks[-1].children.append(CodeBlock(span.name, span.start_line, span.end_line, text))
+    return blocks
+
 
 def extract_python_code_blocks(code: str) -> List[str]:
     """
@@ -13,35 +97,47 @@ def extract_python_code_blocks(code: str) -> List[str]:
     Returns:
         List[str]: List of code blocks (functions or classes).
     """
-    blocks = []
     try:
-        tree = ast.parse(code)
-        lines = code.splitlines()
-        for node in tree.body:
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                start_line = node.lineno - 1
-                # For Python <3.8 fallback
-                end_line = getattr(node, "end_lineno", node.body[-1].lineno if hasattr(node, "body") and node.body else node.lineno)
-                snippet = "\n".join(lines[start_line:end_line])
-                blocks.append(snippet)
+        return [b.text for b in python_blocks(ast.parse(code), code.splitlines())]
     except Exception as e:
         print(f"[AST Parse Error] {e}")
-    return blocks
+        return []
 
 
 def extract_javascript_functions(code: str) -> List[str]:
     """
-    Extract basic function and arrow function blocks from JavaScript code.
+    Extract function, method and class blocks from JavaScript code.
 
     Args:
         code (str): Raw JavaScript code.
 
     Returns:
-        List[str]: Extracted function blocks (as strings).
+        List[str]: Extracted blocks (as strings).
     """
-    function_pattern = re.compile(r'(function\s+\w+\s*\([^)]*\)\s*{[^}]*})', re.DOTALL)
-    arrow_function_pattern = re.compile(r'(\w+\s*=\s*\([^)]*\)\s*=>\s*{[^}]*})', re.DOTALL)
-    return function_pattern.findall(code) + arrow_function_pattern.findall(code)
+    return [b.text for b in javascript_blocks(code)]
+
+
+@functools.lru_cache(maxsize=4096)
+def clean_code(code: str) -> str:
+    """
+    Remove comments and blank lines from a code snippet before it goes into a prompt.
+
+    Results are memoized, so the summary and docstring prompts (and their cache
+    keys) for the same snippet share one cleaning pass.
+
+    Args:
+        code (str): Raw code string.
+
+    Returns:
+        str: Cleaned code with comments and empty lines removed.
+    """
+    lines = code.splitlines()
+    cleaned = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith(('#', '//')):
+            cleaned.append(line)
+    return "\n".join(cleaned).strip()
 
 
 def clean_code_block(block: str) -> str:
@@ -77,6 +173,74 @@ def clean_code_block(block: str) -> str:
     return "\n".join(cleaned).strip()
 
 
+class ParsedSource:
+    """
+    One source file, parsed once and shared by the pipeline stages.
+
+    Holds the AST (Python), line offsets, the extracted top-level blocks and
+    the cleaned snippets that go into prompts. The quick quality tier walks
+    `tree` and the pylint gate reads `syntax_error` instead of parsing again.
+    Classes over the snippet token budget become one snippet per method.
+    """
+
+    def __init__(self, code: str, language: str, path: str = None, tokenizer=None):
+        """
+        Args:
+            code (str): Full source code.
+            language (str): "python" or "javascript".
+            path (str, optional): File path, for messages.
+            tokenizer (PreTrainedTokenizer, optional): Model tokenizer for the snippet
+                budget; estimated from the length without one.
+        """
+        self.code = code
+        self.language = language
+        self.path = path
+        self.lines = code.splitlines()
+        self.line_offsets = line_offsets(code)
+        self.tree = None
+        self.syntax_error = None
+
+        if language == "python":
+            try:
+                self.tree = ast.parse(code)
+            except (SyntaxError, ValueError) as e:
+                self.syntax_error = e
+            self.blocks = python_blocks(self.tree, self.lines) if self.tree is not None else []
+        elif language == "javascript":
+            self.blocks = javascript_blocks(code)
+        else:
+            self.blocks = []
+
+        # (qualified name, cleaned snippet) per function, method or class, in source order
+        self.units = []
+        seen = {}
+        for b in self.blocks:
+            for name, chunk in block_chunks(b, tokenizer=tokenizer):
+                if len(chunk.strip()) > 5:
+                    # Remaining clashes (e.g. a function defined twice) get a numbered name
+                    seen[name] = seen.get(name, 0) + 1
+                    self.units.append((name if seen[name] == 1 else f"{name}#{seen[name]}", clean_code_block(chunk)))
+
+        # Exact duplicates dropped, source order kept
+        self.snippets = list(dict.fromkeys(snippet for _, snippet in self.units))
+
+
+def parse_source(code: str, language: str, path: str = None, tokenizer=None) -> ParsedSource:
+    """
+    Parse a source file once for all pipeline stages.
+
+    Args:
+        code (str): Full source code.
+        language (str): "python" or "javascript".
+        path (str, optional): File path.
+        tokenizer (PreTrainedTokenizer, optional): Model tokenizer for the snippet budget.
+
+    Returns:
+        ParsedSource: Parsed file.
+    """
+    return ParsedSource(code, language, path, tokenizer)
+
+
 def extract_code_snippets(code: str, language: str) -> List[str]:
     """
     Extract and clean meaningful code blocks from source code based on language.
@@ -88,13 +252,4 @@ def extract_code_snippets(code: str, language: str) -> List[str]:
     Returns:
         List[str]: Cleaned function/class snippets.
     """
-    if language == "python":
-        blocks = extract_python_code_blocks(code)
-    elif language == "javascript":
-        blocks = extract_javascript_functions(code)
-    else:
-        return []
-
-    return list({
-        clean_code_block(b) for b in blocks if len(b.strip()) > 5
-    })
+    return parse_source(code, language).snippets
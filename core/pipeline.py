@@ -0,0 +1,121 @@
+from transformers import PreTrainedModel, PreTrainedTokenizer
+
+from core.language_detect import detect_language
+from core.parser import parse_source
+from core.code_quality import run_code_quality, has_blocking_issues
+from core.ast_metrics import quick_quality, is_syntax_error
+from core.summarizer import generate_summary
+from core.doc_generator import generate_docstring
+from core.cache import GenerationCache, LintCache
+from core.dedup import SnippetClusters, generate_clustered
+
+
+def generate_outputs(
+    snippets: list[str],
+    tokenizer: PreTrainedTokenizer,
+    model: PreTrainedModel,
+    model_tag: str,
+    runner=None,
+    deterministic: bool = True,
+    cache: GenerationCache = None,
+    batch_size: int = 4,
+    clusters: SnippetClusters = None
+) -> list[tuple[str, str]]:
+    """
+    Generate the summary and docstring of each snippet.
+
+    Args:
+        snippets (list[str]): Cleaned code snippets.
+        tokenizer, model, model_tag, runner, deterministic, cache, batch_size, clusters:
+            As for `analyze_code`.
+
+    Returns:
+        list[tuple[str, str]]: (summary, docstring) per snippet.
+    """
+    options = {"batch_size": batch_size, "runner": runner, "deterministic": deterministic, "cache": cache}
+
+    def generate(codes: list[str]) -> list[tuple[str, str]]:
+        return list(zip(
+            generate_summary(codes, tokenizer, model, model_tag, **options),
+            generate_docstring(codes, tokenizer, model, model_tag, **options)
+        ))
+
+    return generate_clustered(snippets, clusters, generate) if clusters is not None else generate(snippets)
+
+
+def analyze_code(
+    code: str,
+    tokenizer: PreTrainedTokenizer,
+    model: PreTrainedModel,
+    model_tag: str,
+    language: str = None,
+    runner=None,
+    deterministic: bool = True,
+    cache: GenerationCache = None,
+    lint_cache: LintCache = None,
+    stop_on_issues: bool = False,
+    full_lint: bool = True,
+    batch_size: int = 4,
+    clusters: SnippetClusters = None,
+    quality: dict = None
+) -> dict:
+    """
+    Run the summary, docstring and lint steps over one piece of source code.
+
+    Args:
+        code (str): Source code (a file or a pasted script).
+        tokenizer (PreTrainedTokenizer): Tokenizer for the selected model.
+        model (PreTrainedModel): The loaded transformer model.
+        model_tag (str): Model identifier string (e.g., "CodeT5p").
+        language (str): "python" or "javascript"; detected from the code if not given.
+        runner (optional): Shared runner with `generate(prompts, **kwargs)`, e.g. `InferenceScheduler`.
+        deterministic (bool): Greedy decoding, so results can be cached.
+        cache (GenerationCache): Optional persistent generation cache.
+        lint_cache (LintCache): Optional persistent lint result cache.
+        stop_on_issues (bool): Skip generation when the linter reports issues.
+        full_lint (bool): Run pylint/ESLint; otherwise only the built-in AST metrics
+            (JavaScript, which has no quick tier, is always fully linted).
+        batch_size (int): Prompts per forward pass when no runner is given.
+        clusters (SnippetClusters): Near-duplicate index shared across calls; snippets
+            close to one already generated reuse its summary and docstring.
+        quality (dict): Full linter result already computed for `code` as a whole file
+            (`run_code_quality_on_files`); used instead of linting it as a snippet.
+
+    Returns:
+        dict: `language`, `status` ("ok", "skipped" or "lint_failed"), `blocks`
+            (`code`, `summary`, `docstring` per block), `quality` (full linter result
+            or None) and `metrics` (quick-tier result or None).
+    """
+    language = language or detect_language(code)
+    if language == "unknown":
+        return {"language": language, "status": "skipped", "blocks": [], "quality": None, "metrics": None}
+
+    # Parsed once; the snippets, the quick tier and the pylint gate all share it
+    parsed = parse_source(code, language, tokenizer=tokenizer)
+    snippets = parsed.snippets
+    if not snippets:
+        snippets = [code.strip()]  # fallback to full script
+
+    metrics = quick_quality(code, language, parsed)
+    if stop_on_issues and metrics is not None and is_syntax_error(metrics):
+        return {"language": language, "status": "lint_failed", "blocks": [], "quality": None, "metrics": metrics}
+
+    quality_result = quality
+    if quality_result is None and (full_lint or metrics is None):
+        quality_result = run_code_quality(code, language, cache=lint_cache, parsed=parsed)
+    if stop_on_issues and quality_result is not None and has_blocking_issues(quality_result):
+        return {"language": language, "status": "lint_failed", "blocks": [], "quality": quality_result, "metrics": metrics}
+
+    outputs = generate_outputs(
+        snippets, tokenizer, model, model_tag,
+        runner=runner, deterministic=deterministic, cache=cache, batch_size=batch_size, clusters=clusters
+    )
+    summaries = [summary for summary, _ in outputs]
+    docstrings = [docstring for _, docstring in outputs]
+
+    blocks = [
+        {"code": snippet, "summary": summary, "docstring": docstring}
+        for snippet, summary, docstring in zip(snippets, summaries, docstrings)
+    ]
+    return {"language": language, "status": "ok", "blocks": blocks, "quality": quality_result, "metrics": metrics}
+
@@ -0,0 +1,111 @@
+import copy
+import os
+import sys
+import time
+
+import torch
+from transformers import PreTrainedModel, PreTrainedTokenizer
+
+from utils.logger import get_logger
+
+try:
+    from torchao.quantization import quantize_, int8_weight_only, int4_weight_only
+    TORCHAO_AVAILABLE = True
+except ImportError:
+    TORCHAO_AVAILABLE = False
+
+logger = get_logger("quantize")
+
+CPU_QUANTIZATION_MODES = ("dynamic-int8", "int8-weight-only", "int4-weight-only")
+SANITY_PROMPT = "def add(a, b):\n    return a + b"
+
+
+def rss_mb() -> float:
+    """
+    Return the current resident memory of this process in MB.
+
+    Falls back to the peak RSS where /proc is not available, and 0 on Windows.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def quantize_for_cpu(model: PreTrainedModel, mode: str, inplace: bool = True) -> PreTrainedModel:
+    """
+    Quantize a float32 model's Linear layers for CPU inference.
+
+    Args:
+        model (PreTrainedModel): Float model loaded on CPU.
+        mode (str): One of `CPU_QUANTIZATION_MODES`.
+            - "dynamic-int8": int8 weights, activations quantized per batch (torch.ao).
+            - "int8-weight-only" / "int4-weight-only": weight-only kernels (needs torchao).
+        inplace (bool): Modify `model` rather than a copy. Use False to keep the float model.
+
+    Returns:
+        PreTrainedModel: The quantized model.
+    """
+    if mode not in CPU_QUANTIZATION_MODES:
+        raise ValueError(f"Unknown CPU quantization mode '{mode}'. Choose from {CPU_QUANTIZATION_MODES}.")
+
+    if mode != "dynamic-int8" and not TORCHAO_AVAILABLE:
+        logger.warning(f"torchao is not installed; falling back from '{mode}' to 'dynamic-int8'.")
+        mode = "dynamic-int8"
+
+    if mode == "dynamic-int8":
+        return torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=inplace
+        )
+
+    if not inplace:
+        model = copy.deepcopy(model)
+    quantize_(model, int8_weight_only() if mode == "int8-weight-only" else int4_weight_only())
+    return model
+
+
+@torch.inference_mode()
+def compare_models(
+    tokenizer: PreTrainedTokenizer,
+    reference: PreTrainedModel,
+    candidate: PreTrainedModel,
+    prompt: str = SANITY_PROMPT,
+    max_new_tokens: int = 16
+) -> dict:
+    """
+    Greedy-decode one prompt with both models and compare tokens and latency.
+
+    Args:
+        tokenizer (PreTrainedTokenizer): Shared tokenizer.
+        reference (PreTrainedModel): Float model.
+        candidate (PreTrainedModel): Quantized model.
+        prompt (str): Prompt to decode.
+        max_new_tokens (int): Tokens to generate per model.
+
+    Returns:
+        dict: `token_agreement` (0-1), `reference_s`, `candidate_s`.
+    """
+    inputs = tokenizer(prompt, return_tensors="pt")
+    results = {}
+    for name, model in (("reference", reference), ("candidate", candidate)):
+        start = time.perf_counter()
+        output = model.generate(
+            **inputs, max_new_tokens=max_new_tokens, do_sample=False,
+            pad_token_id=tokenizer.eos_token_id
+        )
+        results[f"{name}_s"] = time.perf_counter() - start
+        results[name] = output[0].tolist()
+
+    ref, cand = results.pop("reference"), results.pop("candidate")
+    matches = sum(a == b for a, b in zip(ref, cand))
+    results["token_agreement"] = matches / max(len(ref), len(cand), 1)
+    return results
@@ -0,0 +1,262 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Iterator
+
+from transformers import PreTrainedModel, PreTrainedTokenizer
+
+from core.optimize import run_batch_generation, stream_generation
+from utils.logger import get_logger
+
+logger = get_logger("scheduler")
+
+
+class SchedulerBusyError(RuntimeError):
+    """Raised when the scheduler queue is already at its maximum depth."""
+
+
+class SchedulerClosedError(RuntimeError):
+    """
+    Raised when the scheduler was closed, e.g. its model was evicted from the
+    registry; get the model from the registry again and retry.
+    """
+
+
+class _Request:
+    """A single caller's prompts plus the future its outputs are delivered to."""
+
+    def __init__(self, prompts: list[str], gen_kwargs: dict):
+        self.prompts = prompts
+        self.gen_kwargs = gen_kwargs
+        self.future = Future()
+
+    @property
+    def group_key(self) -> tuple:
+        # Only requests with identical generation settings can share a forward pass
+        return tuple(sorted(self.gen_kwargs.items()))
+
+
+class InferenceScheduler:
+    """
+    Process-wide batching front-end for `run_batch_generation`.
+
+    Requests submitted from any thread (e.g. concurrent Streamlit sessions) are
+    queued, merged into shared batches by a single worker thread, and the outputs
+    are routed back to each caller in order. Only one `model.generate` runs at a
+    time, so sessions no longer compete for the same intra-op threads; streamed
+    single-prompt generation (`stream`) takes the same model lock.
+    """
+
+    def __init__(
+        self,
+        model: PreTrainedModel,
+        tokenizer: PreTrainedTokenizer,
+        max_batch_size: int = 8,
+        max_queue_depth: int = 64,
+        max_wait_ms: int = 20,
+        backend=None
+    ):
+        """
+        Args:
+            model (PreTrainedModel): Loaded model shared by all callers.
+            tokenizer (PreTrainedTokenizer): Matching tokenizer.
+            max_batch_size (int): Max prompts merged into one forward pass.
+            max_queue_depth (int): Max pending requests before new ones are rejected.
+            max_wait_ms (int): How long to wait for more requests before running a batch.
+            backend (optional): Object with `generate(prompts, **kwargs)` that runs merged
+                batches instead of `run_batch_generation`, e.g. `InferenceWorkerPool`
+                or `AssistedDecoder`.
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.backend = backend
+        self._queue = queue.Queue(maxsize=max_queue_depth)
+        # Held by every model.generate call: batched passes and streams
+        self._model_lock = threading.Lock()
+        self._closed = threading.Event()
+        # Makes "not closed, so enqueue" atomic with respect to `close`
+        self._submit_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompts: list[str], **gen_kwargs) -> Future:
+        """
+        Queue prompts for generation without blocking.
+
+        Args:
+            prompts (list[str]): Prompts to generate completions for.
+            **gen_kwargs: Extra keyword arguments for `run_batch_generation` (e.g. `max_tokens`).
+
+        Returns:
+            Future: Resolves to the list of completions, in prompt order.
+
+        Raises:
+            SchedulerBusyError: If the queue is full.
+            SchedulerClosedError: If the scheduler was closed.
+        """
+        request = _Request(list(prompts), gen_kwargs)
+        with self._submit_lock:
+            if self._closed.is_set():
+                raise SchedulerClosedError("InferenceScheduler is closed.")
+            if not request.prompts:
+                request.future.set_result([])
+                return request.future
+            try:
+                self._queue.put_nowait(request)
+            except queue.Full:
+                raise SchedulerBusyError(
+                    f"Inference queue is full ({self._queue.maxsize} pending requests)."
+                ) from None
+        return request.future
+
+    def generate(self, prompts: list[str], timeout: float = None, **gen_kwargs) -> list[str]:
+        """
+        Queue prompts and block until their completions are ready.
+
+        Args:
+            prompts (list[str]): Prompts to generate completions for.
+            timeout (float): Optional number of seconds to wait for the result.
+            **gen_kwargs: Extra keyword arguments for `run_batch_generation`.
+
+        Returns:
+            list[str]: Generated completions per prompt.
+        """
+        return self.submit(prompts, **gen_kwargs).result(timeout=timeout)
+
+    @property
+    def closed(self) -> bool:
+        """Whether `close` was called (e.g. the model was evicted); new requests then fail."""
+        return self._closed.is_set()
+
+    @property
+    def can_stream(self) -> bool:
+        """Whether `stream` is available; worker pools and assisted decoding only generate in batches."""
+        return self.backend is None
+
+    def stream(self, prompt: str, **gen_kwargs) -> Iterator[str]:
+        """
+        Generate one prompt with token streaming, never at the same time as a batched pass.
+
+        The model lock is held until the stream ends or is abandoned, so queued
+        batches wait for it.
+
+        Args:
+            prompt (str): Input prompt.
+            **gen_kwargs: Keyword arguments for `stream_generation` (e.g. `max_tokens`, `task`).
+
+        Yields:
+            str: Newly decoded text fragments.
+        """
+        if self._closed.is_set():
+            raise SchedulerClosedError("InferenceScheduler is closed.")
+        if not self.can_stream:
+            raise RuntimeError("Streaming is not available with a generation backend; use generate().")
+        with self._model_lock:
+            yield from stream_generation(self.model, self.tokenizer, prompt, **gen_kwargs)
+
+    def pending(self) -> int:
+        """Return the number of requests waiting to be scheduled."""
+        return self._queue.qsize()
+
+    def close(self):
+        """
+        Stop the worker thread once the requests already queued have been served, then the backend.
+
+        Requests still queued after the worker has stopped fail with `SchedulerClosedError`,
+        so no caller waits forever.
+        """
+        with self._submit_lock:
+            self._closed.set()
+        self._worker.join()
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            request.future.set_exception(SchedulerClosedError("InferenceScheduler was closed before serving the request."))
+        if hasattr(self.backend, "close"):
+            self.backend.close()
+
+    def _collect(self) -> list[_Request]:
+        """Block for one request, then gather more until the batch fills or the wait window ends."""
+        while True:
+            try:
+                requests = [self._queue.get(timeout=0.5)]
+                break
+            except queue.Empty:
+                if self._closed.is_set():
+                    return []
+
+        num_prompts = len(requests[0].prompts)
+        deadline = time.monotonic() + self.max_wait
+        while num_prompts < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            requests.append(request)
+            num_prompts += len(request.prompts)
+        return requests
+
+    def _run(self):
+        while not (self._closed.is_set() and self._queue.empty()):
+            requests = self._collect()
+            if not requests:
+                continue
+
+            groups = {}
+            for request in requests:
+                try:
+                    groups.setdefault(request.group_key, []).append(request)
+                except Exception as e:
+                    # e.g. unhashable settings: fail this request, keep serving the others
+                    logger.error(f"Rejected request with invalid generation settings: {e}")
+                    request.future.set_exception(e)
+
+            for members in groups.values():
+                try:
+                    self._serve(members)
+                except Exception as e:
+                    # The worker thread must survive any failure, or every later request hangs
+                    logger.exception("Scheduler batch step failed")
+                    for request in members:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+
+    def _serve(self, members: list[_Request]):
+        """Run one merged generation for requests that share generation settings."""
+        prompts = [p for request in members for p in request.prompts]
+        start = time.perf_counter()
+        try:
+            with self._model_lock:
+                if self.backend is not None:
+                    outputs = self.backend.generate(prompts, **members[0].gen_kwargs)
+                else:
+                    outputs = run_batch_generation(
+                        model=self.model,
+                        tokenizer=self.tokenizer,
+                        prompts=prompts,
+                        batch_size=self.max_batch_size,
+                        bucket_by_length=True,
+                        **members[0].gen_kwargs
+                    )
+        except Exception as e:
+            logger.error(f"Batched generation failed for {len(members)} request(s): {e}")
+            for request in members:
+                request.future.set_exception(e)
+            return
+
+        logger.info(
+            f"Served {len(members)} request(s) / {len(prompts)} prompt(s) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        offset = 0
+        for request in members:
+            request.future.set_result(outputs[offset:offset + len(request.prompts)])
+            offset += len(request.prompts)
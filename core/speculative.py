@@ -0,0 +1,172 @@
+from collections import deque
+
+import torch
+from transformers import PreTrainedModel, PreTrainedTokenizer
+
+from core.optimize import run_batch_generation, stopping_criteria_for, generated_offset
+from utils.logger import get_logger
+
+logger = get_logger("speculative")
+
+
+class AssistedDecoder:
+    """
+    Greedy assisted (speculative) decoding with a small draft model.
+
+    The draft proposes several tokens per step and the target model verifies them
+    in a single forward pass, so greedy output is identical to plain decoding of
+    the target while most steps cost one cheap draft pass per token. The draft
+    must share the target's tokenizer.
+
+    Acceptance is tracked over a sliding window; when it drops below
+    `min_accept_rate` the decoder falls back to plain batched decoding, where
+    the draft would only add overhead. After `reprobe_after` greedy prompts on
+    the plain path the draft is tried again with a fresh window, since the
+    workload may have changed.
+
+    Assisted generation handles one sequence at a time, so while it is enabled
+    prompts are decoded one by one even when they arrive in a batch.
+    """
+
+    def __init__(
+        self,
+        model: PreTrainedModel,
+        draft_model: PreTrainedModel,
+        tokenizer: PreTrainedTokenizer,
+        min_accept_rate: float = 0.4,
+        window: int = 16,
+        batch_size: int = 4,
+        reprobe_after: int = 64
+    ):
+        """
+        Args:
+            model (PreTrainedModel): Target model (e.g. DeepSeek-1.3B).
+            draft_model (PreTrainedModel): Small draft model with the same vocabulary.
+            tokenizer (PreTrainedTokenizer): Shared tokenizer.
+            min_accept_rate (float): Fallback threshold for the windowed accept rate.
+            window (int): Number of recent prompts the accept rate is computed over.
+            batch_size (int): Batch size for the plain-decoding fallback.
+            reprobe_after (int): Greedy prompts decoded plainly before the draft is tried again.
+        """
+        self.model = model
+        self.draft_model = draft_model
+        self.tokenizer = tokenizer
+        self.min_accept_rate = min_accept_rate
+        self.batch_size = batch_size
+        self.reprobe_after = reprobe_after
+        self.enabled = True
+        self._history = deque(maxlen=window)
+        # Greedy prompts decoded plainly since drafting was disabled
+        self._plain_prompts = 0
+
+    @property
+    def accept_rate(self) -> float | None:
+        """Share of draft tokens the target accepted over the recent window."""
+        proposed = sum(p for _, p in self._history)
+        if not proposed:
+            return None
+        return sum(a for a, _ in self._history) / proposed
+
+    def generate(
+        self,
+        prompts: list[str],
+        max_tokens: int = 128,
+        do_sample: bool = False,
+        task: str = None,
+        **gen_kwargs
+    ) -> list[str]:
+        """
+        Generate completions, using the draft model while it pays off.
+
+        Sampled decoding always takes the plain path, since only greedy assisted
+        output is guaranteed to match the target model.
+
+        Args:
+            prompts (list[str]): Prompts to generate completions for.
+            max_tokens (int): Max new tokens per completion.
+            do_sample (bool): Sample instead of greedy decoding.
+            task (str): Optional task whose stop markers end generation early.
+            **gen_kwargs: Extra keyword arguments for the plain path.
+
+        Returns:
+            list[str]: Generated completions per prompt.
+        """
+        if not do_sample and not self.enabled and self._plain_prompts >= self.reprobe_after:
+            self.enabled, self._plain_prompts = True, 0
+            self._history.clear()
+            logger.info(f"Trying assisted decoding again after {self.reprobe_after} prompts of plain decoding")
+
+        outputs = []
+        for i, prompt in enumerate(prompts):
+            if do_sample or not self.enabled:
+                if not do_sample:
+                    self._plain_prompts += len(prompts) - i
+                outputs.extend(run_batch_generation(
+                    model=self.model,
+                    tokenizer=self.tokenizer,
+                    prompts=prompts[i:],
+                    max_tokens=max_tokens,
+                    batch_size=self.batch_size,
+                    bucket_by_length=True,
+                    do_sample=do_sample,
+                    task=task,
+                    **gen_kwargs
+                ))
+                break
+            outputs.append(self._assisted(prompt, max_tokens, task))
+        return outputs
+
+    @torch.inference_mode()
+    def _assisted(self, prompt: str, max_tokens: int, task: str) -> str:
+        # Hugging Face assisted generation handles a single sequence at a time
+        inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=512)
+        inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+
+        calls = {"target": 0, "draft": 0}
+
+        def counter(name):
+            def hook(*_):
+                calls[name] += 1
+            return hook
+
+        hooks = [
+            self.model.register_forward_hook(counter("target")),
+            self.draft_model.register_forward_hook(counter("draft")),
+        ]
+        try:
+            output = self.model.generate(
+                **inputs,
+                assistant_model=self.draft_model,
+                max_new_tokens=max_tokens,
+                do_sample=False,
+                pad_token_id=self.tokenizer.eos_token_id,
+                stopping_criteria=stopping_criteria_for(self.model, self.tokenizer, task, inputs["input_ids"])
+            )
+        finally:
+            for hook in hooks:
+                hook.remove()
+
+        new_tokens = output[0, generated_offset(self.model, inputs["input_ids"]):]
+        self._record(len(new_tokens), calls["target"], calls["draft"])
+        return self.tokenizer.decode(new_tokens, skip_special_tokens=True)
+
+    def _record(self, new_tokens: int, target_calls: int, draft_calls: int):
+        """Update the accept-rate window and disable drafting if it stops paying off."""
+        # Every target pass yields its accepted draft tokens plus one token of its own
+        accepted = max(0, new_tokens - target_calls)
+        self._history.append((accepted, draft_calls))
+
+        rate = self.accept_rate
+        if rate is None:
+            return
+        logger.info(
+            f"Assisted decoding: {new_tokens} tokens in {target_calls} target passes, "
+            f"accept rate {rate:.0%} (last {len(self._history)} prompts)"
+        )
+        # A handful of prompts is enough to tell; waiting for a full window wastes draft passes
+        if len(self._history) >= min(4, self._history.maxlen) and rate < self.min_accept_rate:
+            self.enabled = False
+            logger.warning(
+                f"Accept rate {rate:.0%} is below {self.min_accept_rate:.0%}; "
+                "falling back to plain decoding."
+            )
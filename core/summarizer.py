@@ -1,25 +1,10 @@
-import torch
 from transformers import PreTrainedTokenizer, PreTrainedModel
-from core.optimize import run_batch_generation, clean_output
-
-
-def clean_code(code: str) -> str:
-    """
-    Remove comments and blank lines from a code snippet.
-
-    Args:
-        code (str): Raw code string.
-
-    Returns:
-        str: Cleaned code with comments and empty lines removed.
-    """
-    lines = code.splitlines()
-    cleaned = []
-    for line in lines:
-        line = line.strip()
-        if line and not line.startswith(('#', '//')):
-            cleaned.append(line)
-    return "\n".join(cleaned).strip()
+from typing import Iterator
+from core.optimize import run_batch_generation, stream_generation, clean_output, STOP_MARKERS
+from core.cache import GenerationCache
+from core.parser import clean_code
+from core.chunker import pack_snippets, split_packed_output
+from utils.config import PACK_MAX_SNIPPETS, PACKED_SUMMARY_TOKENS_PER_SNIPPET
 
 
 def build_prompt(code: str, model_name: str) -> str:
@@ -40,12 +25,52 @@ def build_prompt(code: str, model_name: str) -> str:
         return f"### Code:\n{code}\n\n### Summary:"
 
 
+def build_packed_prompt(codes: list[str], model_name: str) -> str:
+    """
+    Build one prompt that asks for a numbered one-line summary per snippet.
+
+    Args:
+        codes (list[str]): Small code snippets.
+        model_name (str): One of `"CodeT5p"` or `"DeepSeek-1.3B"`.
+
+    Returns:
+        str: Prompt ending in `[1]`, so the completion starts with the first summary.
+    """
+    numbered = "\n".join(f"[{i}]\n{clean_code(code)}" for i, code in enumerate(codes, 1))
+    if "codet5p" in model_name.lower():
+        return (
+            f"Summarize each of these {len(codes)} Python code snippets in one line, "
+            f"numbered [1] to [{len(codes)}]:\n{numbered}\n\nSummaries:\n[1]"
+        )
+    return f"### Code:\n{numbered}\n\n### Summaries (one line each, numbered [1] to [{len(codes)}]):\n[1]"
+
+
+def cache_key(code: str, model_tag: str, deterministic: bool) -> str:
+    """
+    Build the generation-cache key for one snippet's summary.
+
+    Args:
+        code (str): Raw code snippet.
+        model_tag (str): Model identifier string.
+        deterministic (bool): Whether greedy decoding is used.
+
+    Returns:
+        str: Cache key.
+    """
+    params = {"max_tokens": 128, "do_sample": not deterministic, "stop": STOP_MARKERS["summary"]}
+    return GenerationCache.make_key(model_tag, "summary", clean_code(code), params)
+
+
 def generate_summary(
     code_snippets: list[str],
     tokenizer: PreTrainedTokenizer,
     model: PreTrainedModel,
     model_tag: str = "CodeT5p",
-    batch_size: int = 4
+    batch_size: int = 4,
+    bucket_by_length: bool = True,
+    runner=None,
+    deterministic: bool = False,
+    cache: GenerationCache = None
 ) -> list[str]:
     """
     Generate summaries for a list of code snippets using a transformer model.
@@ -56,16 +81,105 @@ def generate_summary(
         model (PreTrainedModel): The loaded transformer model.
         model_tag (str): Model identifier string (e.g., "CodeT5p").
         batch_size (int): Number of prompts to batch per forward pass.
+        bucket_by_length (bool): Batch snippets of similar length together (order is preserved).
+        runner (InferenceScheduler, optional): Shared scheduler to route generation through.
+        deterministic (bool): Use greedy decoding so outputs are reproducible.
+        cache (GenerationCache, optional): Cache consulted before calling the model.
 
     Returns:
         list[str]: Cleaned natural language summaries for each snippet.
+
+    Tiny snippets share numbered prompts (see `core.chunker.pack_snippets`);
+    a pack whose output does not split back cleanly is summarized snippet by snippet.
+    A summary taken from a pack depends on its neighbours, so it is not cached.
     """
-    prompts = [build_prompt(code, model_tag) for code in code_snippets]
-    raw_outputs = run_batch_generation(
-        model=model,
-        tokenizer=tokenizer,
-        prompts=prompts,
-        max_tokens=128,
-        batch_size=batch_size
-    )
-    return clean_output(raw_outputs, prompts)
+    packed = set()
+
+    def _run(prompts: list[str], max_tokens: int) -> list[str]:
+        if not prompts:
+            return []
+        if runner is not None:
+            raw = runner.generate(prompts, max_tokens=max_tokens, do_sample=not deterministic, task="summary")
+        else:
+            raw = run_batch_generation(
+                model=model,
+                tokenizer=tokenizer,
+                prompts=prompts,
+                max_tokens=max_tokens,
+                batch_size=batch_size,
+                bucket_by_length=bucket_by_length,
+                do_sample=not deterministic,
+                task="summary"
+            )
+        return clean_output(raw, task="summary")
+
+    def _generate(codes: list[str]) -> list[str]:
+        groups = pack_snippets(codes, tokenizer)
+        packs = [g for g in groups if len(g) > 1]
+        singles = [g[0] for g in groups if len(g) == 1]
+        outputs = [None] * len(codes)
+
+        packed_prompts = [build_packed_prompt([codes[i] for i in g], model_tag) for g in packs]
+        for group, text in zip(packs, _run(packed_prompts, PACKED_SUMMARY_TOKENS_PER_SNIPPET * PACK_MAX_SNIPPETS)):
+            parts = split_packed_output(text, len(group))
+            if parts is None:
+                singles.extend(group)
+                continue
+            for i, part in zip(group, parts):
+                outputs[i] = part
+                packed.add(codes[i])
+
+        for i, text in zip(singles, _run([build_prompt(codes[i], model_tag) for i in singles], 128)):
+            outputs[i] = text
+        return outputs
+
+    codes = [clean_code(code) for code in code_snippets]
+    if cache is None:
+        return _generate(codes)
+
+    keys = [cache_key(code, model_tag, deterministic) for code in code_snippets]
+    return cache.resolve(keys, codes, _generate, cacheable=lambda code: code not in packed)
+
+
+def stream_summary(
+    code_snippets: list[str],
+    tokenizer: PreTrainedTokenizer,
+    model: PreTrainedModel,
+    model_tag: str = "CodeT5p",
+    deterministic: bool = False,
+    cache: GenerationCache = None,
+    runner=None
+) -> Iterator[tuple[int, str]]:
+    """
+    Stream summaries snippet by snippet as tokens are decoded.
+
+    Args:
+        code_snippets (list[str]): Code blocks to process, in display order.
+        tokenizer (PreTrainedTokenizer): Tokenizer for the selected model.
+        model (PreTrainedModel): The loaded transformer model.
+        model_tag (str): Model identifier string for prompt selection.
+        deterministic (bool): Use greedy decoding so outputs are reproducible.
+        cache (GenerationCache, optional): Cached outputs are yielded at once; new ones are stored.
+        runner (InferenceScheduler, optional): Shared scheduler; streaming then runs under its
+            model lock instead of alongside its batched forward passes.
+
+    Yields:
+        tuple[int, str]: Snippet index and the cleaned text generated so far for it.
+    """
+    for i, code in enumerate(code_snippets):
+        key = cache_key(code, model_tag, deterministic) if cache is not None else None
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            yield i, cached
+            continue
+
+        prompt = build_prompt(code, model_tag)
+        text = ""
+        options = {"max_tokens": 128, "do_sample": not deterministic, "task": "summary"}
+        chunks = runner.stream(prompt, **options) if runner is not None else \
+            stream_generation(model, tokenizer, prompt, **options)
+        for chunk in chunks:
+            text += chunk
+            yield i, clean_output([text], task="summary")[0]
+        if key:
+            cache.put(key, clean_output([text], task="summary")[0])
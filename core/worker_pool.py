@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import queue
+import threading
+
+import torch
+from transformers import PreTrainedModel, PreTrainedTokenizer
+
+from core.optimize import run_batch_generation, length_sorted_order
+from utils.logger import get_logger
+
+logger = get_logger("worker_pool")
+
+# Set in each worker process by `_init_worker`; the parent never holds model references here
+_WORKER = {}
+
+
+def available_cores() -> list[int]:
+    """Return the CPU ids this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _init_worker(core_slices, model, tokenizer, batch_size: int):
+    """
+    Set up a worker: keep its pool's model and pin it to its own slice of cores.
+
+    The model arrives through the fork (the pool's initializer arguments are
+    inherited, not pickled), so its storage stays shared copy-on-write.
+    """
+    _WORKER.update(model=model, tokenizer=tokenizer, batch_size=batch_size)
+    try:
+        cores = core_slices.get(timeout=1)
+    except queue.Empty:
+        # A replacement for a crashed worker: no dedicated slice left
+        cores = available_cores()
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+
+
+def _worker_generate(prompts: list[str], gen_kwargs: dict) -> list[str]:
+    return run_batch_generation(
+        model=_WORKER["model"],
+        tokenizer=_WORKER["tokenizer"],
+        prompts=prompts,
+        batch_size=_WORKER["batch_size"],
+        bucket_by_length=True,
+        **gen_kwargs
+    )
+
+
+class InferenceWorkerPool:
+    """
+    Multi-process CPU inference with model weights shared between workers.
+
+    Workers are forked from the process that loaded the model, so parameter
+    storage is shared copy-on-write instead of being loaded N times. Each worker
+    is pinned to a disjoint slice of cores with `torch.set_num_threads` sized to
+    that slice, which scales far better for small batches than one process
+    using every core for intra-op threading.
+
+    Create the pool from the main thread, right after loading the model and
+    before running any inference or starting other threads: forking after
+    OpenMP threads have started can hang the children.
+    """
+
+    def __init__(
+        self,
+        model: PreTrainedModel,
+        tokenizer: PreTrainedTokenizer,
+        num_workers: int = None,
+        threads_per_worker: int = 4,
+        batch_size: int = 4
+    ):
+        """
+        Args:
+            model (PreTrainedModel): Model loaded on CPU in this process.
+            tokenizer (PreTrainedTokenizer): Matching tokenizer.
+            num_workers (int): Worker processes (default: cores // threads_per_worker).
+            threads_per_worker (int): Cores pinned to each worker when `num_workers` is not given.
+            batch_size (int): Batch size used inside each worker.
+        """
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("InferenceWorkerPool needs the 'fork' start method (Linux/macOS).")
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("InferenceWorkerPool must be created from the main thread (it forks).")
+
+        cores = available_cores()
+        self.num_workers = max(1, min(num_workers or len(cores) // threads_per_worker, len(cores)))
+        self.tokenizer = tokenizer
+
+        ctx = multiprocessing.get_context("fork")
+        core_slices = ctx.Queue()
+        per_worker = len(cores) // self.num_workers
+        for k in range(self.num_workers):
+            # Contiguous ids keep a worker's threads on neighbouring cores
+            core_slices.put(cores[k * per_worker:(k + 1) * per_worker])
+
+        # Rust tokenizers' thread pool does not survive fork
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+        # Replacement workers fork with this pool's own model, whatever other pools exist
+        self._pool = ctx.Pool(
+            self.num_workers,
+            initializer=_init_worker,
+            initargs=(core_slices, model, tokenizer, batch_size)
+        )
+        logger.info(f"Started {self.num_workers} inference workers over {len(cores)} cores")
+
+    def generate(self, prompts: list[str], **gen_kwargs) -> list[str]:
+        """
+        Shard prompts across the workers and gather the completions in input order.
+
+        Prompts are dealt round-robin in length order, so every worker gets a
+        similar mix of long and short prompts and still batches them by length.
+
+        Args:
+            prompts (list[str]): Prompts to generate completions for.
+            **gen_kwargs: Extra keyword arguments for `run_batch_generation`.
+
+        Returns:
+            list[str]: Generated completions per prompt.
+        """
+        if not prompts:
+            return []
+
+        order = length_sorted_order(self.tokenizer, prompts)
+        shards = [order[k::self.num_workers] for k in range(self.num_workers)]
+        shards = [shard for shard in shards if shard]
+
+        results = self._pool.starmap(
+            _worker_generate,
+            [([prompts[i] for i in shard], gen_kwargs) for shard in shards]
+        )
+
+        outputs = [None] * len(prompts)
+        for shard, shard_outputs in zip(shards, results):
+            for i, text in zip(shard, shard_outputs):
+                outputs[i] = text
+        return outputs
+
+    def close(self):
+        """Shut the worker processes down and drop the pool's reference to the model."""
+        if self._pool is None:
+            return
+        self._pool.close()
+        self._pool.join()
+        self._pool = None
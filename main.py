@@ -1,27 +1,56 @@
 import os
 import torch
 from transformers import (
+    AutoConfig,
     AutoTokenizer,
     AutoModelForCausalLM,
     AutoModelForSeq2SeqLM
 )
-from transformers import BitsAndBytesConfig
+
+from utils.config import (
+    CPU_QUANTIZATION, CPU_QUANTIZATION_SANITY_CHECK,
+    INFERENCE_BACKEND, ONNX_QUANTIZE
+)
+from utils.logger import get_logger
+from core.quantize import quantize_for_cpu, compare_models, rss_mb
+from core.onnx_backend import load_onnx_seq2seq
+
+logger = get_logger("main")
 
 
 @torch.inference_mode()
-def load_doc_model(model_dir: str):
+def load_doc_model(
+    model_dir: str,
+    quantization: str = CPU_QUANTIZATION,
+    sanity_check: bool = CPU_QUANTIZATION_SANITY_CHECK,
+    backend: str = INFERENCE_BACKEND
+):
     """
     Load a transformer model (Causal or Seq2Seq) and tokenizer from local path.
     Automatically uses GPU if available. Supports DeepSeek-1.3B and CodeT5p.
+
+    On CPU, `quantization` ("dynamic-int8", "int8-weight-only", "int4-weight-only")
+    quantizes the Linear layers after loading; `sanity_check` compares a short
+    greedy decode against the float model. Memory use is logged either way.
+
+    `backend="onnx"` serves Seq2Seq models (CodeT5p) through ONNX Runtime on CPU,
+    falling back to PyTorch if the export or runtime is unavailable.
     """
     try:
+        rss_before = rss_mb()
         tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
 
         use_cuda = torch.cuda.is_available()
         device_map = "auto" if use_cuda else "cpu"
         dtype = torch.float16 if use_cuda else torch.float32
 
-        if "1.3b" in model_dir.lower():
+        # Decide the architecture from the config, so draft/distilled checkpoints load correctly too
+        config = AutoConfig.from_pretrained(model_dir, local_files_only=True)
+        if not getattr(config, "is_encoder_decoder", False):
+            # Left-pad so every row's completion starts right after the shared prompt width
+            tokenizer.padding_side = "left"
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
             model = AutoModelForCausalLM.from_pretrained(
                 model_dir,
                 device_map=device_map,
@@ -29,6 +58,14 @@ def load_doc_model(model_dir: str):
                 local_files_only=True
             )
         else:
+            if backend == "onnx" and not use_cuda:
+                try:
+                    model = load_onnx_seq2seq(model_dir, quantize=ONNX_QUANTIZE)
+                    logger.info(f"Loaded {os.path.basename(model_dir)} (onnx): RSS {rss_before:.0f} -> {rss_mb():.0f} MB")
+                    return tokenizer, model
+                except Exception as e:
+                    logger.warning(f"ONNX backend unavailable for {model_dir}, using PyTorch: {e}")
+
             model = AutoModelForSeq2SeqLM.from_pretrained(
                 model_dir,
                 device_map=device_map,
@@ -37,6 +74,20 @@ def load_doc_model(model_dir: str):
             )
 
         model.eval()
+        logger.info(f"Loaded {os.path.basename(model_dir)}: RSS {rss_before:.0f} -> {rss_mb():.0f} MB")
+
+        if quantization and not use_cuda:
+            quantized = quantize_for_cpu(model, quantization, inplace=not sanity_check)
+            quantized.eval()
+            if sanity_check:
+                check = compare_models(tokenizer, model, quantized)
+                logger.info(
+                    f"{quantization} sanity check: token agreement {check['token_agreement']:.0%}, "
+                    f"float {check['reference_s']:.2f}s vs quantized {check['candidate_s']:.2f}s"
+                )
+            model = quantized
+            logger.info(f"Quantized ({quantization}): RSS now {rss_mb():.0f} MB")
+
         return tokenizer, model
 
     except Exception as e:
@@ -1,18 +1,16 @@
 import os
 import uuid
+import importlib.util
 from datetime import datetime
 import hashlib
-import markdown2
 
-try:
-    from weasyprint import HTML
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
+# markdown2 and WeasyPrint are imported on first use: WeasyPrint alone takes
+# longer to import than the rest of the app's startup path
+WEASYPRINT_AVAILABLE = importlib.util.find_spec("weasyprint") is not None
 
 
 def sha1_hash(text: str) -> str:
-    """Generate SHA1 hash of text (can be used for caching later)."""
+    """Generate SHA1 hash of text."""
     return hashlib.sha1(text.encode("utf-8")).hexdigest()
 
 
@@ -79,6 +77,8 @@ def build_report(sections: dict, output_dir: str = "data/reports") -> tuple[str,
     # Optional PDF
     if WEASYPRINT_AVAILABLE:
         try:
+            import markdown2
+            from weasyprint import HTML
             html = markdown2.markdown_path(md_path)
             HTML(string=html).write_pdf(pdf_path)
         except Exception as e:
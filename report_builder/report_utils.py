@@ -1,11 +1,9 @@
 import os
-import markdown2
+import importlib.util
 
-try:
-    from weasyprint import HTML
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
+# markdown2 and WeasyPrint are imported on first use: WeasyPrint alone takes
+# longer to import than the rest of the app's startup path
+WEASYPRINT_AVAILABLE = importlib.util.find_spec("weasyprint") is not None
 
 
 def markdown_to_html(md_path: str) -> str:
@@ -20,6 +18,7 @@ def markdown_to_html(md_path: str) -> str:
     """
     if not os.path.exists(md_path):
         raise FileNotFoundError(f"{md_path} not found.")
+    import markdown2
     return markdown2.markdown_path(md_path)
 
 
@@ -39,6 +38,7 @@ def html_to_pdf(html_str: str, output_path: str) -> bool:
         return False
 
     try:
+        from weasyprint import HTML
         HTML(string=html_str).write_pdf(output_path)
         return True
     except Exception as e:
@@ -42,3 +42,22 @@ def format_quality_result(results: list[dict]) -> list[dict]:
         }
         for r in results
     ]
+
+
+def build_sections(summaries: list[str], docstrings: list[str], quality_results: list[dict]) -> dict:
+    """
+    Assemble the report sections passed to `build_report`.
+
+    Args:
+        summaries (list[str]): Generated summaries.
+        docstrings (list[str]): Generated docstrings.
+        quality_results (list[dict]): Raw quality results from linters.
+
+    Returns:
+        dict: Sections keyed 'Summary', 'Docstring' and 'Code Quality'.
+    """
+    return {
+        "Summary": format_summary_blocks(summaries),
+        "Docstring": format_docstring_blocks(docstrings),
+        "Code Quality": format_quality_result(quality_results)
+    }
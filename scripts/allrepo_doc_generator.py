@@ -1,6 +1,7 @@
 # docgen_all_repos.py
 
 import os
+import sys
 import json
 import torch
 import evaluate
@@ -11,6 +12,9 @@ from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, AutoConfig, BitsA
 from datasets import load_from_disk
 from torch.amp import autocast
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from core.batching import TokenBudgetPlanner, default_token_budget
+
 # Create directories
 os.makedirs("logs", exist_ok=True)
 os.makedirs("data/reports", exist_ok=True)
@@ -21,7 +25,8 @@ os.makedirs("models", exist_ok=True)
 MODEL_TAG = "codet5p"
 MODEL_ID = "Salesforce/codet5p-770m"
 MODEL_DIR = f"models/{MODEL_ID.split('/')[-1]}"
-BATCH_SIZE = 128
+MAX_BATCH_SIZE = 128  # hard row cap; batches are sized by MAX_BATCH_TOKENS
+MAX_BATCH_TOKENS = None  # padded-token budget per batch; None = derive from free RAM/VRAM
 
 # Device settings
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -97,19 +102,36 @@ def process_all_repos(input_path, output_path):
 
     tokenizer, model = load_model()
 
-    for i in tqdm(range(completed, len(data), BATCH_SIZE), desc=f"Processing {input_path}"):
-        batch = data[i:i + BATCH_SIZE]
-        batch = [item for item in batch if code_key in item and isinstance(item[code_key], str)]
+    def is_valid(item):
+        return code_key in item and isinstance(item[code_key], str)
+
+    def generate(prompts):
+        with torch.inference_mode(), autocast(device_type=device.type):
+            inputs = tokenizer(prompts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(device)
+            outputs = model.generate(inputs.input_ids, attention_mask=inputs.attention_mask, max_new_tokens=64, do_sample=False, num_beams=1)
+            return tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    # Token lengths drive the batch planner: short files pack densely, long files get small batches
+    lengths = [
+        min(len(tokenizer(build_prompt(item[code_key][:1000])).input_ids), 512) if is_valid(item) else 0
+        for item in data
+    ]
+    planner = TokenBudgetPlanner(
+        max_batch_tokens=MAX_BATCH_TOKENS or default_token_budget(device),
+        max_batch_size=MAX_BATCH_SIZE
+    )
+    print(f"Batch budget: {planner.max_batch_tokens} padded tokens, up to {planner.max_batch_size} rows")
+
+    for i, end in tqdm(planner.batches(lengths, start=completed), desc=f"Processing {input_path}", unit="batch"):
+        batch = data[i:end]
+        batch = [item for item in batch if is_valid(item)]
         if not batch:
             continue
 
         prompts = [build_prompt(item[code_key][:1000]) for item in batch]
         langs = [item.get("language") or detect_language(item[code_key]) for item in batch]
 
-        with torch.inference_mode(), autocast(device_type="cuda"):
-            inputs = tokenizer(prompts, return_tensors="pt", padding=True, truncation=True, max_length=512).to(device)
-            outputs = model.generate(inputs.input_ids, max_new_tokens=64, do_sample=False, num_beams=1)
-            decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        decoded = planner.run(generate, prompts)
 
         for j, item in enumerate(batch):
             reference = item.get(reference_key, "")
@@ -0,0 +1,107 @@
+"""
+End-to-end check of the inference daemon's HTTP API without model weights.
+
+Starts `InferenceDaemon` on a free localhost port with a stub loader (a runner
+that echoes its prompts), then exercises /health, /preload and /generate,
+including requests that `validate_generate_request` must reject with a 400.
+Exits with status 1 if any check fails.
+
+Usage:
+    python scripts/check_daemon.py
+"""
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from core.daemon import InferenceDaemon  # noqa: E402
+from utils.config import MODEL_PATHS, DEFAULT_MODEL, INFERENCE_DAEMON_MAX_TOKENS  # noqa: E402
+
+
+class StubRunner:
+    """Stands in for `InferenceScheduler`: echoes each prompt with the settings it got."""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, prompts: list[str], **gen_kwargs) -> list[str]:
+        self.calls.append(gen_kwargs)
+        return [f"echo:{prompt}" for prompt in prompts]
+
+
+def stub_loader(path: str) -> tuple:
+    """Daemon loader returning (tokenizer, model, runner) without touching the disk."""
+    return None, None, StubRunner()
+
+
+def request(url: str, payload: dict = None) -> tuple[int, dict]:
+    """Send a GET (no payload) or JSON POST and return (status, decoded body)."""
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def main() -> int:
+    daemon = InferenceDaemon("127.0.0.1", 0, budget_mb=1024, loader=stub_loader)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    url = daemon.url
+    failures = []
+
+    def check(name: str, ok: bool, detail=None):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}" + ("" if ok else f": {detail}"))
+        if not ok:
+            failures.append(name)
+
+    try:
+        status, body = request(f"{url}/health")
+        check("health lists every model", status == 200 and set(body.get("models", {})) == set(MODEL_PATHS), body)
+
+        status, body = request(f"{url}/preload", {"model": DEFAULT_MODEL})
+        check("preload starts loading", status == 200 and body.get("state") in ("loading", "ready"), body)
+
+        gen_kwargs = {"max_tokens": 8, "do_sample": False, "task": "summary"}
+        status, body = request(f"{url}/generate", {"model": DEFAULT_MODEL, "prompts": ["a", "b"], "gen_kwargs": gen_kwargs})
+        check("generate returns one output per prompt", status == 200 and body.get("outputs") == ["echo:a", "echo:b"], body)
+        runner = daemon.registry.get(MODEL_PATHS[DEFAULT_MODEL])[2]
+        check("generate passes the settings through", runner.calls[-1:] == [gen_kwargs], runner.calls)
+
+        status, body = request(f"{url}/health")
+        check("health reports the model ready", body.get("models", {}).get(DEFAULT_MODEL) == "ready", body)
+
+        bad_requests = {
+            "unsupported setting": {"gen_kwargs": {"temperature": 0.7}},
+            "max_tokens of the wrong type": {"gen_kwargs": {"max_tokens": "8"}},
+            "max_tokens as a bool": {"gen_kwargs": {"max_tokens": True}},
+            "max_tokens over the limit": {"gen_kwargs": {"max_tokens": INFERENCE_DAEMON_MAX_TOKENS + 1}},
+            "unknown task": {"gen_kwargs": {"task": "translate"}},
+            "prompts not a list of strings": {"prompts": ["a", 1]},
+        }
+        calls = len(runner.calls)
+        for name, overrides in bad_requests.items():
+            payload = {"model": DEFAULT_MODEL, "prompts": ["a"], "gen_kwargs": {}, **overrides}
+            status, body = request(f"{url}/generate", payload)
+            check(f"rejects {name}", status == 400 and "error" in body, (status, body))
+        check("rejected requests never reach the runner", len(runner.calls) == calls, runner.calls[calls:])
+
+        status, body = request(f"{url}/generate", {"model": "no-such-model", "prompts": ["a"]})
+        check("rejects an unknown model", status == 404, (status, body))
+    finally:
+        daemon.shutdown()
+        thread.join()
+
+    print(f"{len(failures)} check(s) failed" if failures else "All daemon checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Import-time budget check for the Streamlit app's startup path.
+
+Streamlit reruns app.py on every interaction and a cold process has to import
+everything app.py imports at module level before the page draws. This script
+reads those top-level imports from app.py, times them with `python -X importtime`
+in a fresh interpreter, and fails if they exceed the budget or pull in a stack
+that should only load on first use.
+
+Usage:
+    python scripts/check_import_time.py [--budget-ms 500] [--runs 3]
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP_PATH = os.path.join(ROOT, "app.py")
+
+IMPORT_TIME_BUDGET_MS = 500
+
+# Must only be imported on first use (model, GitHub and PDF stacks)
+DEFERRED_MODULES = ("torch", "transformers", "optimum", "weasyprint", "markdown2", "requests", "nbformat", "pylint")
+
+# Paid by `streamlit run` before app.py executes; reported but not counted against the budget
+FRAMEWORK_MODULES = ("streamlit",)
+
+TOP_LEVEL_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)$")
+
+
+def startup_imports(path: str = APP_PATH) -> list[str]:
+    """
+    Return the modules app.py imports at module level, in order.
+
+    Imports inside functions or `if` branches only run on first use and are skipped.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return modules
+
+
+def measure(modules: list[str]) -> tuple[dict, list[str]]:
+    """
+    Import `modules` in a fresh interpreter.
+
+    Returns:
+        tuple[dict, list[str]]: Cumulative microseconds per top-level import,
+            and the deferred modules that ended up in `sys.modules`.
+    """
+    code = "\n".join(
+        [f"import {m}" for m in modules] +
+        ["import sys", f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"]
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing the startup modules failed:\n{proc.stderr[-2000:]}")
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        match = TOP_LEVEL_LINE.match(line)
+        if match:
+            timings[match.group(2)] = int(match.group(1))
+    leaked = [m for m in proc.stdout.strip().split(",") if m]
+    return timings, leaked
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check app.py's startup import time.")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="Best of N fresh interpreters")
+    args = parser.parse_args()
+
+    modules = startup_imports()
+    best = None
+    for _ in range(max(1, args.runs)):
+        timings, leaked = measure(modules)
+        framework_us = sum(us for name, us in timings.items() if name.split(".")[0] in FRAMEWORK_MODULES)
+        app_us = sum(timings.values()) - framework_us
+        if best is None or app_us < best[0]:
+            best = (app_us, framework_us, timings, leaked)
+
+    app_us, framework_us, timings, leaked = best
+    print(f"Startup imports of app.py: {app_us / 1000:.0f} ms (budget {args.budget_ms:.0f} ms), "
+          f"plus {framework_us / 1000:.0f} ms for {', '.join(FRAMEWORK_MODULES)}")
+    for name, us in sorted(timings.items(), key=lambda kv: -kv[1])[:10]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if leaked:
+        print(f"FAIL: startup imports load deferred modules: {', '.join(leaked)}")
+        failed = True
+    if app_us / 1000 > args.budget_ms:
+        print("FAIL: startup imports exceed the budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,3 +19,80 @@ PROCESSED_PATH = os.path.join(DATA_DIR, "processed")
 
 # Report template (optional if using Jinja)
 TEMPLATE_PATH = os.path.join(BASE_DIR, "report_builder", "templates", "report_template.md")
+
+# Shared inference scheduler (Streamlit sessions)
+SCHEDULER_MAX_BATCH_SIZE = 8
+SCHEDULER_MAX_QUEUE_DEPTH = 64
+SCHEDULER_MAX_WAIT_MS = 20
+
+# Persistent generation cache (summaries / docstrings)
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+GENERATION_CACHE_PATH = os.path.join(CACHE_DIR, "generations.sqlite")
+GENERATION_CACHE_MAX_MB = 256
+
+# Snippet sizing: prompts are truncated at 512 tokens, so classes over the budget are split
+# into methods, and snippets up to PACK_MAX_SNIPPET_TOKENS share one summary prompt
+SNIPPET_TOKEN_BUDGET = 448
+PACK_MAX_SNIPPET_TOKENS = 64
+PACK_MAX_SNIPPETS = 6
+PACKED_SUMMARY_TOKENS_PER_SNIPPET = 40
+CHARS_PER_TOKEN_ESTIMATE = 3
+
+# Language detection for pasted code looks at most this many characters
+DETECT_SAMPLE_CHARS = 6000
+
+# Incremental runs: per-source function fingerprints and outputs from the last run
+INCREMENTAL_DIR = os.path.join(DATA_DIR, "incremental")
+
+# Near-duplicate snippets (MinHash/LSH) at or above this similarity reuse one generation
+NEAR_DUP_THRESHOLD = 0.9
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+# CPU inference: None, "dynamic-int8", "int8-weight-only" or "int4-weight-only"
+CPU_QUANTIZATION = None
+CPU_QUANTIZATION_SANITY_CHECK = False
+
+# Inference backend for Seq2Seq models on CPU: "torch" or "onnx" (needs optimum[onnxruntime])
+INFERENCE_BACKEND = "torch"
+ONNX_QUANTIZE = True
+
+# Multi-process CPU inference (0 = single process). Workers share weights via fork.
+WORKER_POOL_SIZE = 0
+WORKER_THREADS = 4
+
+# Assisted (speculative) decoding: small draft models sharing the target's tokenizer
+DRAFT_MODEL_PATHS = {
+    "DeepSeek-1.3B": os.path.join(MODEL_DIR, "deepseek-coder-draft")
+}
+ASSISTED_MIN_ACCEPT_RATE = 0.4
+# After falling back to plain decoding, try the draft again after this many greedy prompts
+ASSISTED_REPROBE_PROMPTS = 64
+
+# Model registry: loaded models beyond this budget are evicted least-recently-used first
+MODEL_MEMORY_BUDGET_MB = 8192
+DEFAULT_MODEL = "CodeT5p"
+
+# Inference daemon (`python -m bigdocbot serve`): the app and CLI use it when it is running
+INFERENCE_DAEMON_HOST = "127.0.0.1"
+INFERENCE_DAEMON_PORT = 8765
+INFERENCE_DAEMON_URL = f"http://{INFERENCE_DAEMON_HOST}:{INFERENCE_DAEMON_PORT}"
+# Largest max_tokens a daemon client may request
+INFERENCE_DAEMON_MAX_TOKENS = 512
+
+# Linter timeouts: base seconds plus seconds per 1000 lines of input
+LINT_TIMEOUT_S = 10
+LINT_TIMEOUT_PER_KLOC_S = 10
+
+# Repo linting: files per linter process and parallel jobs (0 = all cores)
+LINT_CHUNK_SIZE = 40
+LINT_JOBS = 0
+
+# Persistent lint result cache
+LINT_CACHE_PATH = os.path.join(CACHE_DIR, "lint.sqlite")
+LINT_CACHE_MAX_MB = 64
+
+# Built-in AST metrics (quick quality tier): functions above these are reported
+AST_MAX_COMPLEXITY = 10
+AST_MAX_NESTING_DEPTH = 4
+AST_MAX_FUNCTION_LINES = 60